@@ -21,7 +21,7 @@ export default function AdminStats() {
         { title: '전체 강의', value: stats?.total_courses, icon: BookOpen, color: 'bg-blue-500' },
         { title: '등록 학생', value: stats?.total_students, icon: Users, color: 'bg-green-500' },
         { title: '총 수강 신청', value: stats?.total_enrollments, icon: UserCheck, color: 'bg-purple-500' },
-        { title: '신청률', value: `${((stats?.total_enrollments / (stats?.total_courses * 30)) * 100 || 0).toFixed(1)}%`, icon: TrendingUp, color: 'bg-orange-500' },
+        { title: '신청률', value: `${((stats?.fill_ratio ?? 0) * 100).toFixed(1)}%`, icon: TrendingUp, color: 'bg-orange-500' },
     ];
 
     return (
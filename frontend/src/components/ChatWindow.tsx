@@ -32,6 +32,7 @@ export default function ChatWindow() {
     const lastMessage = messages[messages.length - 1];
     if (
       lastMessage?.role === 'model' && 
+      !lastMessage.isThinking &&
       !isSpeaking && 
       isTtsEnabled && 
       lastMessage.id !== lastSpokenMessageId.current
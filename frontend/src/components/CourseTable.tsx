@@ -1,13 +1,19 @@
 import { useState } from 'react';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
-import { getCourses, createCourse, updateCourse, deleteCourse } from '../services/course';
+import { useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { getCoursesPage, createCourse, updateCourse, deleteCourse } from '../services/course';
 import type { Course } from '../types';
 import { Edit, Trash2, Plus, X } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
 
 export default function CourseTable() {
   const queryClient = useQueryClient();
-  const { data: courses, isLoading, error } = useQuery({ queryKey: ['courses'], queryFn: getCourses });
+  const { data, isLoading, error, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
+    queryKey: ['courses'],
+    queryFn: ({ pageParam }) => getCoursesPage(pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+  });
+  const courses = data?.pages.flatMap((page) => page.items);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [editingCourse, setEditingCourse] = useState<Course | null>(null);
   const [formData, setFormData] = useState<Partial<Course>>({
@@ -137,6 +143,17 @@ export default function CourseTable() {
             </tbody>
           </table>
         </div>
+        {hasNextPage && (
+          <div className="p-4 border-t border-gray-100 text-center">
+            <button
+              onClick={() => fetchNextPage()}
+              disabled={isFetchingNextPage}
+              className="text-sm text-blue-600 hover:text-blue-800 disabled:opacity-50"
+            >
+              {isFetchingNextPage ? '불러오는 중...' : '더 보기'}
+            </button>
+          </div>
+        )}
       </div>
 
       <AnimatePresence>
@@ -1,14 +1,17 @@
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import axios from 'axios';
 import { auth } from '../firebase';
-import type { User } from '../types';
+import type { Page, User } from '../types';
 import { Shield, ShieldAlert, User as UserIcon } from 'lucide-react';
 
 
-const getUsers = async (): Promise<User[]> => {
+const USER_PAGE_SIZE = 50;
+
+const getUsersPage = async (startAfter: string | null): Promise<Page<User>> => {
     const token = await auth.currentUser?.getIdToken();
     const response = await axios.get('/api/users', {
-        headers: { Authorization: `Bearer ${token}` }
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: USER_PAGE_SIZE, start_after: startAfter || undefined },
     });
     return response.data;
 };
@@ -23,7 +26,13 @@ const updateUserRole = async ({ uid, role }: { uid: string, role: string }) => {
 
 export default function UserTable() {
     const queryClient = useQueryClient();
-    const { data: users, isLoading } = useQuery({ queryKey: ['users'], queryFn: getUsers });
+    const { data, isLoading, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
+        queryKey: ['users'],
+        queryFn: ({ pageParam }) => getUsersPage(pageParam),
+        initialPageParam: null as string | null,
+        getNextPageParam: (lastPage) => lastPage.next_cursor,
+    });
+    const users = data?.pages.flatMap((page) => page.items);
 
     const mutation = useMutation({
         mutationFn: updateUserRole,
@@ -89,6 +98,17 @@ export default function UserTable() {
                     ))}
                 </tbody>
             </table>
+            {hasNextPage && (
+                <div className="p-4 border-t border-gray-100 text-center">
+                    <button
+                        onClick={() => fetchNextPage()}
+                        disabled={isFetchingNextPage}
+                        className="text-sm text-indigo-600 hover:text-indigo-900 disabled:opacity-50"
+                    >
+                        {isFetchingNextPage ? '불러오는 중...' : '더 보기'}
+                    </button>
+                </div>
+            )}
         </div>
     );
 }
@@ -1,6 +1,13 @@
 import { useState, useCallback } from 'react';
 import type { Message } from '../types/chat';
-import { sendMessageToAgent } from '../services/agent';
+import { streamMessageToAgent } from '../services/agent';
+
+const TOOL_LABELS: Record<string, string> = {
+  list_courses: '강의 목록 조회',
+  get_my_enrollments: '수강 내역 조회',
+  enroll_course: '수강 신청',
+  enroll_courses: '수강 신청',
+};
 
 export const useAgent = () => {
   const [messages, setMessages] = useState<Message[]>([]);
@@ -18,27 +25,52 @@ export const useAgent = () => {
     setMessages((prev) => [...prev, userMessage]);
     setIsProcessing(true);
 
+    const agentMessageId = (Date.now() + 1).toString();
+    const updateAgentMessage = (patch: Partial<Message>) => {
+      setMessages((prev) =>
+        prev.map((msg) => (msg.id === agentMessageId ? { ...msg, ...patch } : msg)),
+      );
+    };
+
     try {
-      const responseText = await sendMessageToAgent(text);
+      let streamedText = '';
+      let started = false;
+
+      const responseText = await streamMessageToAgent(text, (event) => {
+        if (!started) {
+          // 첫 이벤트가 오면 로딩 표시 대신 답변 말풍선을 띄움
+          started = true;
+          setIsProcessing(false);
+          setMessages((prev) => [
+            ...prev,
+            { id: agentMessageId, role: 'model', text: '', timestamp: new Date(), isThinking: true },
+          ]);
+        }
+        if (event.type === 'tool_start') {
+          updateAgentMessage({ text: streamedText || `_${TOOL_LABELS[event.name] ?? event.name} 중..._` });
+        } else if (event.type === 'delta') {
+          streamedText += event.content;
+          updateAgentMessage({ text: streamedText });
+        }
+      });
       console.log('[useAgent] sendMessage success', { responseText });
-      
-      const agentMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        role: 'model',
-        text: responseText,
-        timestamp: new Date(),
-      };
-
-      setMessages((prev) => [...prev, agentMessage]);
+
+      if (started) {
+        updateAgentMessage({ text: responseText, isThinking: false });
+      } else {
+        setMessages((prev) => [
+          ...prev,
+          { id: agentMessageId, role: 'model', text: responseText, timestamp: new Date() },
+        ]);
+      }
     } catch (error) {
       console.error('[useAgent] sendMessage failed', error);
-      const errorMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        role: 'model',
-        text: 'Sorry, I encountered an error matching your request. Please try again.',
-        timestamp: new Date(),
-      };
-      setMessages((prev) => [...prev, errorMessage]);
+      const errorText = 'Sorry, I encountered an error matching your request. Please try again.';
+      setMessages((prev) =>
+        prev.some((msg) => msg.id === agentMessageId)
+          ? prev.map((msg) => (msg.id === agentMessageId ? { ...msg, text: errorText, isThinking: false } : msg))
+          : [...prev, { id: agentMessageId, role: 'model', text: errorText, timestamp: new Date() }],
+      );
     } finally {
       setIsProcessing(false);
     }
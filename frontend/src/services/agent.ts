@@ -1,45 +1,70 @@
-import axios from 'axios';
 import { auth } from '../firebase';
 
-const api = axios.create();
+export type AgentStreamEvent =
+  | { type: 'delta'; content: string }
+  | { type: 'tool_start'; name: string }
+  | { type: 'tool_end'; name: string; ok: boolean }
+  | { type: 'done'; response: string }
+  | { type: 'error'; detail: string };
 
-api.interceptors.request.use(async (config) => {
+// SSE(text/event-stream)로 진행 상황과 답변 조각을 받아 onEvent로 전달하고 최종 답변을 반환
+export const streamMessageToAgent = async (
+  message: string,
+  onEvent: (event: AgentStreamEvent) => void,
+): Promise<string> => {
   const user = auth.currentUser;
-  console.log('[agent-api] request interceptor', {
-    url: config.url,
-    method: config.method,
-    hasUser: !!user,
-  });
+  const headers: Record<string, string> = {
+    'Content-Type': 'application/json',
+    Accept: 'text/event-stream',
+  };
   if (user) {
-    const token = await user.getIdToken();
-    config.headers.Authorization = `Bearer ${token}`;
-    console.log('[agent-api] auth header attached', {
-      uid: user.uid,
-      tokenLength: token.length,
-    });
+    headers.Authorization = `Bearer ${await user.getIdToken()}`;
   }
-  return config;
-});
-
-export const sendMessageToAgent = async (message: string): Promise<string> => {
-  try {
-    console.log('[agent-api] POST /api/agent/chat', { message });
-    const response = await api.post('/api/agent/chat', { message });
-    console.log('[agent-api] response received', {
-      status: response.status,
-      data: response.data,
-    });
-    return response.data.response;
-  } catch (error) {
-    if (axios.isAxiosError(error)) {
-      console.error('Error sending message:', {
-        status: error.response?.status,
-        data: error.response?.data,
-        message: error.message,
-      });
-    } else {
-      console.error('Error sending message:', error);
+
+  console.log('[agent-api] POST /api/agent/chat (stream)', { message });
+  const response = await fetch('/api/agent/chat', {
+    method: 'POST',
+    headers,
+    body: JSON.stringify({ message, stream: true }),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Agent request failed: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let finalResponse = '';
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // 이벤트는 빈 줄로 구분됨
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      const data = raw
+        .split('\n')
+        .filter((line) => line.startsWith('data:'))
+        .map((line) => line.slice(5).trim())
+        .join('\n');
+      if (!data) continue;
+
+      const event = JSON.parse(data) as AgentStreamEvent;
+      if (event.type === 'error') {
+        throw new Error(event.detail);
+      }
+      if (event.type === 'done') {
+        finalResponse = event.response;
+      }
+      onEvent(event);
     }
-    throw error;
   }
+
+  return finalResponse;
 };
@@ -1,6 +1,6 @@
 import axios from 'axios';
 import { auth } from '../firebase';
-import type { Course } from '../types';
+import type { Course, Page } from '../types';
 
 const api = axios.create();
 
@@ -13,8 +13,12 @@ api.interceptors.request.use(async (config) => {
   return config;
 });
 
-export const getCourses = async (): Promise<Course[]> => {
-  const response = await api.get('/api/courses');
+export const COURSE_PAGE_SIZE = 20;
+
+export const getCoursesPage = async (startAfter?: string | null): Promise<Page<Course>> => {
+  const response = await api.get('/api/courses', {
+    params: { limit: COURSE_PAGE_SIZE, start_after: startAfter || undefined },
+  });
   return response.data;
 };
 
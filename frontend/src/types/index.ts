@@ -23,3 +23,8 @@ export interface Enrollment {
   course_id: string;
   timestamp: string; // ISO string
 }
+
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
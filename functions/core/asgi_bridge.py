@@ -0,0 +1,249 @@
+import asyncio
+import atexit
+import threading
+import traceback
+from typing import Iterator, Optional
+
+from firebase_functions import https_fn
+
+
+class AsgiBridge:
+    """
+    Firebase Functions(WSGI) 요청을 ASGI 앱으로 전달하는 브리지.
+
+    - 인스턴스 수명 동안 살아 있는 이벤트 루프 하나를 전용 스레드에서 돌리고,
+      요청 스레드는 run_coroutine_threadsafe로 작업을 넘긴 뒤 결과를 기다립니다.
+      (요청마다 asyncio.run() 하지 않으므로 루프/스레드풀 생성 비용이 없음)
+    - 요청 바디는 get_data()로 받은 bytes 객체를 그대로 전달합니다.
+    - 응답이 more_body=True로 나뉘어 오면 제너레이터로 청크 단위 스트리밍합니다.
+    - 루프를 시작할 때 ASGI lifespan startup을, close() 시 shutdown을 보냅니다.
+      (lifespan을 지원하지 않는 앱이면 건너뜀. startup이 실패하면 요청을 처리하지 않고 예외를 전파)
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is not None:
+            return loop
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                errors: list = []
+                thread = threading.Thread(target=self._run_loop, args=(loop, ready, errors), name="asgi-bridge-loop", daemon=True)
+                thread.start()
+                ready.wait()
+                if errors:
+                    # 초기화가 덜 된 상태로 요청을 처리하지 않음 (다음 요청에서 다시 시작을 시도)
+                    thread.join(timeout=5)
+                    raise errors[0]
+                self._loop, self._thread = loop, thread
+                _register_shutdown(self.close)
+            return self._loop
+
+    def _run_loop(self, loop: asyncio.AbstractEventLoop, ready: threading.Event, errors: list) -> None:
+        asyncio.set_event_loop(loop)
+
+        async def serve():
+            # 수명이 긴 루트 태스크: anyio 스레드풀 워커가 이 태스크에 묶여 요청 간에 재사용됨
+            self._stop = asyncio.Event()
+            lifespan = _Lifespan(self.app)
+            try:
+                await lifespan.startup()
+            except Exception as e:
+                errors.append(e)
+                return
+            finally:
+                ready.set()
+            await self._stop.wait()
+            await lifespan.shutdown()
+
+        try:
+            loop.run_until_complete(serve())
+        finally:
+            loop.close()
+
+    def close(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(self._stop.set)
+        thread.join(timeout=5)
+
+    def _run(self, coro):
+        try:
+            loop = self._ensure_loop()
+        except BaseException:
+            coro.close()
+            raise
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    @staticmethod
+    def _build_scope(req: https_fn.Request) -> dict:
+        environ = req.environ
+        raw_path = environ.get("RAW_URI") or environ.get("REQUEST_URI") or req.path
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": environ.get("SERVER_PROTOCOL", "HTTP/1.1").split("/")[-1],
+            "method": req.method,
+            "scheme": environ.get("wsgi.url_scheme", "http"),
+            "path": req.path,
+            "raw_path": raw_path.split("?", 1)[0].encode("latin-1"),
+            "root_path": "",
+            "query_string": environ.get("QUERY_STRING", "").encode("latin-1"),
+            # WSGI 헤더는 이미 latin-1 str이므로 그대로 bytes로 되돌립니다.
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in req.headers.items()],
+            "client": (req.remote_addr, 0) if req.remote_addr else None,
+            "server": None,
+        }
+
+    @staticmethod
+    async def _next_message(queue: asyncio.Queue, task: asyncio.Task) -> Optional[dict]:
+        while True:
+            if not queue.empty():
+                return queue.get_nowait()
+            if task.done():
+                task.result()  # 앱에서 발생한 예외를 그대로 전파
+                return None
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                return getter.result()
+            getter.cancel()
+
+    def __call__(self, req: https_fn.Request) -> https_fn.Response:
+        scope = self._build_scope(req)
+        body = req.get_data(cache=False)
+
+        async def start_app():
+            queue: asyncio.Queue = asyncio.Queue()
+            disconnected = asyncio.Event()
+            request_sent = False
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+                # 바디는 한 번에 전달했으므로, 이후 receive()는 응답이 끝날 때까지 대기
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                await queue.put(message)
+
+            task = asyncio.get_running_loop().create_task(self.app(scope, receive, send))
+            return queue, disconnected, task
+
+        queue, disconnected, task = self._run(start_app())
+
+        async def finish():
+            disconnected.set()
+            try:
+                await task
+            except Exception:
+                # Starlette는 500 응답을 보낸 뒤 예외를 다시 던지므로 로그만 남김
+                print(traceback.format_exc())
+
+        start = self._run(self._next_message(queue, task))
+        if start is None or start["type"] != "http.response.start":
+            self._run(finish())
+            raise RuntimeError("ASGI app finished without starting a response")
+
+        status = start.get("status", 200)
+        headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in start.get("headers", [])]
+
+        first = self._run(self._next_message(queue, task))
+        first_chunk = first.get("body", b"") if first else b""
+        if not first or not first.get("more_body", False):
+            self._run(finish())
+            return https_fn.Response(response=first_chunk, status=status, headers=headers)
+
+        def stream() -> Iterator[bytes]:
+            try:
+                if first_chunk:
+                    yield first_chunk
+                while True:
+                    message = self._run(self._next_message(queue, task))
+                    if message is None or message["type"] != "http.response.body":
+                        break
+                    chunk = message.get("body", b"")
+                    if chunk:
+                        yield chunk
+                    if not message.get("more_body", False):
+                        break
+            finally:
+                self._run(finish())
+
+        return https_fn.Response(response=stream(), status=status, headers=headers, direct_passthrough=True)
+
+
+class _Lifespan:
+    """ASGI lifespan 프로토콜의 서버 측 (startup/shutdown 메시지를 보내고 완료를 기다림)"""
+
+    TIMEOUT_SEC = 10
+
+    def __init__(self, app):
+        self.app = app
+        self._task: Optional[asyncio.Task] = None
+        self._shutdown_requested = asyncio.Event()
+        self._done = {"startup": asyncio.Event(), "shutdown": asyncio.Event()}
+        self._failed: dict = {}
+        self.supported = False
+
+    async def _receive(self) -> dict:
+        if not self._done["startup"].is_set():
+            return {"type": "lifespan.startup"}
+        await self._shutdown_requested.wait()
+        return {"type": "lifespan.shutdown"}
+
+    async def _send(self, message: dict) -> None:
+        phase, _, result = message["type"].removeprefix("lifespan.").partition(".")
+        if result == "failed":
+            self._failed[phase] = message.get("message", "")
+            print(f"[asgi_bridge] lifespan {phase} failed: {self._failed[phase]}")
+        if phase in self._done:
+            self._done[phase].set()
+
+    async def _wait(self, phase: str) -> bool:
+        waiter = asyncio.ensure_future(self._done[phase].wait())
+        await asyncio.wait({waiter, self._task}, timeout=self.TIMEOUT_SEC, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        return self._done[phase].is_set()
+
+    async def startup(self) -> None:
+        scope = {"type": "lifespan", "asgi": {"version": "3.0", "spec_version": "2.0"}, "state": {}}
+        self._task = asyncio.get_running_loop().create_task(self.app(scope, self._receive, self._send))
+        self.supported = await self._wait("startup")
+        if "startup" in self._failed:
+            raise RuntimeError(f"ASGI lifespan startup failed: {self._failed['startup']}")
+        if not self.supported and self._task.done() and self._task.exception() is not None:
+            # lifespan을 지원하지 않는 앱은 예외로 알림 (스펙) → 요청만 처리
+            print(f"[asgi_bridge] lifespan unsupported: {self._task.exception()}")
+
+    async def shutdown(self) -> None:
+        if not self.supported or self._task.done():
+            return
+        self._shutdown_requested.set()
+        await self._wait("shutdown")
+
+
+def _register_shutdown(callback) -> None:
+    # anyio 워커는 비데몬 스레드이고 인터프리터는 atexit 훅보다 먼저 이들을 join하므로,
+    # 메인 스레드가 끝나는 시점(비데몬 스레드 join 직전)을 감시 스레드로 기다렸다가 루프를 정리합니다.
+    # atexit은 메인 스레드가 끝나지 않고 종료되는 경우를 위한 보조 경로 (close()는 여러 번 호출해도 안전)
+    def wait_for_main_thread():
+        threading.main_thread().join()
+        callback()
+
+    threading.Thread(target=wait_for_main_thread, name="asgi-bridge-shutdown", daemon=True).start()
+    atexit.register(callback)
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.metrics import cache_families, family, registry
+
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "1024"))
+# 만료(exp) 직전 토큰은 캐시에서 꺼내지 않고 다시 검증 (시계 오차 대비)
+AUTH_TOKEN_CACHE_EXP_LEEWAY_SEC = float(os.getenv("AUTH_TOKEN_CACHE_EXP_LEEWAY_SEC", "5"))
+# 캐시 적중 요청 중 이 비율만큼 폐기(revocation) 여부를 다시 확인 (0이면 확인하지 않음, 요청마다 getUser RPC 1회)
+AUTH_REVOCATION_CHECK_RATE = float(os.getenv("AUTH_REVOCATION_CHECK_RATE", "0"))
+# 서명 공개키(인증서)를 백그라운드에서 미리 받아 두는 주기 (0이면 끔)
+AUTH_SIGNING_KEY_REFRESH_SEC = float(os.getenv("AUTH_SIGNING_KEY_REFRESH_SEC", "1800"))
+
+
+def _verify_with_firebase(token: str, check_revoked: bool) -> Dict[str, Any]:
+    from firebase_admin import auth
+
+    return auth.verify_id_token(token, check_revoked=check_revoked)
+
+
+def _signing_key_request(app=None) -> Tuple[Callable[..., Any], str]:
+    """
+    firebase_admin의 ID 토큰 검증기가 쓰는 인증서 요청 함수와 인증서 URL.
+    공개 API가 없어 비공개 속성(auth._get_client, _token_verifier.request, _token_gen.ID_TOKEN_CERT_URI)을 쓰므로
+    requirements.txt에서 firebase-admin 버전을 고정하고, tests/test_auth_cache.py가 속성이 남아 있는지 확인합니다.
+    """
+    from firebase_admin import _token_gen, auth
+
+    request = getattr(getattr(auth._get_client(app), "_token_verifier", None), "request", None)
+    cert_uri = getattr(_token_gen, "ID_TOKEN_CERT_URI", None)
+    if request is None or cert_uri is None:
+        raise RuntimeError("firebase_admin internals for signing key refresh are missing (check the pinned firebase-admin version)")
+    return request, cert_uri
+
+
+def _refresh_signing_keys() -> None:
+    # firebase_admin의 검증기가 쓰는 HTTP 세션(cache-control 캐시)으로 인증서를 받아 두면
+    # 요청 경로의 검증에서는 캐시된 키를 사용합니다.
+    request, cert_uri = _signing_key_request()
+    request(cert_uri, method="GET")
+
+
+class VerifiedTokenCache:
+    """
+    검증된 Firebase ID 토큰의 인스턴스 단위 LRU 캐시.
+
+    - 키는 토큰의 SHA-256 해시이며 (원문 토큰은 보관하지 않음), 디코딩된 claims를 토큰의 exp까지 보관합니다.
+    - revocation_check_rate > 0이면 캐시 적중 요청 일부에서 check_revoked=True로 다시 검증합니다.
+    - 서명 키는 첫 검증 이후 백그라운드 스레드에서 주기적으로 갱신합니다.
+    """
+
+    def __init__(
+        self,
+        verify: Callable[[str, bool], Dict[str, Any]] = _verify_with_firebase,
+        max_entries: int = AUTH_TOKEN_CACHE_MAX_ENTRIES,
+        exp_leeway_sec: float = AUTH_TOKEN_CACHE_EXP_LEEWAY_SEC,
+        revocation_check_rate: float = AUTH_REVOCATION_CHECK_RATE,
+        key_refresh_sec: float = AUTH_SIGNING_KEY_REFRESH_SEC,
+        refresh_keys: Callable[[], None] = _refresh_signing_keys,
+    ):
+        self._verify = verify
+        self.max_entries = max_entries
+        self.exp_leeway_sec = exp_leeway_sec
+        self.revocation_check_rate = revocation_check_rate
+        self.key_refresh_sec = key_refresh_sec
+        self._refresh_keys = refresh_keys
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.revocation_checks = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] - self.exp_leeway_sec <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _store(self, key: str, claims: Dict[str, Any]) -> None:
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            self._entries[key] = (float(exp), claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _should_check_revocation(self) -> bool:
+        return self.revocation_check_rate > 0 and random.random() < self.revocation_check_rate
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """디코딩된 claims 반환. 검증 실패 시 firebase_admin의 예외를 그대로 전달합니다."""
+        key = self._key(token)
+        claims = self._lookup(key)
+        check_revoked = self._should_check_revocation()
+        if claims is not None and not check_revoked:
+            return claims
+
+        if check_revoked:
+            self.revocation_checks += 1
+        try:
+            claims = self._verify(token, check_revoked)
+        except Exception:
+            self.invalidate(token)
+            raise
+        self._store(key, claims)
+        self._start_key_refresh()
+        return claims
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(self.key_refresh_sec)
+            try:
+                self._refresh_keys()
+            except Exception as e:
+                print(f"[auth] signing key refresh failed: {e}")
+
+    def _start_key_refresh(self) -> None:
+        if self.key_refresh_sec <= 0:
+            return
+        if self._refresh_thread is not None:
+            return
+        with self._lock:
+            if self._refresh_thread is None:
+                self._refresh_thread = threading.Thread(target=self._refresh_loop, name="auth-key-refresh", daemon=True)
+                self._refresh_thread.start()
+
+
+# 인스턴스 전역 토큰 캐시
+token_cache = VerifiedTokenCache()
+
+registry.register_collector(
+    "auth_token_cache",
+    lambda: cache_families("auth_token", token_cache.hits, token_cache.misses)
+    + [family("auth_revocation_checks_total", "counter", "Sampled ID token revocation checks", [({}, token_cache.revocation_checks)])],
+)
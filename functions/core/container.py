@@ -0,0 +1,185 @@
+import asyncio
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from core.database import db_resolved, get_async_db, get_db
+from core.metrics import cache_families, registry
+from core.request_timing import TimedRepository
+from repositories.async_firestore_repo import (
+    AsyncFirestoreCourseRepository,
+    AsyncFirestoreEnrollmentRepository,
+    AsyncFirestoreUserRepository,
+    AsyncShardedFirestoreEnrollmentRepository,
+)
+from repositories.course_cache import CourseCatalogCache
+from repositories.firestore_repo import (
+    DEFAULT_SEAT_SHARDS,
+    FirestoreCourseRepository,
+    FirestoreEnrollmentRepository,
+    FirestoreUserRepository,
+    ShardedFirestoreEnrollmentRepository,
+)
+from services.admission_service import admission_controller
+from services.course_service import AsyncCourseService, CourseService
+from services.enrollment_service import AsyncEnrollmentService, EnrollmentService
+from services.stats_service import StatsService
+from services.user_service import AsyncUserService, UserService
+
+
+COURSE_CACHE_LISTENER_ENABLED = os.getenv("COURSE_CACHE_LISTENER", "1") != "0"
+ENROLLMENT_LAYOUT = os.getenv("ENROLLMENT_LAYOUT", "document").strip().lower()
+ENROLLMENT_SEAT_SHARDS = int(os.getenv("ENROLLMENT_SEAT_SHARDS", str(DEFAULT_SEAT_SHARDS)))
+
+
+def build_enrollment_repository(db) -> FirestoreEnrollmentRepository:
+    # ENROLLMENT_LAYOUT=sharded: 학생별 문서 + 좌석 샤드 카운터 (migrate_enrollments.py로 전환)
+    if ENROLLMENT_LAYOUT == "sharded":
+        return ShardedFirestoreEnrollmentRepository(db, shards=ENROLLMENT_SEAT_SHARDS)
+    return FirestoreEnrollmentRepository(db)
+
+
+def build_async_enrollment_repository(db) -> AsyncFirestoreEnrollmentRepository:
+    if ENROLLMENT_LAYOUT == "sharded":
+        return AsyncShardedFirestoreEnrollmentRepository(db, shards=ENROLLMENT_SEAT_SHARDS)
+    return AsyncFirestoreEnrollmentRepository(db)
+
+
+@dataclass
+class SyncServices:
+    db: Any
+    course: CourseService
+    enrollment: EnrollmentService
+    user: UserService
+    stats: StatsService
+
+
+@dataclass
+class AsyncServices:
+    db: Any
+    course: AsyncCourseService
+    enrollment: AsyncEnrollmentService
+    user: AsyncUserService
+
+
+class ServiceContainer:
+    """
+    인스턴스 단위 서비스 컨테이너 (main.py의 FastAPI lifespan에서 생성).
+
+    저장소와 서비스는 요청 간 상태가 없으므로 DB 클라이언트별로 한 번만 만들어 재사용합니다.
+    저장소는 TimedRepository로 감싸 요청별 Firestore 읽기/쓰기 시간을 집계합니다 (core.request_timing).
+    요청마다 달라지는 상태(에이전트의 ChatContext 등)는 서비스 호출 안에서 만듭니다.
+    get_db()/get_async_db()가 다른 클라이언트를 돌려주면(재연결, 다른 이벤트 루프) 해당 묶음만 다시 만듭니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalog_cache: Optional[CourseCatalogCache] = None
+        self._catalog_cache_db = None
+        self._sync: Optional[SyncServices] = None
+        self._async: Optional[AsyncServices] = None
+        self._agent = None
+        self._agent_services: Optional[SyncServices] = None
+
+    def _get_catalog_cache(self, db) -> CourseCatalogCache:
+        # 호출 측이 self._lock을 잡고 있어야 함
+        if self._catalog_cache is None or self._catalog_cache_db is not db:
+            if self._catalog_cache is not None:
+                self._catalog_cache.stop_listener()
+            self._catalog_cache = CourseCatalogCache()
+            self._catalog_cache_db = db
+            if COURSE_CACHE_LISTENER_ENABLED:
+                self._catalog_cache.start_listener(db.collection("courses"))
+            cache = self._catalog_cache
+            registry.register_collector("course_catalog_cache", lambda: cache_families("course_catalog", cache.hits, cache.misses))
+        return self._catalog_cache
+
+    def catalog_cache(self) -> CourseCatalogCache:
+        """인스턴스 전역 강의 목록 캐시 (동기/비동기 저장소가 공유, 리스너는 동기 클라이언트에 붙음)"""
+        db = get_db()
+        with self._lock:
+            return self._get_catalog_cache(db)
+
+    def services(self) -> SyncServices:
+        db = get_db()
+        current = self._sync
+        if current is not None and current.db is db:
+            return current
+        with self._lock:
+            if self._sync is None or self._sync.db is not db:
+                course_repo = TimedRepository(FirestoreCourseRepository(db, cache=self._get_catalog_cache(db)))
+                course = CourseService(course_repo)
+                user = UserService(TimedRepository(FirestoreUserRepository(db)))
+                self._sync = SyncServices(
+                    db=db,
+                    course=course,
+                    enrollment=EnrollmentService(course_repo, TimedRepository(build_enrollment_repository(db)), admission=admission_controller),
+                    user=user,
+                    stats=StatsService(course, user),
+                )
+            return self._sync
+
+    async def async_services(self) -> AsyncServices:
+        """비동기 라우트용 (이벤트 루프 안에서 호출)"""
+        # DB 탐색(동기 RPC)이 필요한 콜드 스타트/재연결 직후에는 이벤트 루프를 막지 않도록 스레드에서 수행
+        sync_db = get_db() if db_resolved() else await asyncio.to_thread(get_db)
+        db = get_async_db()
+        current = self._async
+        if current is not None and current.db is db:
+            return current
+        with self._lock:
+            if self._async is None or self._async.db is not db:
+                course_repo = TimedRepository(AsyncFirestoreCourseRepository(db, cache=self._get_catalog_cache(sync_db)))
+                self._async = AsyncServices(
+                    db=db,
+                    course=AsyncCourseService(course_repo),
+                    enrollment=AsyncEnrollmentService(course_repo, TimedRepository(build_async_enrollment_repository(db)), admission=admission_controller),
+                    user=AsyncUserService(TimedRepository(AsyncFirestoreUserRepository(db))),
+                )
+            return self._async
+
+    def agent_service(self):
+        from services.agent_service import AgentService
+
+        services = self.services()
+        with self._lock:
+            # 에이전트는 동기 서비스를 그대로 공유 (강의/수강 서비스를 따로 만들지 않음)
+            if self._agent is None or self._agent_services is not services:
+                self._agent = AgentService(services.course, services.enrollment)
+                self._agent_services = services
+            return self._agent
+
+    def close(self) -> None:
+        with self._lock:
+            if self._catalog_cache is not None:
+                self._catalog_cache.stop_listener()
+            self._catalog_cache = self._catalog_cache_db = None
+            self._sync = self._async = self._agent = self._agent_services = None
+
+
+_container: Optional[ServiceContainer] = None
+_container_lock = threading.Lock()
+
+
+def init_container() -> ServiceContainer:
+    """lifespan 시작 시 호출. 이미 있으면 그대로 반환합니다."""
+    global _container
+    with _container_lock:
+        if _container is None:
+            _container = ServiceContainer()
+        return _container
+
+
+def get_container() -> ServiceContainer:
+    # lifespan 없이 앱을 쓰는 경우(스크립트, lifespan을 돌리지 않는 테스트 클라이언트)를 위한 지연 생성
+    container = _container
+    return container if container is not None else init_container()
+
+
+def shutdown_container() -> None:
+    global _container
+    with _container_lock:
+        container, _container = _container, None
+    if container is not None:
+        container.close()
@@ -1,10 +1,23 @@
+import asyncio
 import os
+import threading
+import time
 
 import firebase_admin
 from google.cloud import firestore as google_firestore
 
 
 DEFAULT_DB_CANDIDATES = ["course-registration", "(default)"]
+HEALTH_CHECK_INTERVAL_SEC = int(os.getenv("FIRESTORE_HEALTH_CHECK_SEC", "60"))
+
+# 인스턴스 전역에서 재사용하는 Firestore 클라이언트 (DB 탐색은 콜드 스타트 시 1회)
+_db_lock = threading.Lock()
+_db_client = None
+_db_id: str | None = None
+_health_thread: threading.Thread | None = None
+# AsyncClient는 만들어진 이벤트 루프에 묶이므로 루프와 함께 보관
+_async_client = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
 
 
 def _build_client(project_id: str, db_id: str):
@@ -13,6 +26,20 @@ def _build_client(project_id: str, db_id: str):
     return google_firestore.Client(project=project_id, database=db_id)
 
 
+def _build_async_client(project_id: str, db_id: str):
+    if db_id == "(default)":
+        return google_firestore.AsyncClient(project=project_id)
+    return google_firestore.AsyncClient(project=project_id, database=db_id)
+
+
+def _project_id() -> str:
+    return (
+        os.getenv("GCLOUD_PROJECT")
+        or os.getenv("GOOGLE_CLOUD_PROJECT")
+        or "course-registration-711a4"
+    )
+
+
 def _resolve_db_candidates() -> list[str]:
     explicit = (os.getenv("FIREBASE_DATABASE_ID") or "").strip()
     candidates: list[str] = []
@@ -32,15 +59,11 @@ def _has_seed_data(client) -> bool:
     return False
 
 
-def get_db():
+def _resolve_client() -> tuple[str, object]:
     if not firebase_admin._apps:
         firebase_admin.initialize_app()
 
-    project_id = (
-        os.getenv("GCLOUD_PROJECT")
-        or os.getenv("GOOGLE_CLOUD_PROJECT")
-        or "course-registration-711a4"
-    )
+    project_id = _project_id()
 
     explicit = (os.getenv("FIREBASE_DATABASE_ID") or "").strip()
     candidates = _resolve_db_candidates()
@@ -55,7 +78,7 @@ def get_db():
             connected.append((db_id, client))
             if explicit:
                 print(f"[database] Connected to Firestore DB (explicit): {db_id}")
-                return client
+                return db_id, client
         except Exception as e:
             last_error = e
             print(f"[database] Failed to connect DB '{db_id}': {e}")
@@ -64,7 +87,7 @@ def get_db():
         try:
             if _has_seed_data(client):
                 print(f"[database] Connected to Firestore DB (auto-data): {db_id}")
-                return client
+                return db_id, client
         except Exception as e:
             last_error = e
             print(f"[database] Data probe failed for DB '{db_id}': {e}")
@@ -72,8 +95,116 @@ def get_db():
     if connected:
         db_id, client = connected[0]
         print(f"[database] Connected to Firestore DB (auto-fallback): {db_id}")
-        return client
+        return db_id, client
 
     raise RuntimeError(
         f"Unable to connect to Firestore databases {candidates}: {last_error}"
     )
+
+
+def get_db():
+    global _db_client, _db_id
+    client = _db_client
+    if client is not None:
+        return client
+
+    with _db_lock:
+        if _db_client is None:
+            _db_id, _db_client = _resolve_client()
+            _start_health_check()
+        return _db_client
+
+
+def get_async_db():
+    """
+    실행 중인 이벤트 루프(AsgiBridge의 단일 루프)에 묶인 Firestore AsyncClient.
+    DB 탐색은 get_db()의 결과를 그대로 사용하므로 두 클라이언트는 항상 같은 DB를 가리킵니다.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    client = _async_client
+    if client is not None and _async_client_loop is loop:
+        return client
+
+    # 루프에서 부르는 쪽(ServiceContainer.async_services)이 db_resolved()가 아니면 먼저 스레드에서 get_db()를 끝내 두므로
+    # 여기서는 캐시된 DB ID만 사용 (그 사이 reset_db가 끼어든 드문 경우에만 동기 탐색)
+    get_db()
+    with _db_lock:
+        if _async_client is None or _async_client_loop is not loop:
+            _async_client = _build_async_client(_project_id(), _db_id or "(default)")
+            _async_client_loop = loop
+        return _async_client
+
+
+def db_resolved() -> bool:
+    """get_db()가 탐색 없이 바로 반환하는지 (콜드 스타트나 reset_db 직후면 False)"""
+    return _db_client is not None
+
+
+def get_db_id() -> str | None:
+    return _db_id
+
+
+def reset_db(failed_client=None) -> None:
+    """
+    캐시된 클라이언트를 폐기하여 다음 get_db() 호출에서 DB를 다시 탐색하게 합니다.
+    failed_client(동기 또는 비동기 클라이언트)가 주어지면 그 클라이언트가 아직 현재 클라이언트일 때만 폐기합니다.
+    (여러 요청이 동시에 실패해도 재탐색은 한 번만 일어나도록)
+    """
+    global _db_client, _db_id, _async_client, _async_client_loop
+    with _db_lock:
+        if failed_client is not None and failed_client is not _db_client and failed_client is not _async_client:
+            return
+        if _db_client is not None:
+            print(f"[database] Discarding Firestore client for DB '{_db_id}'")
+        _db_client = None
+        _db_id = None
+        # DB를 다시 탐색하므로 비동기 클라이언트도 새로 만듦
+        _async_client = None
+        _async_client_loop = None
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """UNAVAILABLE 또는 전송 계층 오류 (재시도가 소진되어 RetryError로 감싸진 경우 포함)"""
+    from google.api_core import exceptions as api_exceptions
+    from google.auth import exceptions as auth_exceptions
+
+    if isinstance(exc, api_exceptions.RetryError) and exc.cause is not None:
+        exc = exc.cause
+    return isinstance(exc, (api_exceptions.ServiceUnavailable, auth_exceptions.TransportError))
+
+
+def report_rpc_error(exc: BaseException, client=None) -> None:
+    """
+    요청 경로에서 Firestore 호출이 실패했을 때 호출합니다 (core.request_timing.TimedRepository).
+    연결 오류면 실패한 클라이언트를 폐기하여 다음 요청에서 DB를 다시 탐색합니다.
+    """
+    if client is None or not is_connection_error(exc):
+        return
+    print(f"[database] Firestore RPC failed for DB '{_db_id}': {exc}")
+    reset_db(client)
+
+
+def _health_check_loop() -> None:
+    while True:
+        time.sleep(HEALTH_CHECK_INTERVAL_SEC)
+        client = _db_client
+        if client is None:
+            continue
+        try:
+            next(client.collections(), None)
+        except Exception as e:
+            print(f"[database] Health check failed for DB '{_db_id}': {e}")
+            reset_db(client)
+
+
+def _start_health_check() -> None:
+    global _health_thread
+    if HEALTH_CHECK_INTERVAL_SEC <= 0:
+        return
+    if _health_thread is not None and _health_thread.is_alive():
+        return
+    _health_thread = threading.Thread(
+        target=_health_check_loop, name="firestore-health-check", daemon=True
+    )
+    _health_thread.start()
@@ -1,42 +1,49 @@
-﻿from core.database import get_db
-from repositories.firestore_repo import FirestoreCourseRepository, FirestoreEnrollmentRepository, FirestoreUserRepository
-from services.course_service import CourseService
-from services.enrollment_service import EnrollmentService
-from services.user_service import UserService
+﻿# 라우트 의존성 함수. 서비스는 인스턴스 단위 컨테이너(core.container)에서 꺼내므로 요청마다 새로 만들지 않습니다.
+# 함수 이름은 그대로 두어 테스트에서 app.dependency_overrides로 바꿔 끼울 수 있습니다.
+from core.container import get_container
 
 
 def get_course_service():
-    db = get_db()
-    repo = FirestoreCourseRepository(db)
-    return CourseService(repo)
+    return get_container().services().course
 
 
 def get_enrollment_service():
-    db = get_db()
-    course_repo = FirestoreCourseRepository(db)
-    enroll_repo = FirestoreEnrollmentRepository(db)
-    return EnrollmentService(course_repo, enroll_repo)
+    return get_container().services().enrollment
 
 
 def get_user_service():
-    db = get_db()
-    repo = FirestoreUserRepository(db)
-    return UserService(repo)
+    return get_container().services().user
+
+
+def get_stats_service():
+    return get_container().services().stats
+
+
+async def get_async_course_service():
+    return (await get_container().async_services()).course
+
+
+async def get_async_enrollment_service():
+    return (await get_container().async_services()).enrollment
+
+
+async def get_async_user_service():
+    return (await get_container().async_services()).user
 
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from firebase_admin import auth
+
+from core.auth_cache import token_cache
 
 security = HTTPBearer()
 
 
 def get_current_user_uid(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    print("[auth] bearer token received for /api request")
+    # 같은 토큰의 반복 요청은 검증된 claims 캐시에서 바로 처리 (만료 시각까지)
     token = credentials.credentials
     try:
-        decoded_token = auth.verify_id_token(token)
-        print(f"[auth] token verified uid={decoded_token.get('uid')}")
+        decoded_token = token_cache.verify(token)
         return decoded_token["uid"]
     except Exception as e:
         print(f"[auth] token verification failed: {e}")
@@ -47,9 +54,16 @@ def get_current_user_uid(credentials: HTTPAuthorizationCredentials = Depends(sec
         )
 
 
-def get_agent_service():
-    from services.agent_service import AgentService
+async def ensure_admin(uid: str, service) -> None:
+    user = await service.get_user(uid)
+    if user is None or user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+
 
-    course_service = get_course_service()
-    enrollment_service = get_enrollment_service()
-    return AgentService(course_service, enrollment_service)
+async def require_admin(uid: str = Depends(get_current_user_uid), service=Depends(get_async_user_service)) -> str:
+    await ensure_admin(uid, service)
+    return uid
+
+
+def get_agent_service():
+    return get_container().agent_service()
@@ -0,0 +1,172 @@
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# 요청 지연 시간 기본 버킷 (초). 함수 타임아웃이 30초이므로 그 위는 +Inf로 충분
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+# 수집 함수가 돌려주는 값: (이름, 타입, 설명, [(이름 접미사, 레이블 dict, 값), ...])
+# 접미사는 히스토그램의 _bucket/_sum/_count에만 쓰이고 나머지는 ""
+Sample = Tuple[str, Dict[str, str], float]
+MetricFamily = Tuple[str, str, str, List[Sample]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _label_key(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def collect(self) -> List[MetricFamily]:
+        with self._lock:
+            samples = [("", dict(key), value) for key, value in self._values.items()]
+        return [(self.name, "counter", self.help, samples)]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        # 레이블별 [버킷별 개수(누적 아님), 합계, 개수]
+        self._series: Dict[Labels, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            return series[2] if series else 0
+
+    def collect(self) -> List[MetricFamily]:
+        samples: List[Sample] = []
+        with self._lock:
+            series = [(dict(key), list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        return [(self.name, "histogram", self.help, samples)]
+
+
+class MetricsRegistry:
+    """
+    인스턴스 단위 메트릭 저장소 (Prometheus 텍스트 형식으로 출력).
+    직접 갱신하는 Counter/Histogram 외에, 이미 다른 곳에 있는 통계(캐시 적중, 트랜잭션 재시도 등)는
+    register_collector()로 등록한 함수가 출력 시점에 읽어 옵니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[MetricFamily]]] = {}
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._register(name, lambda: Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(name, lambda: Histogram(name, help, buckets))
+
+    def _register(self, name: str, factory):
+        # 같은 이름으로 다시 요청하면 기존 메트릭을 반환 (모듈 재로딩 등)
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def register_collector(self, key: str, collect: Callable[[], Iterable[MetricFamily]]) -> None:
+        """key가 같으면 교체 (캐시 객체가 새로 만들어진 경우 등)"""
+        with self._lock:
+            self._collectors[key] = collect
+
+    def collect(self) -> List[MetricFamily]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+        families: List[MetricFamily] = []
+        for metric in metrics:
+            families.extend(metric.collect())
+        for key, collect in collectors:
+            try:
+                families.extend(collect())
+            except Exception as e:
+                print(f"[metrics] collector {key} failed: {e}")
+        return families
+
+    def render(self) -> str:
+        merged: Dict[str, MetricFamily] = {}
+        for name, kind, help, samples in self.collect():
+            if name in merged:
+                merged[name][3].extend(samples)
+            else:
+                merged[name] = (name, kind, help, list(samples))
+
+        lines: List[str] = []
+        for name, kind, help, samples in merged.values():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def family(name: str, kind: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> MetricFamily:
+    """수집 함수용: (레이블, 값) 목록으로 메트릭 하나를 만듦"""
+    return (name, kind, help, [("", labels, value) for labels, value in samples])
+
+
+def cache_families(name: str, hits: float, misses: float) -> List[MetricFamily]:
+    """캐시 적중/미스 카운터와 적중률 (수집 함수에서 사용)"""
+    total = hits + misses
+    return [
+        family("cache_hits_total", "counter", "Cache hits by cache", [({"cache": name}, hits)]),
+        family("cache_misses_total", "counter", "Cache misses by cache", [({"cache": name}, misses)]),
+        family("cache_hit_ratio", "gauge", "Cache hit ratio since instance start", [({"cache": name}, hits / total if total else 0.0)]),
+    ]
+
+
+# 인스턴스 전역 메트릭 저장소
+registry = MetricsRegistry()
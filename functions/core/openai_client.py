@@ -0,0 +1,66 @@
+import os
+import threading
+
+OPENAI_TIMEOUT_SEC = float(os.getenv("OPENAI_TIMEOUT_SEC", "20"))
+OPENAI_CONNECT_TIMEOUT_SEC = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SEC", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "1"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "10"))
+OPENAI_KEEPALIVE_EXPIRY_SEC = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SEC", "60"))
+
+# 인스턴스 전역에서 재사용하는 OpenAI 클라이언트 (import/생성은 인스턴스당 1회)
+# 같은 httpx 연결 풀을 쓰므로 요청 간 keep-alive 연결과 TLS 세션이 유지됩니다.
+_client_lock = threading.Lock()
+_client = None
+_client_error: str | None = None
+_initialized = False
+
+
+def _build_client(api_key: str):
+    import httpx
+    from openai import OpenAI
+
+    # 함수 타임아웃(30초) 안에 끝나도록 전체/연결 타임아웃을 명시
+    timeout = httpx.Timeout(OPENAI_TIMEOUT_SEC, connect=OPENAI_CONNECT_TIMEOUT_SEC)
+    http_client = httpx.Client(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY_SEC,
+        ),
+    )
+    return OpenAI(api_key=api_key, http_client=http_client, timeout=timeout, max_retries=OPENAI_MAX_RETRIES)
+
+
+def get_openai_client():
+    """(client, error) 반환. 설정/SDK 문제로 만들 수 없으면 client는 None이고 error에 사유가 담깁니다."""
+    global _client, _client_error, _initialized
+    if _initialized:
+        return _client, _client_error
+
+    with _client_lock:
+        if not _initialized:
+            api_key = os.environ.get("OPENAI_API_KEY")
+            if not api_key:
+                print("Warning: OPENAI_API_KEY is not set.")
+                _client, _client_error = None, "OPENAI_API_KEY Missing"
+            else:
+                try:
+                    _client, _client_error = _build_client(api_key), None
+                except Exception as e:
+                    print(f"Warning: OpenAI SDK unavailable: {e}")
+                    _client, _client_error = None, f"OpenAI SDK Error: {str(e)}"
+            _initialized = True
+        return _client, _client_error
+
+
+def reset_openai_client() -> None:
+    """테스트나 키 교체 시 다음 호출에서 클라이언트를 새로 만들도록 초기화"""
+    global _client, _client_error, _initialized
+    with _client_lock:
+        client, _client, _client_error, _initialized = _client, None, None, False
+    if client is not None:
+        try:
+            client.close()
+        except Exception as e:
+            print(f"[openai] failed to close client: {e}")
@@ -0,0 +1,223 @@
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from core import database
+from core.metrics import registry
+from repositories import course_cache
+
+# 저장소 메서드 중 Firestore에 쓰는 것 (나머지는 읽기로 집계)
+WRITE_METHODS = {"save", "delete", "enroll_atomic", "enroll_many_atomic"}
+# RPC가 없는 메서드는 집계하지 않음
+UNTIMED_METHODS = {"peek", "invalidate_cache"}
+# 강의 목록 캐시를 거치는 메서드: 캐시에서 반환되면 cache 구간, Firestore를 읽었으면 fs_read로 집계
+CACHED_METHODS = {"list", "list_versioned"}
+
+HTTP_REQUEST_DURATION = registry.histogram("http_request_duration_seconds", "Request latency by route template")
+
+
+class RequestTiming:
+    """
+    요청 하나의 구간별 소요 시간 (Firestore 읽기/쓰기, OpenAI 호출 등)과 토큰 사용량.
+    에이전트 도구는 워커 스레드에서 실행되므로 갱신은 락으로 보호합니다.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self.spans: Dict[str, Dict[str, float]] = {}
+        self.tokens: Dict[str, int] = {}
+        self.annotations: Dict[str, Any] = {}
+
+    def add_span(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            span = self.spans.setdefault(name, {"count": 0, "ms": 0.0})
+            span["count"] += 1
+            span["ms"] += duration_ms
+
+    def add_tokens(self, **counts: int) -> None:
+        with self._lock:
+            for key, value in counts.items():
+                self.tokens[key] = self.tokens.get(key, 0) + (value or 0)
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값: total;dur=.., fs_read;desc="3 calls";dur=.., ..."""
+        parts = [f"total;dur={self.elapsed_ms():.1f}"]
+        with self._lock:
+            for name, span in sorted(self.spans.items()):
+                parts.append(f'{name};desc="{span["count"]} calls";dur={span["ms"]:.1f}')
+            if self.tokens:
+                desc = " ".join(f"{k}={v}" for k, v in sorted(self.tokens.items()))
+                parts.append(f'tokens;desc="{desc}"')
+        return ", ".join(parts)
+
+    def log_record(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "type": "request_timing",
+                "method": self.method,
+                "route": self.route or self.path,
+                "status": self.status,
+                "total_ms": round(self.elapsed_ms(), 1),
+                "spans": {name: {"count": s["count"], "ms": round(s["ms"], 1)} for name, s in self.spans.items()},
+                "tokens": dict(self.tokens),
+                **self.annotations,
+            }
+
+
+_current: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar("request_timing", default=None)
+
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+def record_span(name: str, duration_ms: float) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.add_span(name, duration_ms)
+
+
+def record_tokens(**counts: int) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.add_tokens(**counts)
+
+
+def annotate(**values: Any) -> None:
+    """요청 로그 한 줄에 같이 남길 값 (예: 에이전트 처리 경로)"""
+    timing = _current.get()
+    if timing is not None:
+        with timing._lock:
+            timing.annotations.update(values)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record_span(name, (time.monotonic() - started) * 1000)
+
+
+class TimedRepository:
+    """
+    저장소 호출을 fs_read/fs_write 구간으로 집계하는 프록시 (동기/비동기 메서드 모두 지원).
+    서비스의 isinstance 검사(TransactionalEnrollmentRepository 등)가 그대로 동작하도록 __class__는 원본 클래스를 반환합니다.
+    강의 목록처럼 캐시에서 바로 반환된 읽기는 RPC가 아니므로 fs_read 대신 cache 구간으로 집계합니다.
+    모든 요청 경로의 Firestore 호출이 지나가므로, 연결 오류는 여기서 database.report_rpc_error로 알립니다.
+    """
+
+    def __init__(self, repo):
+        object.__setattr__(self, "_repo", repo)
+
+    @property
+    def __class__(self):
+        return type(self._repo)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._repo, name, value)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._repo, name)
+        if not inspect.ismethod(attr) or name.startswith("_") or name in UNTIMED_METHODS:
+            return attr
+        span_name = "fs_write" if name in WRITE_METHODS else "fs_read"
+        cached = name in CACHED_METHODS
+
+        db = getattr(self._repo, "db", None)
+
+        def finish(started: float) -> None:
+            # 캐시 적중 여부는 호출이 끝난 뒤에야 알 수 있음
+            name = "cache" if cached and course_cache.last_hit() else span_name
+            record_span(name, (time.monotonic() - started) * 1000)
+
+        if inspect.iscoroutinefunction(attr):
+            @functools.wraps(attr)
+            async def timed_async(*args, **kwargs):
+                course_cache.reset_last_hit()
+                started = time.monotonic()
+                try:
+                    return await attr(*args, **kwargs)
+                except Exception as e:
+                    database.report_rpc_error(e, db)
+                    raise
+                finally:
+                    finish(started)
+            return timed_async
+
+        @functools.wraps(attr)
+        def timed(*args, **kwargs):
+            course_cache.reset_last_hit()
+            started = time.monotonic()
+            try:
+                return attr(*args, **kwargs)
+            except Exception as e:
+                database.report_rpc_error(e, db)
+                raise
+            finally:
+                finish(started)
+        return timed
+
+
+class TimingMiddleware:
+    """
+    요청별 소요 시간을 모아 Server-Timing 헤더로 돌려주고, 응답이 끝나면 JSON 로그 한 줄을 남기는 ASGI 미들웨어.
+    스트리밍 응답의 헤더에는 응답 시작 시점까지의 값만 들어가며, 로그에는 스트림 종료까지의 값이 남습니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(scope.get("method", ""), scope.get("path", ""))
+        token = _current.set(timing)
+        logged = False
+
+        def finish() -> None:
+            nonlocal logged
+            if not logged:
+                logged = True
+                print(json.dumps(timing.log_record(), ensure_ascii=False))
+                # 매칭되지 않은 경로는 레이블 수가 늘지 않도록 한 값으로 묶음
+                HTTP_REQUEST_DURATION.observe(
+                    timing.elapsed_ms() / 1000,
+                    route=timing.route or "unmatched",
+                    method=timing.method,
+                    status=str(timing.status or 500),
+                )
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                timing.route = getattr(route, "path", None)
+                timing.status = message.get("status")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            finish()
+            _current.reset(token)
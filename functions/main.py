@@ -1,12 +1,13 @@
 ﻿from firebase_functions import https_fn, options, identity_fn
 import firebase_admin
 from firebase_admin import initialize_app, firestore
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-import asyncio
+from fastapi.responses import PlainTextResponse, StreamingResponse
 import json
 import traceback
 import os
+from typing import List, Optional
 from dotenv import load_dotenv
 from google.cloud import firestore as google_firestore
 
@@ -14,10 +15,25 @@ load_dotenv(os.path.join(os.path.dirname(__file__), ".env.custom"))
 
 from models.course import Course, CourseCreate
 from models.enrollment import Enrollment, EnrollmentCreate
-from core.dependencies import get_course_service, get_enrollment_service, get_user_service, get_agent_service, get_current_user_uid
-from services.course_service import CourseService
-from services.enrollment_service import EnrollmentService, EnrollmentError
-from services.user_service import UserService
+from contextlib import asynccontextmanager
+from core.asgi_bridge import AsgiBridge
+from core.container import init_container, shutdown_container
+from core.metrics import registry
+from core.request_timing import TimingMiddleware
+from core.dependencies import (
+    get_async_course_service,
+    get_async_enrollment_service,
+    get_async_user_service,
+    get_stats_service,
+    get_agent_service,
+    get_current_user_uid,
+    ensure_admin,
+    require_admin,
+)
+from services.course_service import AsyncCourseService
+from services.enrollment_service import MAX_BATCH_COURSES, AsyncEnrollmentService, EnrollmentError
+from services.user_service import AsyncUserService
+from services.stats_service import StatsService
 
 # Firebase Admin 초기화 (중복 방지)
 if not firebase_admin._apps:
@@ -31,8 +47,21 @@ options.set_global_options(
     timeout_sec=30,         # 30초 초과 시 강제 종료
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 인스턴스 단위 서비스 컨테이너 (저장소/서비스는 첫 사용 시 DB 클라이언트별로 한 번만 생성)
+    app.state.container = init_container()
+    yield
+    shutdown_container()
+
 # FastAPI 앱 생성
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# 요청별 소요 시간 (Firestore/OpenAI 구간 포함)을 Server-Timing 헤더와 JSON 로그 한 줄로 남김
+app.add_middleware(TimingMiddleware)
+
+# Functions 엔트리포인트용 ASGI 브리지 (인스턴스 전역 이벤트 루프 스레드 하나에서 모든 요청을 처리)
+asgi_bridge = AsgiBridge(app)
 
 # CORS 설정은 Firebase Functions의 on_request(cors=...)에서 처리하므로 주석 처리
 # app.add_middleware(
@@ -47,57 +76,119 @@ app = FastAPI()
 def health_check():
     return {"status": "ok"}
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+MAX_SEARCH_RESULTS = 50
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+# Firestore를 읽고 쓰는 라우트는 AsyncClient 기반 서비스를 쓰는 async 라우트
+# (한 인스턴스가 스레드를 점유하지 않고 여러 요청의 RPC를 동시에 기다림)
 @app.get("/api/courses")
-def list_courses(service: CourseService = Depends(get_course_service)):
+async def list_courses(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    start_after: Optional[str] = None,
+    fields: Optional[str] = None,
+    service: AsyncCourseService = Depends(get_async_course_service),
+):
+    """limit/start_after/fields가 없으면 기존처럼 전체 목록, 있으면 Page({items, next_cursor})를 반환"""
     try:
-        return service.get_all_courses()
+        if limit is None and start_after is None and fields is None:
+            return await service.get_all_courses()
+        return await service.get_courses_page(limit or DEFAULT_PAGE_SIZE, start_after=start_after, fields=_parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+# /api/courses/{course_id}보다 먼저 선언해야 "search"가 강의 ID로 해석되지 않음
+@app.get("/api/courses/search")
+async def search_courses(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS),
+    service: AsyncCourseService = Depends(get_async_course_service),
+):
+    results = await service.search_courses(q, limit=limit)
+    return [{**course.model_dump(), "score": round(score, 3)} for course, score in results]
+
 @app.get("/api/courses/{course_id}")
-def get_course(course_id: str, service: CourseService = Depends(get_course_service)):
-    course = service.get_course(course_id)
+async def get_course(course_id: str, service: AsyncCourseService = Depends(get_async_course_service)):
+    course = await service.get_course(course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     return course
 
 @app.post("/api/courses")
-def create_course(course: CourseCreate, service: CourseService = Depends(get_course_service)):
-    return service.create_course(course)
+async def create_course(course: CourseCreate, service: AsyncCourseService = Depends(get_async_course_service)):
+    try:
+        return await service.create_course(course)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.put("/api/courses/{course_id}")
-def update_course(course_id: str, course: CourseCreate, service: CourseService = Depends(get_course_service)):
+async def update_course(course_id: str, course: CourseCreate, service: AsyncCourseService = Depends(get_async_course_service)):
     # Course model object for saving
-    existing = service.get_course(course_id)
+    existing = await service.get_course(course_id)
     if not existing:
         raise HTTPException(status_code=404, detail="Course not found")
     
     updated_course = Course(id=course_id, **course.model_dump())
-    return service.create_course(updated_course) # service.create_course actually calls repo.save
+    try:
+        return await service.create_course(updated_course) # service.create_course actually calls repo.save
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.delete("/api/courses/{course_id}")
-def delete_course(course_id: str, service: CourseService = Depends(get_course_service)):
-    success = service.delete_course(course_id)
+async def delete_course(course_id: str, service: AsyncCourseService = Depends(get_async_course_service)):
+    success = await service.delete_course(course_id)
     if not success:
         raise HTTPException(status_code=404, detail="Course not found")
     return {"status": "success"}
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class EnrollmentRequest(BaseModel):
     student_id: str
     course_id: str
 
 @app.post("/api/enrollments")
-def enroll_student(req: EnrollmentRequest, service: EnrollmentService = Depends(get_enrollment_service)):
+async def enroll_student(req: EnrollmentRequest, service: AsyncEnrollmentService = Depends(get_async_enrollment_service)):
+    try:
+        return await service.enroll_student(req.student_id, req.course_id)
+    except EnrollmentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+class BatchEnrollmentRequest(BaseModel):
+    course_ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_COURSES)
+    atomic: bool = False
+    # 생략하면 로그인한 학생 본인. 다른 학생을 대신 신청하려면 관리자 권한 필요
+    student_id: Optional[str] = None
+
+@app.post("/api/enrollments/batch")
+async def enroll_student_batch(
+    req: BatchEnrollmentRequest,
+    uid: str = Depends(get_current_user_uid),
+    service: AsyncEnrollmentService = Depends(get_async_enrollment_service),
+    user_service: AsyncUserService = Depends(get_async_user_service),
+):
+    """여러 강의를 한 번에 신청. atomic=true면 전부 성공하거나 전부 실패합니다."""
+    student_id = req.student_id or uid
+    if student_id != uid:
+        await ensure_admin(uid, user_service)
     try:
-        return service.enroll_student(req.student_id, req.course_id)
+        results = await service.enroll_student_many(student_id, req.course_ids, atomic=req.atomic)
     except EnrollmentError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "results": results,
+        "succeeded": sum(1 for r in results if r["status"] == "success"),
+        "failed": sum(1 for r in results if r["status"] != "success"),
+    }
 
 @app.get("/api/enrollments/my")
-def get_my_enrollments(uid: str = Depends(get_current_user_uid), service: EnrollmentService = Depends(get_enrollment_service), course_service: CourseService = Depends(get_course_service)):
+async def get_my_enrollments(uid: str = Depends(get_current_user_uid), service: AsyncEnrollmentService = Depends(get_async_enrollment_service), course_service: AsyncCourseService = Depends(get_async_course_service)):
     """
     학생의 수강 신청 목록을 조회합니다.
     주의: Enrollment 모델 변경(course_id당 하나의 문서, student_ids 리스트)으로 인해,
@@ -105,7 +196,7 @@ def get_my_enrollments(uid: str = Depends(get_current_user_uid), service: Enroll
     프론트엔드에서 수강 내역을 보여주려면, Course 상세 정보가 필요할 수 있으므로
     여기서 Course 정보를 포함해서 내려주는 것이 좋습니다.
     """
-    enrollments = service.get_student_enrollments(uid)
+    enrollments = await service.get_student_enrollments(uid)
     
     # 단순히 Enrollment 리스트만 주면, 프론트엔드가 'student_ids'가 포함된 객체를 받게 되어 혼란스러울 수 있음.
     # 기존 프론트엔드 호환성을 위해, '내가 신청한 건'에 대한 정보를 가공해서 줄 수 있음.
@@ -113,9 +204,11 @@ def get_my_enrollments(uid: str = Depends(get_current_user_uid), service: Enroll
     # Course 정보를 포함한 확장된 응답을 주는 것이 좋음.
     
     # 확장된 응답: [ { enrollment_id, course: { ... }, timestamp }, ... ]
+    # 강의 정보는 한 번의 배치 조회로 가져옴 (강의 수와 무관하게 RPC 1회)
+    course_map = {c.id: c for c in await course_service.get_courses([e.course_id for e in enrollments])}
     result = []
     for enroll in enrollments:
-        course = course_service.get_course(enroll.course_id)
+        course = course_map.get(enroll.course_id)
         if course:
             result.append({
                 "id": enroll.id,
@@ -127,52 +220,69 @@ def get_my_enrollments(uid: str = Depends(get_current_user_uid), service: Enroll
     return result
 
 @app.get("/api/users")
-def list_users(service: UserService = Depends(get_user_service)):
+async def list_users(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    start_after: Optional[str] = None,
+    fields: Optional[str] = None,
+    service: AsyncUserService = Depends(get_async_user_service),
+):
     try:
-        return service.get_all_users()
+        if limit is None and start_after is None and fields is None:
+            return await service.get_all_users()
+        return await service.get_users_page(limit or DEFAULT_PAGE_SIZE, start_after=start_after, fields=_parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 @app.put("/api/users/{uid}/role")
-def update_user_role(uid: str, role: str, service: UserService = Depends(get_user_service)):
-    user = service.update_user_role(uid, role)
+async def update_user_role(uid: str, role: str, service: AsyncUserService = Depends(get_async_user_service)):
+    user = await service.update_user_role(uid, role)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+# 통계와 에이전트는 동기 서비스를 스레드풀에서 실행 (캐시된 카탈로그/스레드 기반 도구 실행)
 @app.get("/api/stats")
-def get_stats(
-    course_service: CourseService = Depends(get_course_service),
-    user_service: UserService = Depends(get_user_service)
-):
+def get_stats(service: StatsService = Depends(get_stats_service)):
     try:
-        courses = course_service.get_all_courses()
-        users = user_service.get_all_users()
-        
-        total_courses = len(courses)
-        total_students = len([u for u in users if u.role == 'student'])
-        total_enrollments = sum(c.current_count for c in courses)
-        
-        return {
-            "total_courses": total_courses,
-            "total_students": total_students,
-            "total_enrollments": total_enrollments
-        }
+        return service.get_stats()
     except Exception as e:
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+# 인스턴스 단위 메트릭 (Prometheus 텍스트 형식). 인스턴스마다 값이 따로 쌓이므로 수집 측에서 합산
+@app.get("/api/metrics")
+def get_metrics(uid: str = Depends(require_admin)):
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 class ChatRequest(BaseModel):
     message: str
+    # true면 text/event-stream으로 진행 상황(tool_start/tool_end)과 답변 조각(delta)을 바로 전송
+    stream: bool = False
+
+def _sse_events(uid: str, events):
+    try:
+        for event in events:
+            yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+        print(f"[agent_chat] stream finished uid={uid}")
+    except Exception as e:
+        # 헤더가 이미 전송되었으므로 상태 코드 대신 error 이벤트로 알림
+        print(f"[agent_chat] stream error uid={uid}: {e}")
+        print(traceback.format_exc())
+        yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': f'Agent processing error: {str(e)}'}, ensure_ascii=False)}\n\n"
 
 @app.post("/api/agent/chat")
 def agent_chat(req: ChatRequest, uid: str = Depends(get_current_user_uid), service = Depends(get_agent_service)):
-    # Debug: 요청 도달/인증 통과 여부 확인
-    print(f"[agent_chat] request received uid={uid} message={req.message}")
+    if req.stream:
+        return StreamingResponse(
+            _sse_events(uid, service.chat_stream(uid, req.message)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
     try:
         response = service.chat(uid, req.message)
-        print(f"[agent_chat] response generated uid={uid}")
         return {"response": response}
     except Exception as e:
         print(f"[agent_chat] error uid={uid}: {e}")
@@ -187,42 +297,7 @@ def agent_chat(req: ChatRequest, uid: str = Depends(get_current_user_uid), servi
 )
 def fastapi_handler(req: https_fn.Request) -> https_fn.Response:
     try:
-        # ASGI scope 구성
-        asgi_request = {
-            "type": "http",
-            "method": req.method,
-            "path": req.path,
-            "raw_path": req.path.encode(),
-            "headers": [(k.lower().encode(), v.encode()) for k, v in req.headers.items()],
-            "query_string": req.query_string.encode() if isinstance(req.query_string, str) else (req.query_string or b""),
-        }
-
-        async def receive():
-            return {"type": "http.request", "body": req.get_data() or b"", "more_body": False}
-
-        response_body, response_headers, response_status = [], [], 200
-
-        async def send(message):
-            nonlocal response_body, response_headers, response_status
-            if message["type"] == "http.response.start":
-                response_status = message.get("status", 200)
-                response_headers = message.get("headers", [])
-            elif message["type"] == "http.response.body":
-                response_body.append(message.get("body", b""))
-
-        async def run_asgi():
-            await app(asgi_request, receive, send)
-
-        asyncio.run(run_asgi())
-
-        full_body = b"".join(response_body)
-        headers_dict = {
-            k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v
-            for k, v in response_headers
-        }
-
-        return https_fn.Response(response=full_body, status=response_status, headers=headers_dict)
-
+        return asgi_bridge(req)
     except Exception as e:
         return https_fn.Response(
             response=json.dumps({"error": f"Internal Server Error: {str(e)}"}),
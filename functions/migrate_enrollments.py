@@ -0,0 +1,94 @@
+"""
+enrollments/{course_id} 문서의 student_ids 배열을 샤드 구조로 옮기는 마이그레이션 도구.
+
+    enrollments/{course_id}/students/{student_id}
+    enrollments/{course_id}/seat_shards/{0..N-1}
+
+문서를 하나씩 스트리밍하며 BulkWriter로 기록하므로 강의/학생 수와 무관하게 메모리 사용이 일정합니다.
+같은 입력으로 여러 번 실행해도 결과가 같습니다 (학생 문서와 샤드 카운트를 set으로 덮어씀).
+ENROLLMENT_LAYOUT=sharded로 전환하기 전에 실행하세요.
+
+사용 예:
+    python migrate_enrollments.py --dry-run
+    python migrate_enrollments.py --shards 10
+    python migrate_enrollments.py --emulator --drop-legacy-field
+"""
+import argparse
+import os
+from datetime import datetime
+
+from repositories.firestore_repo import DEFAULT_SEAT_SHARDS, shard_capacity
+
+
+def distribute(total: int, max_students: int, shards: int) -> list[int]:
+    """total명을 샤드 정원에 맞춰 앞에서부터 채우고, 정원 초과분은 마지막 샤드에 둡니다."""
+    counts = []
+    remaining = total
+    for index in range(shards):
+        filled = min(remaining, shard_capacity(max_students, shards, index))
+        counts.append(filled)
+        remaining -= filled
+    counts[-1] += remaining
+    return counts
+
+
+def migrate(db, shards: int, dry_run: bool = False, drop_legacy_field: bool = False) -> None:
+    from google.cloud import firestore
+
+    writer = None if dry_run else db.bulk_writer()
+    migrated_courses = 0
+    migrated_students = 0
+
+    for doc in db.collection("enrollments").stream():
+        data = doc.to_dict() or {}
+        student_ids = list(dict.fromkeys(data.get("student_ids") or []))
+        course_id = data.get("course_id") or doc.id
+        timestamp = data.get("timestamp") or datetime.now()
+
+        course_doc = db.collection("courses").document(course_id).get()
+        max_students = (course_doc.to_dict() or {}).get("max_students", len(student_ids)) if course_doc.exists else len(student_ids)
+        counts = distribute(len(student_ids), max_students, shards)
+
+        print(f"[migrate] course={course_id} students={len(student_ids)} shards={counts}")
+        migrated_courses += 1
+        migrated_students += len(student_ids)
+        if dry_run:
+            continue
+
+        students = doc.reference.collection("students")
+        for student_id in student_ids:
+            writer.set(
+                students.document(student_id),
+                {"course_id": course_id, "student_id": student_id, "timestamp": timestamp},
+            )
+        seat_shards = doc.reference.collection("seat_shards")
+        for index, count in enumerate(counts):
+            writer.set(seat_shards.document(str(index)), {"count": count})
+        if course_doc.exists:
+            writer.update(course_doc.reference, {"current_count": len(student_ids)})
+        if drop_legacy_field:
+            writer.update(doc.reference, {"student_ids": firestore.DELETE_FIELD})
+
+    if writer is not None:
+        writer.close()
+    print(f"[migrate] done courses={migrated_courses} students={migrated_students} dry_run={dry_run}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate enrollments to the sharded layout")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SEAT_SHARDS, help="좌석 카운터 샤드 수 (ENROLLMENT_SEAT_SHARDS와 동일하게)")
+    parser.add_argument("--dry-run", action="store_true", help="쓰지 않고 변환 결과만 출력")
+    parser.add_argument("--drop-legacy-field", action="store_true", help="이전 student_ids 배열 필드 삭제")
+    parser.add_argument("--emulator", action="store_true", help="로컬 Firestore 에뮬레이터(127.0.0.1:8080) 사용")
+    args = parser.parse_args()
+
+    if args.emulator:
+        os.environ["FIRESTORE_EMULATOR_HOST"] = "127.0.0.1:8080"
+
+    from core.database import get_db
+
+    migrate(get_db(), shards=args.shards, dry_run=args.dry_run, drop_legacy_field=args.drop_legacy_field)
+
+
+if __name__ == "__main__":
+    main()
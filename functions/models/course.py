@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import List, Optional
 
 class CourseBase(BaseModel):
     title: str
@@ -13,8 +13,15 @@ class CourseBase(BaseModel):
 class CourseCreate(CourseBase):
     pass
 
+class ScheduleSlot(BaseModel):
+    # 월요일 00:00 기준 분 단위 반열린 구간 [start, end)
+    start: int
+    end: int
+
 class Course(CourseBase):
     model_config = ConfigDict(from_attributes=True)
     
     id: str
+    # 저장 시점에 start_time/end_time을 정규화한 값 (None이면 아직 정규화되지 않은 이전 문서)
+    schedule: Optional[List[ScheduleSlot]] = None
 
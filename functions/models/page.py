@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+class Page(BaseModel):
+    items: List[Dict[str, Any]]
+    # 다음 페이지 요청 시 start_after로 전달 (마지막 페이지면 None)
+    next_cursor: Optional[str] = None
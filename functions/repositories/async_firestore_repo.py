@@ -0,0 +1,369 @@
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import firestore
+from google.cloud.firestore import FieldFilter
+from repositories.course_cache import CourseCatalogCache
+from repositories.firestore_repo import (
+    DEFAULT_SEAT_SHARDS,
+    SCHEDULE_REBUILD_CHUNK,
+    BatchEnrollmentRejected,
+    EnrollmentTransactionPlan,
+    FirestoreUserRepository,
+    ShardedEnrollmentTransactionPlan,
+    normalize_role,
+    _chunks,
+    _count_sync_due,
+    _is_admin_doc,
+    _non_student_roles,
+    _rebuilt_schedule,
+    _schedule_changed,
+    _schedule_course_ids,
+    _validate_fields,
+)
+from models.course import Course
+from models.user import User
+from models.enrollment import Enrollment
+from models.page import Page
+from services.schedule import course_mask
+
+# Firestore AsyncClient 기반 저장소 (비동기 라우트용).
+# 문서 ↔ 모델 변환, 트랜잭션 검증과 쓰기는 동기 저장소와 같은 EnrollmentTransactionPlan을 쓰므로
+# 여기에는 문서를 읽고 트랜잭션을 실행하는 I/O만 있습니다.
+# 동기 저장소는 스크립트(seed/migrate/verify)와 에이전트 도구 실행에서 계속 사용됩니다.
+
+
+async def _aggregate_values(aggregation_query) -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    for row in await aggregation_query.get():
+        for result in row if isinstance(row, list) else [row]:
+            values[result.alias] = result.value
+    return values
+
+
+async def _snapshot_map(docs) -> Dict[str, object]:
+    return {doc.reference.path: doc async for doc in docs}
+
+
+async def _page_docs(collection, limit: int, start_after: Optional[str], fields: Optional[List[str]]):
+    query = collection.order_by("__name__")
+    if fields:
+        query = query.select(fields)
+    if start_after:
+        query = query.start_after({"__name__": start_after})
+    docs = [doc async for doc in query.limit(limit + 1).stream()]
+    next_cursor = docs[limit - 1].id if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+class AsyncFirestoreCourseRepository:
+    def __init__(self, db, cache: Optional[CourseCatalogCache] = None):
+        self.db = db
+        self.collection = self.db.collection("courses")
+        self.schedule_collection = self.db.collection("student_schedules")
+        self.cache = cache
+
+    async def _stream_all(self) -> List[Course]:
+        return [Course(id=doc.id, **doc.to_dict()) async for doc in self.collection.stream()]
+
+    async def list(self) -> List[Course]:
+        return (await self.list_versioned())[1]
+
+    async def list_versioned(self) -> Tuple[Optional[int], List[Course]]:
+        if self.cache is not None:
+            return await self.cache.get_versioned_async(self._stream_all)
+        return None, await self._stream_all()
+
+    async def list_page(self, limit: int, start_after: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        fields = _validate_fields(fields, set(Course.model_fields) - {"id"})
+        docs, next_cursor = await _page_docs(self.collection, limit, start_after, fields)
+        if fields:
+            items = [{"id": doc.id, **{f: (doc.to_dict() or {}).get(f) for f in fields}} for doc in docs]
+        else:
+            items = [Course(id=doc.id, **doc.to_dict()).model_dump() for doc in docs]
+        return Page(items=items, next_cursor=next_cursor)
+
+    def peek(self, id: str) -> Optional[Course]:
+        return self.cache.peek(id) if self.cache is not None else None
+
+    def invalidate_cache(self, soft: bool = False) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(soft=soft)
+
+    async def get(self, id: str) -> Optional[Course]:
+        doc = await self.collection.document(id).get()
+        if doc.exists:
+            return Course(id=doc.id, **doc.to_dict())
+        return None
+
+    async def get_many(self, ids: List[str]) -> List[Course]:
+        unique_ids = list(dict.fromkeys(i for i in ids if i))
+        if not unique_ids:
+            return []
+        refs = [self.collection.document(i) for i in unique_ids]
+        found = {doc.id: Course(id=doc.id, **doc.to_dict()) async for doc in self.db.get_all(refs) if doc.exists}
+        return [found[i] for i in unique_ids if i in found]
+
+    async def save(self, data: Course) -> Course:
+        doc_data = data.model_dump(exclude={"id"})
+        if data.id:
+            doc_ref = self.collection.document(data.id)
+            previous = await doc_ref.get()
+            await doc_ref.set(doc_data)
+            if _schedule_changed(previous, data):
+                await self._rebuild_schedules(data.id)
+        else:
+            _, doc_ref = await self.collection.add(doc_data)
+            data.id = doc_ref.id
+        self.invalidate_cache()
+        return data
+
+    async def delete(self, id: str) -> bool:
+        await self.collection.document(id).delete()
+        await self._rebuild_schedules(id, removed=True)
+        self.invalidate_cache()
+        return True
+
+    async def _rebuild_schedules(self, course_id: str, removed: bool = False) -> None:
+        # FirestoreCourseRepository._rebuild_schedules와 같음 (수강 학생들의 점유 비트맵을 현재 시간표로 다시 계산)
+        query = self.schedule_collection.where(filter=FieldFilter("course_ids", "array_contains", course_id))
+        refs = [doc.reference async for doc in query.select([]).stream()]
+        dropped = course_id if removed else None
+        for chunk in _chunks(refs, SCHEDULE_REBUILD_CHUNK):
+
+            @firestore.async_transactional
+            async def rebuild(transaction):
+                docs = [doc async for doc in await transaction.get_all(chunk) if doc.exists]
+                courses = {c.id: c for c in await self.get_many(_schedule_course_ids(docs))}
+                for doc in docs:
+                    transaction.set(doc.reference, _rebuilt_schedule(doc, dropped, courses))
+
+            await rebuild(self.db.transaction())
+
+
+class AsyncFirestoreUserRepository:
+    _to_user = staticmethod(FirestoreUserRepository._to_user)
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = self.db.collection("users")
+
+    async def list(self) -> List[User]:
+        users: List[User] = []
+        async for doc in self.collection.stream():
+            try:
+                users.append(self._to_user(doc))
+            except Exception as e:
+                print(f"[users] skipped invalid user doc {doc.id}: {e}")
+        return users
+
+    async def list_page(self, limit: int, start_after: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        fields = _validate_fields(fields, set(User.model_fields) - {"uid"})
+        selected = fields + ["name"] if fields and "displayName" in fields else fields
+        docs, next_cursor = await _page_docs(self.collection, limit, start_after, selected)
+        items = []
+        for doc in docs:
+            try:
+                user = self._to_user(doc).model_dump()
+            except Exception as e:
+                print(f"[users] skipped invalid user doc {doc.id}: {e}")
+                continue
+            items.append({"uid": user["uid"], **{f: user[f] for f in fields}} if fields else user)
+        return Page(items=items, next_cursor=next_cursor)
+
+    async def count_students(self) -> int:
+        total = (await _aggregate_values(self.collection.count(alias="total")))["total"]
+        admins = sum([1 async for doc in _non_student_roles(self.collection).stream() if _is_admin_doc(doc)])
+        return int(total) - admins
+
+    async def get(self, uid: str) -> Optional[User]:
+        doc = await self.collection.document(uid).get()
+        if doc.exists:
+            return self._to_user(doc)
+        return None
+
+    async def save(self, data: User) -> User:
+        data.role = normalize_role(data.role)
+        await self.collection.document(data.uid).set(data.model_dump())
+        return data
+
+    async def delete(self, uid: str) -> bool:
+        await self.collection.document(uid).delete()
+        return True
+
+
+class AsyncFirestoreEnrollmentRepository(EnrollmentTransactionPlan):
+    def __init__(self, db):
+        self._init_collections(db)
+
+    async def list(self) -> List[Enrollment]:
+        return [self._to_enrollment(doc) async for doc in self.collection.stream()]
+
+    async def get(self, id: str) -> Optional[Enrollment]:
+        doc = await self.collection.document(id).get()
+        if doc.exists:
+            return self._to_enrollment(doc)
+        return None
+
+    async def save(self, data: Enrollment) -> Enrollment:
+        await self.collection.document(data.id).set(data.model_dump(exclude={"id"}))
+        return data
+
+    async def delete(self, id: str) -> bool:
+        await self.collection.document(id).delete()
+        return True
+
+    async def get_by_student_id(self, student_id: str) -> List[Enrollment]:
+        query = self.collection.where(filter=FieldFilter("student_ids", "array_contains", student_id))
+        return [self._to_enrollment(doc) async for doc in query.stream()]
+
+    async def _ensure_schedule(self, student_id: str) -> None:
+        if student_id in self._schedules_ready:
+            return
+        schedule_ref = self.schedule_collection.document(student_id)
+        if not (await schedule_ref.get()).exists:
+            enrollments = await self.get_by_student_id(student_id)
+            course_refs = [self.course_collection.document(e.course_id) for e in enrollments]
+            course_docs = [doc async for doc in self.db.get_all(course_refs)] if course_refs else []
+            try:
+                await schedule_ref.create(self._legacy_schedule(enrollments, course_docs))
+            except AlreadyExists:
+                pass
+        self._schedules_ready.add(student_id)
+
+    async def enroll_atomic(self, student_id: str, course_id: str, validate: Callable[[Optional[Course], Optional[Enrollment], int], None]) -> Enrollment:
+        await self._ensure_schedule(student_id)
+        refs = self._enroll_refs(student_id, course_id)
+
+        with self._track(f"transaction course={course_id}") as run:
+
+            @firestore.async_transactional
+            async def attempt(transaction) -> Enrollment:
+                run.attempts += 1
+                snapshots = await _snapshot_map(await transaction.get_all(list(refs)))
+                return self._apply_enroll(transaction, snapshots, student_id, course_id, refs, validate, run)
+
+            return await attempt(self.db.transaction())
+
+    async def enroll_many_atomic(
+        self, student_id: str, course_ids: List[str], validate: Callable[[Optional[Course], Optional[Enrollment], int], None], atomic: bool = False
+    ) -> List[Tuple[str, Optional[Enrollment], Optional[Exception]]]:
+        await self._ensure_schedule(student_id)
+        batch_refs = self._batch_refs(student_id, course_ids)
+        refs = batch_refs[3]
+
+        if not atomic:
+            snapshots = await _snapshot_map(self.db.get_all(refs))
+            occupancy = self._read_occupancy(snapshots, batch_refs[2])
+            outcomes = []
+            for cid in course_ids:
+                try:
+                    course = self._prevalidate(snapshots, batch_refs, cid, validate, occupancy)
+                    outcomes.append((cid, await self.enroll_atomic(student_id, cid, validate), None))
+                    occupancy |= course_mask(course)
+                except Exception as e:
+                    outcomes.append((cid, None, e))
+            return outcomes
+
+        with self._track(f"batch transaction courses={len(course_ids)}") as run:
+
+            @firestore.async_transactional
+            async def attempt(transaction):
+                run.attempts += 1
+                snapshots = await _snapshot_map(await transaction.get_all(refs))
+                return self._apply_enroll_many(transaction, snapshots, student_id, course_ids, batch_refs, validate, run)
+
+            try:
+                return await attempt(self.db.transaction())
+            except BatchEnrollmentRejected as e:
+                return self._rejected_outcomes(course_ids, e)
+
+
+class AsyncShardedFirestoreEnrollmentRepository(ShardedEnrollmentTransactionPlan, AsyncFirestoreEnrollmentRepository):
+    """ShardedFirestoreEnrollmentRepository와 같은 저장 구조의 비동기 버전 (학생별 문서 + 좌석 샤드)"""
+
+    def __init__(self, db, shards: int = DEFAULT_SEAT_SHARDS):
+        super().__init__(db)
+        self._init_shards(shards)
+
+    async def list(self) -> List[Enrollment]:
+        return self._group([doc async for doc in self.db.collection_group("students").stream()])
+
+    async def get(self, id: str) -> Optional[Enrollment]:
+        enrollments = self._group([doc async for doc in self._students(id).stream()])
+        return enrollments[0] if enrollments else None
+
+    async def save(self, data: Enrollment) -> Enrollment:
+        for chunk in _chunks(data.student_ids):
+            batch = self.db.batch()
+            for student_id in chunk:
+                batch.set(self._students(data.id).document(student_id), self._student_doc(data.course_id, student_id, data.timestamp))
+            await batch.commit()
+        return data
+
+    async def delete(self, id: str) -> bool:
+        refs = [doc.reference async for doc in self._students(id).stream()]
+        refs += [doc.reference async for doc in self._seat_shards(id).stream()]
+        for chunk in _chunks(refs):
+            batch = self.db.batch()
+            for ref in chunk:
+                batch.delete(ref)
+            await batch.commit()
+        return True
+
+    async def get_by_student_id(self, student_id: str) -> List[Enrollment]:
+        query = self.db.collection_group("students").where(filter=FieldFilter("student_id", "==", student_id))
+        return self._group([doc async for doc in query.stream()])
+
+    async def enroll_many_atomic(
+        self, student_id: str, course_ids: List[str], validate: Callable[[Optional[Course], Optional[Enrollment], int], None], atomic: bool = False
+    ) -> List[Tuple[str, Optional[Enrollment], Optional[Exception]]]:
+        # 샤드 구조에서는 강의별 트랜잭션으로 처리 (atomic 일괄 신청은 지원하지 않음)
+        if atomic:
+            raise NotImplementedError("atomic batch enrollment is not supported by this repository")
+        outcomes = []
+        for course_id in course_ids:
+            try:
+                outcomes.append((course_id, await self.enroll_atomic(student_id, course_id, validate), None))
+            except Exception as e:
+                outcomes.append((course_id, None, e))
+        return outcomes
+
+    async def seat_count(self, course_id: str) -> int:
+        return sum([(doc.to_dict() or {}).get("count", 0) async for doc in self._seat_shards(course_id).stream()])
+
+    async def enroll_atomic(self, student_id: str, course_id: str, validate: Callable[[Optional[Course], Optional[Enrollment], int], None]) -> Enrollment:
+        await self._ensure_schedule(student_id)
+        refs = self._sharded_refs(student_id, course_id)
+        course_ref, student_ref, schedule_ref, shard_refs = refs
+        start = random.randrange(self.shards)
+        course = self._to_course(await course_ref.get())
+
+        with self._track(f"sharded transaction course={course_id}") as run:
+
+            @firestore.async_transactional
+            async def attempt(transaction) -> Enrollment:
+                run.attempts += 1
+                snapshots = await _snapshot_map(await transaction.get_all([student_ref, schedule_ref]))
+                already, occupancy = self._read_sharded(snapshots, refs)
+
+                shard_ref, free = None, 0
+                for window in self._shard_windows(course, already, start):
+                    shard_snapshots = await _snapshot_map(await transaction.get_all([shard_refs[i] for i, _ in window]))
+                    shard_ref, free = self._pick_shard(shard_snapshots, shard_refs, window)
+                    if shard_ref is not None:
+                        break
+                return self._apply_sharded_enroll(transaction, student_id, course_id, refs, course, already, occupancy, shard_ref, free, validate, run)
+
+            result = await attempt(self.db.transaction())
+
+        await self._sync_course_count(course_id)
+        return result
+
+    async def _sync_course_count(self, course_id: str) -> None:
+        if not _count_sync_due(course_id):
+            return
+        try:
+            await self.course_collection.document(course_id).update({"current_count": await self.seat_count(course_id)})
+        except Exception as e:
+            print(f"[enrollments] current_count sync failed course={course_id}: {e}")
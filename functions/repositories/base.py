@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Generic, TypeVar, Optional
+from typing import Any, Callable, List, Generic, Tuple, TypeVar, Optional
+
+from models.page import Page
 
 T = TypeVar("T")
 
@@ -12,6 +14,22 @@ class BaseRepository(ABC, Generic[T]):
     def get(self, id: str) -> Optional[T]:
         pass
 
+    def get_many(self, ids: List[str]) -> List[T]:
+        # 기본 구현은 get()을 반복 호출; 배치 조회를 지원하는 저장소는 재정의
+        results = []
+        for id in ids:
+            item = self.get(id)
+            if item is not None:
+                results.append(item)
+        return results
+
+    def list_page(self, limit: int, start_after: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        """
+        문서 ID 순으로 limit개씩 조회. start_after는 이전 페이지의 next_cursor,
+        fields를 주면 해당 필드(+ID)만 서버에서 골라 읽습니다.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support pagination")
+
     @abstractmethod
     def save(self, data: T) -> T:
         pass
@@ -19,3 +37,33 @@ class BaseRepository(ABC, Generic[T]):
     @abstractmethod
     def delete(self, id: str) -> bool:
         pass
+
+
+class TransactionalEnrollmentRepository(BaseRepository[T]):
+    """
+    강의 문서와 수강 신청 문서를 하나의 트랜잭션에서 읽고 갱신할 수 있는 저장소.
+    validate(course, enrollment, occupancy)는 트랜잭션 안에서 호출되며, 예외를 던지면 트랜잭션은 롤백됩니다.
+    occupancy는 학생이 이미 신청한 강의들의 주간 점유 비트맵입니다 (services.schedule 참고, 모르면 0).
+    """
+
+    @abstractmethod
+    def enroll_atomic(self, student_id: str, course_id: str, validate: Callable[[Any, Optional[T], int], None]) -> T:
+        pass
+
+    def enroll_many_atomic(
+        self, student_id: str, course_ids: List[str], validate: Callable[[Any, Optional[T], int], None], atomic: bool = False
+    ) -> List[Tuple[str, Optional[T], Optional[Exception]]]:
+        """
+        여러 강의를 한 번에 신청. (course_id, 결과, 오류) 목록을 course_ids 순서대로 반환합니다.
+        atomic=True면 전부 성공하거나 전부 실패하며, 실패 시 검증을 통과한 강의는 (결과, 오류) 모두 None입니다.
+        기본 구현은 강의별로 enroll_atomic을 호출하며 atomic 모드는 지원하지 않습니다.
+        """
+        if atomic:
+            raise NotImplementedError("atomic batch enrollment is not supported by this repository")
+        outcomes = []
+        for course_id in course_ids:
+            try:
+                outcomes.append((course_id, self.enroll_atomic(student_id, course_id, validate), None))
+            except Exception as e:
+                outcomes.append((course_id, None, e))
+        return outcomes
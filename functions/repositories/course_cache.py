@@ -0,0 +1,201 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from models.course import Course
+
+COURSE_CACHE_TTL_SEC = float(os.getenv("COURSE_CACHE_TTL_SEC", "30"))
+# 리스너가 살아 있어도 이 시간이 지나면 한 번 다시 읽음 (CPU 스로틀링 등으로 이벤트가 밀린 경우 대비)
+COURSE_CACHE_LISTENER_MAX_AGE_SEC = float(os.getenv("COURSE_CACHE_LISTENER_MAX_AGE_SEC", "300"))
+# 수강 신청마다 바뀌는 필드 (content_fingerprint에서 제외)
+SEAT_FIELDS = {"current_count"}
+
+# 현재 컨텍스트(요청 스레드/태스크)의 마지막 목록 조회가 Firestore 읽기 없이 캐시에서 끝났는지
+# (core.request_timing이 fs_read와 cache 구간을 구분하는 데 사용)
+_last_hit: contextvars.ContextVar[bool] = contextvars.ContextVar("course_cache_last_hit", default=False)
+
+
+def reset_last_hit() -> None:
+    _last_hit.set(False)
+
+
+def last_hit() -> bool:
+    return _last_hit.get()
+
+
+class CourseCatalogCache:
+    """
+    인스턴스 단위 강의 목록 캐시.
+
+    - on_snapshot 리스너가 붙어 있으면 변경 이벤트로 캐시를 갱신하고,
+      리스너가 없거나 끊기면 TTL 기준으로 다시 읽습니다.
+    - 우리 쪽 쓰기(save/delete)는 invalidate()로 즉시 캐시를 무효화합니다.
+    - 내용이 바뀔 때마다 version이 증가하므로, 파생 데이터(인덱스, 요약 등)는
+      version을 키로 캐시할 수 있습니다.
+
+    반환되는 Course 객체는 캐시와 공유되므로 호출 측에서 수정하면 안 됩니다.
+    """
+
+    def __init__(self, ttl_sec: float = COURSE_CACHE_TTL_SEC, listener_max_age_sec: float = COURSE_CACHE_LISTENER_MAX_AGE_SEC):
+        self.ttl_sec = ttl_sec
+        self.listener_max_age_sec = listener_max_age_sec
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._async_load_lock: Optional[asyncio.Lock] = None
+        self._courses: Optional[List[Course]] = None
+        self._by_id: Dict[str, Course] = {}
+        self._loaded_at = 0.0
+        self._version = 0
+        self._watch = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def listening(self) -> bool:
+        return self._watch is not None and bool(getattr(self._watch, "is_active", False))
+
+    def _is_fresh(self) -> bool:
+        if self._courses is None:
+            return False
+        age = time.monotonic() - self._loaded_at
+        max_age = self.listener_max_age_sec if self.listening else self.ttl_sec
+        return age < max_age
+
+    def get(self, loader: Callable[[], List[Course]]) -> List[Course]:
+        return self.get_versioned(loader)[1]
+
+    def get_versioned(self, loader: Callable[[], List[Course]]) -> Tuple[Optional[int], List[Course]]:
+        """
+        (version, 강의 목록)을 같은 시점 기준으로 반환하므로 파생 데이터의 캐시 키로 쓸 수 있습니다.
+        로딩 도중 캐시가 바뀌어 결과를 저장하지 못했다면 version은 None입니다.
+        """
+        with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                _last_hit.set(True)
+                return self._version, list(self._courses)
+
+        # 동시에 여러 요청이 만료된 캐시를 만나도 Firestore 조회는 한 번만 수행
+        with self._load_lock:
+            with self._lock:
+                if self._is_fresh():
+                    self.hits += 1
+                    _last_hit.set(True)
+                    return self._version, list(self._courses)
+                self.misses += 1
+                _last_hit.set(False)
+                version = self._version
+            courses = loader()
+            return self._store(courses, expected_version=version), list(courses)
+
+    async def get_versioned_async(self, loader: Callable[[], Awaitable[List[Course]]]) -> Tuple[Optional[int], List[Course]]:
+        """
+        get_versioned()의 비동기 버전 (AsyncClient 저장소용).
+        로딩 중에는 스레드 락 대신 asyncio.Lock으로 대기하므로 이벤트 루프를 막지 않습니다.
+        """
+        with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                _last_hit.set(True)
+                return self._version, list(self._courses)
+
+        if self._async_load_lock is None:
+            self._async_load_lock = asyncio.Lock()
+        async with self._async_load_lock:
+            with self._lock:
+                if self._is_fresh():
+                    self.hits += 1
+                    _last_hit.set(True)
+                    return self._version, list(self._courses)
+                self.misses += 1
+                _last_hit.set(False)
+                version = self._version
+            courses = await loader()
+            return self._store(courses, expected_version=version), list(courses)
+
+    def peek(self, course_id: str) -> Optional[Course]:
+        """캐시에 있는 강의만 반환 (Firestore 조회 없음, 캐시가 비었거나 만료되면 None)"""
+        with self._lock:
+            if not self._is_fresh():
+                return None
+            return self._by_id.get(course_id)
+
+    def _store(self, courses: List[Course], expected_version: Optional[int] = None) -> Optional[int]:
+        with self._lock:
+            # 로딩 중에 invalidate/스냅샷이 먼저 반영되었다면 오래된 결과로 덮어쓰지 않음
+            if expected_version is not None and expected_version != self._version:
+                return None
+            self._courses = list(courses)
+            self._by_id = {c.id: c for c in self._courses}
+            self._loaded_at = time.monotonic()
+            self._version += 1
+            return self._version
+
+    def invalidate(self, soft: bool = False) -> None:
+        """
+        soft=True는 인원수 변경처럼 잦은 쓰기용: 스냅샷 리스너가 살아 있으면
+        곧 변경 이벤트가 도착하므로 캐시를 비우지 않습니다.
+        """
+        if soft and self.listening:
+            return
+        with self._lock:
+            self._courses = None
+            self._version += 1
+
+    def start_listener(self, collection) -> bool:
+        if self.listening:
+            return True
+        try:
+            self._watch = collection.on_snapshot(self._on_snapshot)
+            return True
+        except Exception as e:
+            print(f"[course_cache] snapshot listener unavailable, using TTL={self.ttl_sec}s: {e}")
+            self._watch = None
+            return False
+
+    def stop_listener(self) -> None:
+        watch, self._watch = self._watch, None
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"[course_cache] failed to stop snapshot listener: {e}")
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        courses = []
+        for doc in docs:
+            try:
+                courses.append(Course(id=doc.id, **doc.to_dict()))
+            except Exception as e:
+                print(f"[course_cache] skipped invalid course doc {doc.id}: {e}")
+        self._store(courses)
+
+
+_fingerprint_lock = threading.Lock()
+_fingerprint_version: Optional[int] = None
+_fingerprint: Optional[int] = None
+
+
+def content_fingerprint(courses: List[Course], version: Optional[int]) -> Optional[int]:
+    """
+    좌석 수(SEAT_FIELDS)를 뺀 카탈로그 내용의 지문. 좌석 수만 바뀐 스냅샷은 version이 올라가도 같은 값이므로,
+    신청이 몰리는 동안에도 유지되어야 하는 파생 캐시(에이전트 답변 등)의 키로 씁니다.
+    카탈로그 버전별로 한 번만 계산하고, 버전을 모르면 None
+    """
+    global _fingerprint_version, _fingerprint
+    if version is None:
+        return None
+    with _fingerprint_lock:
+        if _fingerprint_version == version:
+            return _fingerprint
+    fingerprint = hash(tuple(sorted(repr(c.model_dump(exclude=SEAT_FIELDS)) for c in courses)))
+    with _fingerprint_lock:
+        _fingerprint_version, _fingerprint = version, fingerprint
+    return fingerprint
@@ -1,38 +1,187 @@
-from typing import List, Optional
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import firestore
 from google.cloud.firestore import FieldFilter
-from repositories.base import BaseRepository
+from core.metrics import family, registry
+from repositories.base import BaseRepository, TransactionalEnrollmentRepository
+from repositories.course_cache import CourseCatalogCache
 from models.course import Course
 from models.user import User
 from models.enrollment import Enrollment
+from models.page import Page
+from services.schedule import course_mask, mask_from_bytes, mask_to_bytes
+
+def _aggregate_values(aggregation_query) -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    for row in aggregation_query.get():
+        for result in row if isinstance(row, list) else [row]:
+            values[result.alias] = result.value
+    return values
+
+
+def _validate_fields(fields: Optional[List[str]], allowed) -> Optional[List[str]]:
+    if not fields:
+        return None
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def _page_docs(collection, limit: int, start_after: Optional[str], fields: Optional[List[str]]):
+    # 문서 ID 정렬은 유일하고 변하지 않으므로 커서가 안정적임
+    query = collection.order_by("__name__")
+    if fields:
+        query = query.select(fields)
+    if start_after:
+        query = query.start_after({"__name__": start_after})
+    # 한 건 더 읽어서 다음 페이지 존재 여부를 판단
+    docs = list(query.limit(limit + 1).stream())
+    next_cursor = docs[limit - 1].id if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+def normalize_role(raw_role) -> str:
+    """저장된 role 값을 "admin" 또는 "student"로 (대소문자 무시, 알 수 없는 값은 학생)"""
+    return "admin" if raw_role is not None and str(raw_role).lower() == "admin" else "student"
+
+
+def _non_student_roles(collection):
+    # role이 정확히 "student"가 아닌 문서(관리자 + 대소문자가 다른 레거시 값)만 role 필드로 읽음
+    return collection.where(filter=FieldFilter("role", "not-in", ["student"])).select(["role"])
+
+
+def _is_admin_doc(doc) -> bool:
+    return normalize_role((doc.to_dict() or {}).get("role")) == "admin"
+
+
+# 점유 비트맵을 다시 계산할 때 한 트랜잭션에서 읽고 쓰는 student_schedules 문서 수
+SCHEDULE_REBUILD_CHUNK = 100
+
+
+def _schedule_data(course_ids: List[str], courses: Dict[str, Course]) -> Dict:
+    """수강 중인 강의 id 전체와 현재 강의 시간표로 다시 계산한 student_schedules 문서 (없는 강의는 비트 없음)"""
+    occupancy = 0
+    for course_id in course_ids:
+        if course_id in courses:
+            occupancy |= course_mask(courses[course_id])
+    return {"occupancy": mask_to_bytes(occupancy), "course_ids": list(course_ids), "updated_at": datetime.now()}
+
+
+def _schedule_course_ids(docs) -> List[str]:
+    return list(dict.fromkeys(cid for doc in docs for cid in (doc.to_dict() or {}).get("course_ids", [])))
+
+
+def _rebuilt_schedule(doc, dropped: Optional[str], courses: Dict[str, Course]) -> Dict:
+    course_ids = [cid for cid in (doc.to_dict() or {}).get("course_ids", []) if cid != dropped]
+    return _schedule_data(course_ids, courses)
+
+
+def _schedule_changed(previous, data: Course) -> bool:
+    # 시간 문자열이 바뀌었으면 다시 계산 (같은 시간을 다르게 적은 경우 한 번 더 계산할 뿐 결과는 같음)
+    if not previous.exists:
+        return False
+    old = previous.to_dict() or {}
+    return (old.get("start_time"), old.get("end_time")) != (data.start_time, data.end_time)
+
 
 class FirestoreCourseRepository(BaseRepository[Course]):
-    def __init__(self, db):
+    def __init__(self, db, cache: Optional[CourseCatalogCache] = None):
         self.db = db
         self.collection = self.db.collection("courses")
+        self.schedule_collection = self.db.collection("student_schedules")
+        self.cache = cache
 
-    def list(self) -> List[Course]:
+    def _stream_all(self) -> List[Course]:
         docs = self.collection.stream()
         return [Course(id=doc.id, **doc.to_dict()) for doc in docs]
 
+    def list(self) -> List[Course]:
+        if self.cache is not None:
+            return self.cache.get(self._stream_all)
+        return self._stream_all()
+
+    def list_page(self, limit: int, start_after: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        fields = _validate_fields(fields, set(Course.model_fields) - {"id"})
+        docs, next_cursor = _page_docs(self.collection, limit, start_after, fields)
+        if fields:
+            items = [{"id": doc.id, **{f: (doc.to_dict() or {}).get(f) for f in fields}} for doc in docs]
+        else:
+            items = [Course(id=doc.id, **doc.to_dict()).model_dump() for doc in docs]
+        return Page(items=items, next_cursor=next_cursor)
+
+    def peek(self, id: str) -> Optional[Course]:
+        return self.cache.peek(id) if self.cache is not None else None
+
+    def list_versioned(self) -> Tuple[Optional[int], List[Course]]:
+        # 캐시가 없으면 버전을 알 수 없으므로 None
+        if self.cache is not None:
+            return self.cache.get_versioned(self._stream_all)
+        return None, self._stream_all()
+
+    def invalidate_cache(self, soft: bool = False) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(soft=soft)
+
     def get(self, id: str) -> Optional[Course]:
         doc = self.collection.document(id).get()
         if doc.exists:
             return Course(id=doc.id, **doc.to_dict())
         return None
 
+    def get_many(self, ids: List[str]) -> List[Course]:
+        unique_ids = list(dict.fromkeys(i for i in ids if i))
+        if not unique_ids:
+            return []
+        # get_all은 한 번의 BatchGetDocuments RPC로 처리되며 결과 순서는 보장되지 않음
+        refs = [self.collection.document(i) for i in unique_ids]
+        found = {doc.id: Course(id=doc.id, **doc.to_dict()) for doc in self.db.get_all(refs) if doc.exists}
+        return [found[i] for i in unique_ids if i in found]
+
     def save(self, data: Course) -> Course:
         doc_data = data.model_dump(exclude={"id"})
         if data.id:
-            self.collection.document(data.id).set(doc_data)
+            doc_ref = self.collection.document(data.id)
+            previous = doc_ref.get()
+            doc_ref.set(doc_data)
+            if _schedule_changed(previous, data):
+                self._rebuild_schedules(data.id)
         else:
             _, doc_ref = self.collection.add(doc_data)
             data.id = doc_ref.id
+        self.invalidate_cache()
         return data
 
     def delete(self, id: str) -> bool:
         self.collection.document(id).delete()
+        self._rebuild_schedules(id, removed=True)
+        self.invalidate_cache()
         return True
 
+    def _rebuild_schedules(self, course_id: str, removed: bool = False) -> None:
+        """
+        강의 시간이 바뀌거나 강의가 삭제되면, 그 강의를 듣는 학생들의 점유 비트맵을
+        course_ids와 현재 시간표로 다시 계산 (삭제된 강의는 course_ids에서도 뺌).
+        신청 트랜잭션과 같은 문서를 쓰므로 몇 명씩 묶어 트랜잭션으로 처리합니다.
+        """
+        query = self.schedule_collection.where(filter=FieldFilter("course_ids", "array_contains", course_id))
+        refs = [doc.reference for doc in query.select([]).stream()]
+        dropped = course_id if removed else None
+        for chunk in _chunks(refs, SCHEDULE_REBUILD_CHUNK):
+
+            @firestore.transactional
+            def rebuild(transaction):
+                docs = [doc for doc in transaction.get_all(chunk) if doc.exists]
+                courses = {c.id: c for c in self.get_many(_schedule_course_ids(docs))}
+                for doc in docs:
+                    transaction.set(doc.reference, _rebuilt_schedule(doc, dropped, courses))
+
+            rebuild(self.db.transaction())
+
 class FirestoreUserRepository(BaseRepository[User]):
     def __init__(self, db):
         self.db = db
@@ -48,9 +197,7 @@ class FirestoreUserRepository(BaseRepository[User]):
         data["uid"] = str(data.get("uid") or doc.id)
 
         # Normalize unexpected role values to avoid runtime 500s.
-        raw_role = data.get("role")
-        normalized_role = str(raw_role).lower() if raw_role is not None else ""
-        data["role"] = "admin" if normalized_role == "admin" else "student"
+        data["role"] = normalize_role(data.get("role"))
 
         return User(**data)
 
@@ -64,6 +211,28 @@ class FirestoreUserRepository(BaseRepository[User]):
                 print(f"[users] skipped invalid user doc {doc.id}: {e}")
         return users
 
+    def list_page(self, limit: int, start_after: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        fields = _validate_fields(fields, set(User.model_fields) - {"uid"})
+        # 레거시 문서는 displayName 대신 name을 쓰므로 함께 선택
+        selected = fields + ["name"] if fields and "displayName" in fields else fields
+        docs, next_cursor = _page_docs(self.collection, limit, start_after, selected)
+        items = []
+        for doc in docs:
+            try:
+                user = self._to_user(doc).model_dump()
+            except Exception as e:
+                print(f"[users] skipped invalid user doc {doc.id}: {e}")
+                continue
+            items.append({"uid": user["uid"], **{f: user[f] for f in fields}} if fields else user)
+        return Page(items=items, next_cursor=next_cursor)
+
+    def count_students(self) -> int:
+        # 전체는 문서를 읽지 않는 count() 집계, 관리자는 role이 "student"가 아닌 소수 문서만 읽어
+        # _to_user와 같은 기준(normalize_role)으로 셈 ("aDmin" 같은 레거시 값도 관리자로 집계)
+        total = _aggregate_values(self.collection.count(alias="total"))["total"]
+        admins = sum(1 for doc in _non_student_roles(self.collection).stream() if _is_admin_doc(doc))
+        return int(total) - admins
+
     def get(self, uid: str) -> Optional[User]:
         doc = self.collection.document(uid).get()
         if doc.exists:
@@ -71,6 +240,8 @@ class FirestoreUserRepository(BaseRepository[User]):
         return None
 
     def save(self, data: User) -> User:
+        # 저장 시 role을 정규화하여 집계 쿼리와 목록이 같은 값을 보도록 함
+        data.role = normalize_role(data.role)
         self.collection.document(data.uid).set(data.model_dump())
         return data
 
@@ -78,28 +249,229 @@ class FirestoreUserRepository(BaseRepository[User]):
         self.collection.document(uid).delete()
         return True
 
-class FirestoreEnrollmentRepository(BaseRepository[Enrollment]):
-    def __init__(self, db):
+class TransactionStats:
+    """인스턴스 전역 트랜잭션 통계 (커밋/재시도/중단 횟수)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.committed = 0
+        self.rejected = 0  # 검증 실패 (정원 초과, 중복 등)로 롤백된 경우
+        self.retries = 0
+        self.aborted = 0  # 재시도 한도 초과 또는 기타 오류
+
+    def record(self, attempts: int, outcome: str) -> None:
+        with self._lock:
+            self.retries += max(attempts - 1, 0)
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "committed": self.committed,
+                "rejected": self.rejected,
+                "retries": self.retries,
+                "aborted": self.aborted,
+            }
+
+
+enrollment_txn_stats = TransactionStats()
+
+
+def _collect_txn_stats():
+    stats = enrollment_txn_stats.snapshot()
+    return [
+        family(
+            "enrollment_transactions_total",
+            "counter",
+            "Enrollment transactions by outcome",
+            [({"outcome": k}, stats[k]) for k in ("committed", "rejected", "aborted")],
+        ),
+        family("enrollment_transaction_retries_total", "counter", "Enrollment transaction retries", [({}, stats["retries"])]),
+    ]
+
+
+registry.register_collector("enrollment_transactions", _collect_txn_stats)
+
+
+class BatchEnrollmentRejected(Exception):
+    """일괄 신청(atomic) 중 일부 강의가 검증에 실패해 전체를 롤백할 때 사용"""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        super().__init__(f"{len(errors)} course(s) rejected")
+        self.errors = errors
+
+
+class _TransactionRun:
+    """
+    트랜잭션 한 번의 시도 횟수와 결과를 기록 (with 블록, 동기/비동기 저장소 공용).
+    트랜잭션 함수는 시도마다 attempts를 올리고, 검증 실패 시 outcome을 "rejected"로 바꿉니다.
+    """
+
+    def __init__(self, stats: TransactionStats, label: str):
+        self.stats = stats
+        self.label = label
+        self.attempts = 0
+        self.outcome = "aborted"
+
+    def __enter__(self) -> "_TransactionRun":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None and self.outcome == "aborted":
+            self.outcome = "committed"
+        self.stats.record(self.attempts, self.outcome)
+        if self.attempts > 1 or self.outcome == "aborted":
+            print(f"[enrollments] {self.label} attempts={self.attempts} outcome={self.outcome}")
+        return False
+
+
+class EnrollmentTransactionPlan:
+    """
+    문서 구조(enrollments/{course_id} + student_schedules/{student_id})의 참조, 검증, 트랜잭션 쓰기.
+    문서를 읽는 I/O를 제외한 부분을 모아 두어 동기 저장소(FirestoreEnrollmentRepository)와
+    비동기 저장소(async_firestore_repo)가 같은 코드로 검증하고 씁니다.
+    (트랜잭션의 set/update/create는 쓰기를 모아 두기만 하므로 동기/비동기 트랜잭션 모두에 그대로 사용)
+    """
+
+    def _init_collections(self, db) -> None:
         self.db = db
-        self.collection = self.db.collection("enrollments")
+        self.collection = db.collection("enrollments")
+        self.course_collection = db.collection("courses")
+        # 학생별 주간 점유 비트맵: student_schedules/{student_id} {"occupancy": bytes, "course_ids": [...]}
+        self.schedule_collection = db.collection("student_schedules")
+        # 점유 비트맵 문서가 있는 것을 확인한 학생 (인스턴스당 학생별로 한 번만 확인)
+        self._schedules_ready = set()
+        self.txn_stats = enrollment_txn_stats
+
+    def _track(self, label: str) -> _TransactionRun:
+        return _TransactionRun(self.txn_stats, label)
+
+    @staticmethod
+    def _snapshot_map(docs) -> Dict[str, object]:
+        return {doc.reference.path: doc for doc in docs}
+
+    @staticmethod
+    def _to_enrollment(doc) -> Enrollment:
+        data = doc.to_dict()
+        if "id" in data:
+            del data["id"]
+        return Enrollment(id=doc.id, **data)
+
+    @staticmethod
+    def _to_course(course_doc) -> Optional[Course]:
+        return Course(id=course_doc.id, **course_doc.to_dict()) if course_doc is not None and course_doc.exists else None
+
+    def _read_pair(self, snapshots, course_ref, enroll_ref):
+        course = self._to_course(snapshots.get(course_ref.path))
+        enroll_doc = snapshots.get(enroll_ref.path)
+        enrollment = self._to_enrollment(enroll_doc) if enroll_doc and enroll_doc.exists else None
+        return course, enrollment
+
+    @staticmethod
+    def _read_occupancy(snapshots, schedule_ref) -> int:
+        doc = snapshots.get(schedule_ref.path)
+        if not doc or not doc.exists:
+            return 0
+        return mask_from_bytes((doc.to_dict() or {}).get("occupancy"))
+
+    @staticmethod
+    def _write_occupancy(writer, schedule_ref, course_ids: List[str], occupancy: int) -> None:
+        writer.set(
+            schedule_ref,
+            {"occupancy": mask_to_bytes(occupancy), "course_ids": firestore.ArrayUnion(course_ids), "updated_at": datetime.now()},
+            merge=True,
+        )
+
+    @staticmethod
+    def _write_enrollment(writer, student_id: str, course_id: str, course_ref, enroll_ref, current: Optional[Enrollment]) -> Enrollment:
+        now = datetime.now()
+        writer.update(course_ref, {"current_count": firestore.Increment(1)})
+        writer.set(
+            enroll_ref,
+            {"course_id": course_id, "student_ids": firestore.ArrayUnion([student_id]), "timestamp": now},
+            merge=True,
+        )
+        student_ids = list(current.student_ids) if current else []
+        return Enrollment(id=course_id, course_id=course_id, student_ids=student_ids + [student_id], timestamp=now)
+
+    def _legacy_schedule(self, enrollments: List[Enrollment], course_docs) -> Dict:
+        """
+        student_schedules 문서가 생기기 전에 신청한 학생의 점유 비트맵 (기존 수강 내역 + 현재 시간표).
+        신청 트랜잭션은 이 문서만 읽으므로, 없으면 이전 강의와의 시간 충돌을 놓치게 됨
+        """
+        courses = {c.id: c for c in map(self._to_course, course_docs) if c is not None}
+        return _schedule_data([e.course_id for e in enrollments], courses)
+
+    def _enroll_refs(self, student_id: str, course_id: str):
+        """강의 문서, 수강 신청 문서, 학생 시간표 문서 (한 번의 get_all로 읽음)"""
+        return self.course_collection.document(course_id), self.collection.document(course_id), self.schedule_collection.document(student_id)
+
+    def _apply_enroll(self, transaction, snapshots, student_id: str, course_id: str, refs, validate, run: _TransactionRun) -> Enrollment:
+        course_ref, enroll_ref, schedule_ref = refs
+        course, enrollment = self._read_pair(snapshots, course_ref, enroll_ref)
+        occupancy = self._read_occupancy(snapshots, schedule_ref)
+        try:
+            validate(course, enrollment, occupancy)
+        except Exception:
+            run.outcome = "rejected"
+            raise
+
+        self._write_occupancy(transaction, schedule_ref, [course_id], occupancy | course_mask(course))
+        return self._write_enrollment(transaction, student_id, course_id, course_ref, enroll_ref, enrollment)
+
+    def _batch_refs(self, student_id: str, course_ids: List[str]):
+        course_refs = {cid: self.course_collection.document(cid) for cid in course_ids}
+        enroll_refs = {cid: self.collection.document(cid) for cid in course_ids}
+        schedule_ref = self.schedule_collection.document(student_id)
+        return course_refs, enroll_refs, schedule_ref, [*course_refs.values(), *enroll_refs.values(), schedule_ref]
+
+    def _prevalidate(self, snapshots, batch_refs, course_id: str, validate, occupancy: int) -> Course:
+        """일괄 신청(atomic=False)의 사전 검증. 통과한 강의를 반환 (이후 강의별 트랜잭션으로 신청)"""
+        course_refs, enroll_refs, _, _ = batch_refs
+        course, current = self._read_pair(snapshots, course_refs[course_id], enroll_refs[course_id])
+        validate(course, current, occupancy)
+        return course
+
+    def _apply_enroll_many(self, transaction, snapshots, student_id: str, course_ids: List[str], batch_refs, validate, run: _TransactionRun):
+        course_refs, enroll_refs, schedule_ref, _ = batch_refs
+        occupancy = self._read_occupancy(snapshots, schedule_ref)
+        errors: Dict[str, Exception] = {}
+        pending = []
+        for cid in course_ids:
+            course, current = self._read_pair(snapshots, course_refs[cid], enroll_refs[cid])
+            try:
+                # 같은 일괄 신청 안의 강의끼리도 시간이 겹치면 거절
+                validate(course, current, occupancy)
+                occupancy |= course_mask(course)
+                pending.append((cid, current))
+            except Exception as e:
+                errors[cid] = e
+        if errors:
+            run.outcome = "rejected"
+            raise BatchEnrollmentRejected(errors)
+        self._write_occupancy(transaction, schedule_ref, [cid for cid, _ in pending], occupancy)
+        return [
+            (cid, self._write_enrollment(transaction, student_id, cid, course_refs[cid], enroll_refs[cid], current), None)
+            for cid, current in pending
+        ]
+
+    @staticmethod
+    def _rejected_outcomes(course_ids: List[str], error: BatchEnrollmentRejected):
+        return [(cid, None, error.errors.get(cid)) for cid in course_ids]
+
+
+class FirestoreEnrollmentRepository(EnrollmentTransactionPlan, TransactionalEnrollmentRepository[Enrollment]):
+    def __init__(self, db):
+        self._init_collections(db)
 
     def list(self) -> List[Enrollment]:
         docs = self.collection.stream()
-        results = []
-        for doc in docs:
-            data = doc.to_dict()
-            if "id" in data:
-                del data["id"]
-            results.append(Enrollment(id=doc.id, **data))
-        return results
+        return [self._to_enrollment(doc) for doc in docs]
 
     def get(self, id: str) -> Optional[Enrollment]:
         doc = self.collection.document(id).get()
         if doc.exists:
-            data = doc.to_dict()
-            if "id" in data:
-                del data["id"]
-            return Enrollment(id=doc.id, **data)
+            return self._to_enrollment(doc)
         return None
 
     def save(self, data: Enrollment) -> Enrollment:
@@ -114,10 +486,281 @@ class FirestoreEnrollmentRepository(BaseRepository[Enrollment]):
     def get_by_student_id(self, student_id: str) -> List[Enrollment]:
         # 'student_ids' 배열에 student_id가 포함된 문서 검색
         docs = self.collection.where(filter=FieldFilter("student_ids", "array_contains", student_id)).stream()
-        results = []
+        return [self._to_enrollment(doc) for doc in docs]
+
+    def _ensure_schedule(self, student_id: str) -> None:
+        # 점유 비트맵 문서가 없는 (이전부터 수강 중인) 학생이면 트랜잭션 전에 기존 수강 내역으로 만들어 둠
+        if student_id in self._schedules_ready:
+            return
+        schedule_ref = self.schedule_collection.document(student_id)
+        if not schedule_ref.get().exists:
+            enrollments = self.get_by_student_id(student_id)
+            course_refs = [self.course_collection.document(e.course_id) for e in enrollments]
+            course_docs = list(self.db.get_all(course_refs)) if course_refs else []
+            try:
+                schedule_ref.create(self._legacy_schedule(enrollments, course_docs))
+            except AlreadyExists:
+                pass  # 동시에 다른 요청이 먼저 만든 경우
+        self._schedules_ready.add(student_id)
+
+    def enroll_atomic(self, student_id: str, course_id: str, validate: Callable[[Optional[Course], Optional[Enrollment], int], None]) -> Enrollment:
+        self._ensure_schedule(student_id)
+        refs = self._enroll_refs(student_id, course_id)
+
+        with self._track(f"transaction course={course_id}") as run:
+
+            @firestore.transactional
+            def attempt(transaction) -> Enrollment:
+                run.attempts += 1
+                snapshots = self._snapshot_map(transaction.get_all(list(refs)))
+                return self._apply_enroll(transaction, snapshots, student_id, course_id, refs, validate, run)
+
+            return attempt(self.db.transaction())
+
+    def enroll_many_atomic(
+        self, student_id: str, course_ids: List[str], validate: Callable[[Optional[Course], Optional[Enrollment], int], None], atomic: bool = False
+    ) -> List[Tuple[str, Optional[Enrollment], Optional[Exception]]]:
+        self._ensure_schedule(student_id)
+        batch_refs = self._batch_refs(student_id, course_ids)
+        refs = batch_refs[3]
+
+        if not atomic:
+            # 한 번의 multi-get으로 사전 검증 → 실패한 강의는 트랜잭션 없이 바로 결과 처리
+            snapshots = self._snapshot_map(self.db.get_all(refs))
+            occupancy = self._read_occupancy(snapshots, batch_refs[2])
+            outcomes = []
+            for cid in course_ids:
+                try:
+                    course = self._prevalidate(snapshots, batch_refs, cid, validate, occupancy)
+                    outcomes.append((cid, self.enroll_atomic(student_id, cid, validate), None))
+                    occupancy |= course_mask(course)
+                except Exception as e:
+                    outcomes.append((cid, None, e))
+            return outcomes
+
+        with self._track(f"batch transaction courses={len(course_ids)}") as run:
+
+            @firestore.transactional
+            def attempt(transaction):
+                run.attempts += 1
+                snapshots = self._snapshot_map(transaction.get_all(refs))
+                return self._apply_enroll_many(transaction, snapshots, student_id, course_ids, batch_refs, validate, run)
+
+            try:
+                return attempt(self.db.transaction())
+            except BatchEnrollmentRejected as e:
+                return self._rejected_outcomes(course_ids, e)
+
+
+DEFAULT_SEAT_SHARDS = 10
+# 트랜잭션 안에서 한 번의 get_all로 읽는 샤드 수 (읽은 샤드는 모두 잠기므로 전체가 아닌 일부만)
+SHARD_READ_WINDOW = 3
+COURSE_COUNT_SYNC_INTERVAL_SEC = 1.0
+# WriteBatch 한 번에 담을 수 있는 최대 쓰기 수
+WRITE_BATCH_LIMIT = 500
+
+# 강의별 마지막 current_count 동기화 시각 (인스턴스 전역)
+_last_count_sync: Dict[str, float] = {}
+_count_sync_lock = threading.Lock()
+
+
+def _count_sync_due(course_id: str) -> bool:
+    # 강의 문서에 대한 쓰기를 인스턴스당 강의별 1초에 한 번으로 제한
+    now = time.monotonic()
+    with _count_sync_lock:
+        if now - _last_count_sync.get(course_id, 0.0) < COURSE_COUNT_SYNC_INTERVAL_SEC:
+            return False
+        _last_count_sync[course_id] = now
+        return True
+
+
+def _chunks(items: List, size: int = WRITE_BATCH_LIMIT) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def shard_capacity(max_students: int, shards: int, index: int) -> int:
+    """정원을 샤드 수로 나눈 i번째 샤드의 좌석 수 (나머지는 앞쪽 샤드에 1석씩 배분)"""
+    base, extra = divmod(max(max_students, 0), shards)
+    return base + (1 if index < extra else 0)
+
+
+class ShardedEnrollmentTransactionPlan(EnrollmentTransactionPlan):
+    """
+    샤드 구조(학생별 문서 + 좌석 샤드 카운터)의 참조, 검증, 트랜잭션 쓰기.
+    EnrollmentTransactionPlan과 같이 I/O가 없는 부분만 모아 동기/비동기 저장소가 공유합니다.
+    """
+
+    def _init_shards(self, shards: int) -> None:
+        self.shards = shards
+
+    def _students(self, course_id: str):
+        return self.collection.document(course_id).collection("students")
+
+    def _seat_shards(self, course_id: str):
+        return self.collection.document(course_id).collection("seat_shards")
+
+    @staticmethod
+    def _group(docs) -> List[Enrollment]:
+        grouped: Dict[str, Enrollment] = {}
         for doc in docs:
-            data = doc.to_dict()
-            if "id" in data:
-                del data["id"]
-            results.append(Enrollment(id=doc.id, **data))
-        return results
+            data = doc.to_dict() or {}
+            course_id = data.get("course_id") or doc.reference.parent.parent.id
+            timestamp = data.get("timestamp") or datetime.now()
+            enrollment = grouped.get(course_id)
+            if enrollment is None:
+                grouped[course_id] = Enrollment(id=course_id, course_id=course_id, student_ids=[doc.id], timestamp=timestamp)
+            else:
+                enrollment.student_ids.append(doc.id)
+                enrollment.timestamp = max(enrollment.timestamp, timestamp)
+        return list(grouped.values())
+
+    @staticmethod
+    def _student_doc(course_id: str, student_id: str, timestamp) -> Dict:
+        return {"course_id": course_id, "student_id": student_id, "timestamp": timestamp}
+
+    def _sharded_refs(self, student_id: str, course_id: str):
+        course_ref = self.course_collection.document(course_id)
+        student_ref = self._students(course_id).document(student_id)
+        schedule_ref = self.schedule_collection.document(student_id)
+        shard_refs = [self._seat_shards(course_id).document(str(i)) for i in range(self.shards)]
+        return course_ref, student_ref, schedule_ref, shard_refs
+
+    def _read_sharded(self, snapshots, refs):
+        _, student_ref, schedule_ref, _ = refs
+        student_doc = snapshots.get(student_ref.path)
+        return bool(student_doc and student_doc.exists), self._read_occupancy(snapshots, schedule_ref)
+
+    def _shard_windows(self, course: Optional[Course], already: bool, start: int) -> List[List[Tuple[int, int]]]:
+        """
+        빈 좌석을 확인할 샤드 (index, 좌석 수)를 임의의 시작 위치부터 SHARD_READ_WINDOW개씩 묶어 반환.
+        묶음마다 get_all 한 번으로 읽고, 빈 샤드를 찾으면 나머지 묶음은 읽지 않습니다.
+        """
+        if course is None or already:
+            return []
+        candidates = []
+        for offset in range(self.shards):
+            index = (start + offset) % self.shards
+            capacity = shard_capacity(course.max_students, self.shards, index)
+            if capacity > 0:
+                candidates.append((index, capacity))
+        return _chunks(candidates, SHARD_READ_WINDOW)
+
+    @staticmethod
+    def _pick_shard(snapshots, shard_refs, window: List[Tuple[int, int]]):
+        """묶음 안에서 첫 번째 빈 샤드의 (참조, 남은 좌석). 없으면 (None, 0)"""
+        for index, capacity in window:
+            shard_doc = snapshots.get(shard_refs[index].path)
+            count = (shard_doc.to_dict() or {}).get("count", 0) if shard_doc and shard_doc.exists else 0
+            if count < capacity:
+                return shard_refs[index], capacity - count
+        return None, 0
+
+    def _apply_sharded_enroll(
+        self, transaction, student_id: str, course_id: str, refs, course, already: bool, occupancy: int, shard_ref, free: int, validate, run: _TransactionRun
+    ) -> Enrollment:
+        _, student_ref, schedule_ref, _ = refs
+        try:
+            current = Enrollment(id=course_id, course_id=course_id, student_ids=[student_id] if already else [])
+            # 검증 함수는 current_count로 정원을 판단하므로, 선택한 샤드 기준 남은 좌석으로 환산해 전달
+            validate(course.model_copy(update={"current_count": course.max_students - free}) if course else None, current, occupancy)
+        except Exception:
+            run.outcome = "rejected"
+            raise
+
+        now = datetime.now()
+        transaction.create(student_ref, self._student_doc(course_id, student_id, now))
+        transaction.set(shard_ref, {"count": firestore.Increment(1)}, merge=True)
+        self._write_occupancy(transaction, schedule_ref, [course_id], occupancy | course_mask(course))
+        return Enrollment(id=course_id, course_id=course_id, student_ids=[student_id], timestamp=now)
+
+
+class ShardedFirestoreEnrollmentRepository(ShardedEnrollmentTransactionPlan, FirestoreEnrollmentRepository):
+    """
+    인기 강의용 저장 방식.
+
+    - 학생별 문서:  enrollments/{course_id}/students/{student_id}
+    - 좌석 카운터:  enrollments/{course_id}/seat_shards/{0..N-1}  ({"count": int})
+
+    정원은 샤드별로 나눠(shard_capacity) 각 트랜잭션이 읽은 샤드 몇 개만 잠그므로,
+    같은 강의에 대한 동시 신청이 하나의 문서로 몰리지 않습니다.
+    강의 문서(정원, 시간표)는 트랜잭션 밖에서 읽습니다. 트랜잭션이 강의 문서를 잠그지 않으므로,
+    커밋 후 샤드 합계로 current_count를 주기적으로 동기화하는 쓰기가 신청 트랜잭션과 경합하지 않습니다.
+    """
+
+    def __init__(self, db, shards: int = DEFAULT_SEAT_SHARDS):
+        super().__init__(db)
+        self._init_shards(shards)
+
+    def list(self) -> List[Enrollment]:
+        return self._group(self.db.collection_group("students").stream())
+
+    def get(self, id: str) -> Optional[Enrollment]:
+        enrollments = self._group(self._students(id).stream())
+        return enrollments[0] if enrollments else None
+
+    def save(self, data: Enrollment) -> Enrollment:
+        for chunk in _chunks(data.student_ids):
+            batch = self.db.batch()
+            for student_id in chunk:
+                batch.set(self._students(data.id).document(student_id), self._student_doc(data.course_id, student_id, data.timestamp))
+            batch.commit()
+        return data
+
+    def delete(self, id: str) -> bool:
+        refs = [doc.reference for doc in self._students(id).stream()]
+        refs += [doc.reference for doc in self._seat_shards(id).stream()]
+        for chunk in _chunks(refs):
+            batch = self.db.batch()
+            for ref in chunk:
+                batch.delete(ref)
+            batch.commit()
+        return True
+
+    def get_by_student_id(self, student_id: str) -> List[Enrollment]:
+        # collection group 쿼리 (firestore.indexes.json의 students.student_id 오버라이드 필요)
+        docs = self.db.collection_group("students").where(filter=FieldFilter("student_id", "==", student_id)).stream()
+        return self._group(docs)
+
+    # 샤드 구조에서는 강의별 트랜잭션으로 처리 (atomic 일괄 신청은 지원하지 않음)
+    enroll_many_atomic = TransactionalEnrollmentRepository.enroll_many_atomic
+
+    def seat_count(self, course_id: str) -> int:
+        return sum((doc.to_dict() or {}).get("count", 0) for doc in self._seat_shards(course_id).stream())
+
+    def enroll_atomic(self, student_id: str, course_id: str, validate: Callable[[Optional[Course], Optional[Enrollment], int], None]) -> Enrollment:
+        self._ensure_schedule(student_id)
+        refs = self._sharded_refs(student_id, course_id)
+        course_ref, student_ref, schedule_ref, shard_refs = refs
+        start = random.randrange(self.shards)
+        course = self._to_course(course_ref.get())
+
+        with self._track(f"sharded transaction course={course_id}") as run:
+
+            @firestore.transactional
+            def attempt(transaction) -> Enrollment:
+                run.attempts += 1
+                snapshots = self._snapshot_map(transaction.get_all([student_ref, schedule_ref]))
+                already, occupancy = self._read_sharded(snapshots, refs)
+
+                # 빈 좌석이 있는 샤드를 임의의 위치부터 몇 개씩 묶어 확인 (트랜잭션은 읽은 샤드만 잠금)
+                shard_ref, free = None, 0
+                for window in self._shard_windows(course, already, start):
+                    shard_snapshots = self._snapshot_map(transaction.get_all([shard_refs[i] for i, _ in window]))
+                    shard_ref, free = self._pick_shard(shard_snapshots, shard_refs, window)
+                    if shard_ref is not None:
+                        break
+                return self._apply_sharded_enroll(transaction, student_id, course_id, refs, course, already, occupancy, shard_ref, free, validate, run)
+
+            result = attempt(self.db.transaction())
+
+        self._sync_course_count(course_id)
+        return result
+
+    def _sync_course_count(self, course_id: str) -> None:
+        # 트랜잭션 밖에서 주기적으로만 반영 (실패해도 무시)
+        if not _count_sync_due(course_id):
+            return
+        try:
+            self.course_collection.document(course_id).update({"current_count": self.seat_count(course_id)})
+        except Exception as e:
+            print(f"[enrollments] current_count sync failed course={course_id}: {e}")
@@ -0,0 +1,349 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from core.metrics import family, registry
+from services.enrollment_service import EnrollmentError
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "2"))
+ADMISSION_HOLD_TTL_SEC = float(os.getenv("ADMISSION_HOLD_TTL_SEC", "5"))
+ADMISSION_QUEUE_TIMEOUT_SEC = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SEC", "10"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "200"))
+# 트랜잭션이 "Course is full"로 끝난 강의는 이 시간 동안 트랜잭션 없이 바로 거절
+ADMISSION_FULL_BACKOFF_SEC = float(os.getenv("ADMISSION_FULL_BACKOFF_SEC", "2"))
+
+
+@dataclass
+class SeatHold:
+    token: str
+    course_id: str
+    student_id: str
+    expires_at: float
+
+
+@dataclass
+class BatchAdmission:
+    """
+    일괄 신청 한 번의 강의별 홀드. 홀드를 받지 못한 강의는 refused에 거절 사유가 남고,
+    호출 측이 트랜잭션 결과를 outcomes에 넣으면 반납할 때 강의별 결과(committed/full/released)로 반영됩니다.
+    """
+
+    holds: Dict[str, SeatHold] = field(default_factory=dict)
+    refused: Dict[str, EnrollmentError] = field(default_factory=dict)
+    outcomes: List[Tuple[str, Any, Optional[Exception]]] = field(default_factory=list)
+
+    def admitted(self, course_ids: List[str], atomic: bool) -> List[str]:
+        """트랜잭션으로 보낼 강의 (atomic이면 하나라도 거절되면 아무것도 보내지 않음)"""
+        if atomic and self.refused:
+            return []
+        return [cid for cid in course_ids if cid in self.holds]
+
+    def merge(self, course_ids: List[str], outcomes: List[Tuple[str, Any, Optional[Exception]]]) -> List[Tuple[str, Any, Optional[Exception]]]:
+        """트랜잭션 결과에 입장 단계에서 거절된 강의를 합쳐 course_ids 순서로 (어느 쪽에도 없으면 함께 롤백된 강의)"""
+        done = {outcome[0]: outcome for outcome in outcomes}
+        self.outcomes = [done.get(cid) or (cid, None, self.refused.get(cid)) for cid in course_ids]
+        return self.outcomes
+
+
+class _Waiter:
+    """
+    큐에서 대기 중인 요청 하나. 차례가 되면 이 요청만 깨웁니다.
+    동기 호출은 threading.Event, 비동기 호출은 자기 이벤트 루프의 asyncio.Event를 기다립니다.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.event = asyncio.Event() if loop is not None else threading.Event()
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # 루프가 이미 닫힘
+
+
+@dataclass
+class _CourseGate:
+    holds: Dict[str, SeatHold] = field(default_factory=dict)
+    waiters: Deque[_Waiter] = field(default_factory=deque)
+    full_until: float = 0.0
+
+
+class AdmissionController:
+    """
+    수강 신청 트랜잭션 앞단의 입장 제어 (인스턴스 단위).
+
+    - 강의별로 짧은 수명(TTL)의 좌석 홀드 토큰을 발급하고, 동시에 진행되는 트랜잭션 수를
+      max_in_flight와 (캐시 기준) 남은 좌석 수 중 작은 값으로 제한합니다.
+      캐시된 좌석 수는 동시성 한도에만 쓰며, 정원 초과 여부는 트랜잭션이 최종 판단합니다.
+    - 한도를 넘은 요청은 강의별 FIFO 큐에서 대기하며, 홀드가 반납되면 맨 앞 대기자만 깨웁니다.
+      queue_timeout 안에 차례가 오지 않으면 EnrollmentError로 거절됩니다.
+    - 홀드를 반납하지 못한 요청(타임아웃 등)의 토큰은 TTL이 지나면 회수됩니다.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        hold_ttl_sec: float = ADMISSION_HOLD_TTL_SEC,
+        queue_timeout_sec: float = ADMISSION_QUEUE_TIMEOUT_SEC,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        full_backoff_sec: float = ADMISSION_FULL_BACKOFF_SEC,
+    ):
+        self.max_in_flight = max_in_flight
+        self.hold_ttl_sec = hold_ttl_sec
+        self.queue_timeout_sec = queue_timeout_sec
+        self.max_queue = max_queue
+        self.full_backoff_sec = full_backoff_sec
+        # 상태 변경만 보호하는 짧은 락 (대기는 요청별 _Waiter에서)
+        self._lock = threading.Lock()
+        self._gates: Dict[str, _CourseGate] = {}
+        self.stats = {"admitted": 0, "queued": 0, "rejected_full": 0, "timed_out": 0, "expired": 0}
+
+    def _reclaim(self, gate: _CourseGate, now: float) -> None:
+        expired = [token for token, hold in gate.holds.items() if hold.expires_at <= now]
+        for token in expired:
+            del gate.holds[token]
+            self.stats["expired"] += 1
+
+    @staticmethod
+    def _wake_next(gate: _CourseGate) -> None:
+        if gate.waiters:
+            gate.waiters[0].wake()
+
+    def _discard_gate_if_idle(self, course_id: str, gate: _CourseGate) -> None:
+        if not gate.holds and not gate.waiters and gate.full_until <= time.monotonic() and self._gates.get(course_id) is gate:
+            del self._gates[course_id]
+
+    def _remove_waiter(self, course_id: str, gate: _CourseGate, waiter: Optional[_Waiter]) -> None:
+        # 호출 측이 self._lock을 잡고 있어야 함
+        if waiter is None or waiter not in gate.waiters:
+            return
+        was_next = gate.waiters[0] is waiter
+        gate.waiters.remove(waiter)
+        if was_next:
+            self._wake_next(gate)
+        self._discard_gate_if_idle(course_id, gate)
+
+    def _reject(self, course_id: str, gate: _CourseGate, waiter: Optional[_Waiter], message: str, stat: str) -> EnrollmentError:
+        self._remove_waiter(course_id, gate, waiter)
+        self.stats[stat] += 1
+        return EnrollmentError(message)
+
+    def _try_admit(
+        self, course_id: str, student_id: str, gate: _CourseGate, waiter: Optional[_Waiter], remaining: Optional[int], deadline: float, make_waiter
+    ) -> Tuple[Optional[SeatHold], Optional[_Waiter], float]:
+        """
+        홀드를 발급할 수 있으면 (홀드, None, 0), 기다려야 하면 (None, 대기자, 대기 시간)을 반환하고
+        거절해야 하면 EnrollmentError를 던집니다. 동기/비동기 acquire가 공유합니다.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._reclaim(gate, now)
+            if gate.full_until > now:
+                raise self._reject(course_id, gate, waiter, "Course is full", "rejected_full")
+
+            # 캐시가 0석이라고 해도 한 건은 트랜잭션까지 보내 실제 정원으로 확인
+            limit = self.max_in_flight if remaining is None else max(1, min(self.max_in_flight, remaining))
+            is_next = not gate.waiters or gate.waiters[0] is waiter
+            if len(gate.holds) < limit and is_next:
+                if waiter is not None:
+                    gate.waiters.popleft()
+                    # 다음 대기자도 자리가 있는지 확인할 수 있게 깨움
+                    self._wake_next(gate)
+                hold = SeatHold(token=uuid.uuid4().hex, course_id=course_id, student_id=student_id, expires_at=now + self.hold_ttl_sec)
+                gate.holds[hold.token] = hold
+                self.stats["admitted"] += 1
+                return hold, None, 0.0
+
+            if waiter is None:
+                if len(gate.waiters) >= self.max_queue:
+                    raise self._reject(course_id, gate, None, "Registration queue is full, please retry", "timed_out")
+                waiter = make_waiter()
+                gate.waiters.append(waiter)
+                self.stats["queued"] += 1
+
+            if now >= deadline:
+                raise self._reject(course_id, gate, waiter, "Registration is busy, please retry", "timed_out")
+            waiter.event.clear()
+            # 홀드 만료도 감지해야 하므로 TTL 단위로 깨어나 다시 확인
+            return None, waiter, min(deadline - now, self.hold_ttl_sec)
+
+    def _gate(self, course_id: str) -> _CourseGate:
+        with self._lock:
+            return self._gates.setdefault(course_id, _CourseGate())
+
+    def acquire(self, course_id: str, student_id: str, remaining_seats: Optional[Callable[[], Optional[int]]] = None) -> SeatHold:
+        deadline = time.monotonic() + self.queue_timeout_sec
+        gate = self._gate(course_id)
+        waiter: Optional[_Waiter] = None
+        try:
+            while True:
+                remaining = remaining_seats() if remaining_seats else None
+                hold, waiter, wait_sec = self._try_admit(course_id, student_id, gate, waiter, remaining, deadline, _Waiter)
+                if hold is not None:
+                    return hold
+                waiter.event.wait(timeout=wait_sec)
+        except BaseException:
+            # 어떤 예외로 빠져나가든 큐에 대기자를 남기지 않음 (남으면 뒤의 요청이 모두 막힘)
+            with self._lock:
+                self._remove_waiter(course_id, gate, waiter)
+            raise
+
+    async def acquire_async(self, course_id: str, student_id: str, remaining_seats: Optional[Callable[[], Optional[int]]] = None) -> SeatHold:
+        """acquire()와 같지만 스레드를 점유하지 않고 이벤트 루프에서 대기합니다."""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.queue_timeout_sec
+        gate = self._gate(course_id)
+        waiter: Optional[_Waiter] = None
+        try:
+            while True:
+                remaining = remaining_seats() if remaining_seats else None
+                hold, waiter, wait_sec = self._try_admit(course_id, student_id, gate, waiter, remaining, deadline, lambda: _Waiter(loop))
+                if hold is not None:
+                    return hold
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), timeout=wait_sec)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # 취소나 remaining_seats() 오류 등으로 빠져나가면 큐에서 빠짐 (홀드는 발급과 동시에 반환되므로 남지 않음)
+            with self._lock:
+                self._remove_waiter(course_id, gate, waiter)
+            raise
+
+    def release(self, hold: SeatHold, outcome: str = "committed") -> None:
+        with self._lock:
+            gate = self._gates.get(hold.course_id)
+            if gate is None:
+                return
+            gate.holds.pop(hold.token, None)
+            if outcome == "full":
+                gate.full_until = time.monotonic() + self.full_backoff_sec
+            self._wake_next(gate)
+            self._discard_gate_if_idle(hold.course_id, gate)
+
+    @staticmethod
+    def _outcome(error: EnrollmentError) -> str:
+        return "full" if str(error) == "Course is full" else "released"
+
+    def acquire_many(
+        self, course_ids: List[str], student_id: str, remaining_seats: Optional[Callable[[str], Optional[int]]] = None
+    ) -> BatchAdmission:
+        """
+        일괄 신청의 강의별 홀드를 course_id 순서로 받습니다 (두 일괄 요청이 서로의 홀드를 기다리며 엇갈리지 않도록).
+        거절된 강의(정원 백오프, 대기 초과)는 refused에 남기고 나머지 강의는 계속 진행합니다.
+        """
+        batch = BatchAdmission()
+        try:
+            for course_id in sorted(course_ids):
+                seats = (lambda cid=course_id: remaining_seats(cid)) if remaining_seats else None
+                try:
+                    batch.holds[course_id] = self.acquire(course_id, student_id, seats)
+                except EnrollmentError as e:
+                    batch.refused[course_id] = e
+        except BaseException:
+            self.release_many(batch)
+            raise
+        return batch
+
+    async def acquire_many_async(
+        self, course_ids: List[str], student_id: str, remaining_seats: Optional[Callable[[str], Optional[int]]] = None
+    ) -> BatchAdmission:
+        batch = BatchAdmission()
+        try:
+            for course_id in sorted(course_ids):
+                seats = (lambda cid=course_id: remaining_seats(cid)) if remaining_seats else None
+                try:
+                    batch.holds[course_id] = await self.acquire_async(course_id, student_id, seats)
+                except EnrollmentError as e:
+                    batch.refused[course_id] = e
+        except BaseException:
+            self.release_many(batch)
+            raise
+        return batch
+
+    def release_many(self, batch: BatchAdmission) -> None:
+        # 결과가 없는 강의(예외로 중단, 함께 롤백)는 "released"
+        results = {course_id: (enrollment, error) for course_id, enrollment, error in batch.outcomes}
+        for course_id, hold in batch.holds.items():
+            enrollment, error = results.get(course_id, (None, None))
+            if enrollment is not None:
+                outcome = "committed"
+            elif isinstance(error, EnrollmentError):
+                outcome = self._outcome(error)
+            else:
+                outcome = "released"
+            self.release(hold, outcome)
+        batch.holds.clear()
+
+    @contextmanager
+    def admit(self, course_id: str, student_id: str, remaining_seats: Optional[Callable[[], Optional[int]]] = None) -> Iterator[SeatHold]:
+        hold = self.acquire(course_id, student_id, remaining_seats)
+        outcome = "released"
+        try:
+            yield hold
+            outcome = "committed"
+        except EnrollmentError as e:
+            outcome = self._outcome(e)
+            raise
+        finally:
+            self.release(hold, outcome)
+
+    @asynccontextmanager
+    async def admit_async(self, course_id: str, student_id: str, remaining_seats: Optional[Callable[[], Optional[int]]] = None) -> AsyncIterator[SeatHold]:
+        hold = await self.acquire_async(course_id, student_id, remaining_seats)
+        outcome = "released"
+        try:
+            yield hold
+            outcome = "committed"
+        except EnrollmentError as e:
+            outcome = self._outcome(e)
+            raise
+        finally:
+            # 취소(CancelledError)를 포함해 어떤 경우에도 홀드를 반납
+            self.release(hold, outcome)
+
+    @contextmanager
+    def admit_many(
+        self, course_ids: List[str], student_id: str, remaining_seats: Optional[Callable[[str], Optional[int]]] = None
+    ) -> Iterator[BatchAdmission]:
+        batch = self.acquire_many(course_ids, student_id, remaining_seats)
+        try:
+            yield batch
+        finally:
+            self.release_many(batch)
+
+    @asynccontextmanager
+    async def admit_many_async(
+        self, course_ids: List[str], student_id: str, remaining_seats: Optional[Callable[[str], Optional[int]]] = None
+    ) -> AsyncIterator[BatchAdmission]:
+        batch = await self.acquire_many_async(course_ids, student_id, remaining_seats)
+        try:
+            yield batch
+        finally:
+            self.release_many(batch)
+
+
+# 인스턴스 전역 입장 제어기
+admission_controller = AdmissionController()
+
+registry.register_collector(
+    "admission",
+    lambda: [
+        family(
+            "enrollment_admission_total",
+            "counter",
+            "Admission controller decisions",
+            [({"result": k}, v) for k, v in dict(admission_controller.stats).items()],
+        )
+    ],
+)
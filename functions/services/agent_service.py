@@ -1,102 +1,278 @@
-﻿import json
+﻿import contextvars
+import json
 import os
-from typing import List, Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from core import request_timing
+from core.metrics import registry
+from core.openai_client import get_openai_client
 from models.course import Course
+from repositories.course_cache import content_fingerprint
 from services.course_service import CourseService
 from services.enrollment_service import EnrollmentService, EnrollmentError
+from services.intent_router import AGENT_FAST_PATH_ENABLED, ENROLL_KEYWORDS, cache_text, classify, course_query
+from services.response_cache import response_cache
+from services.schedule import get_schedule_index
+from services.tool_encoding import COURSE_KEY_LEGEND, catalog_digest, encode_course_list
+
+# fallback 수강 신청에서 검색 1위 강의를 신청하기 위한 최소 점수와 2위와의 최소 점수 차
+COURSE_MATCH_MIN_SCORE = 0.6
+COURSE_MATCH_MIN_MARGIN = 0.1
+
+# 한 단계에서 여러 도구를 동시에 실행할 때 쓰는 스레드 수 (인스턴스 전역, 요청 간 공유)
+AGENT_TOOL_WORKERS = int(os.getenv("AGENT_TOOL_WORKERS", "4"))
+# 조회 전용 도구는 서로 독립이므로 병렬 실행, 수강 신청 도구는 같은 학생 문서를 건드리므로 순서대로 실행
+READ_ONLY_TOOLS = {"list_courses", "get_my_enrollments"}
+
+# 도구 작업이 미리 읽기 결과를 기다리는 동안 같은 풀의 자리를 막지 않도록 풀을 분리
+_tool_executor = ThreadPoolExecutor(max_workers=AGENT_TOOL_WORKERS, thread_name_prefix="agent-tool")
+_prefetch_executor = ThreadPoolExecutor(max_workers=AGENT_TOOL_WORKERS, thread_name_prefix="agent-prefetch")
+
+
+def _submit(executor: ThreadPoolExecutor, fn: Callable, *args) -> Future:
+    # 요청 컨텍스트(contextvars)를 작업 스레드로 복사
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+class ChatContext:
+    """
+    채팅 한 번 동안 공유하는 강의 목록과 수강 내역.
+    채팅 시작 시 둘을 동시에 읽기 시작하고, 실제로 필요한 곳에서 결과를 기다립니다.
+    """
+
+    def __init__(self, course_service: CourseService, enrollment_service: EnrollmentService, user_id: str):
+        self.course_service = course_service
+        self.enrollment_service = enrollment_service
+        self.user_id = user_id
+        self.refresh()
+
+    def refresh(self) -> None:
+        # 수강 신청 후에는 인원수/수강 내역이 바뀌므로 다시 읽음
+        self._catalog = _submit(_prefetch_executor, self.course_service.get_all_courses_versioned)
+        self._enrollments = _submit(_prefetch_executor, self.enrollment_service.get_student_enrollments, self.user_id)
+
+    def catalog(self) -> Tuple[Optional[int], List[Course]]:
+        return self._catalog.result()
+
+    def courses(self) -> List[Course]:
+        return self.catalog()[1]
+
+    def enrollments(self) -> List[Any]:
+        return self._enrollments.result()
+
+
+class AgentStats:
+    """채팅 경로(fast_path / llm / llm_digest)별 요청 수, 모델 호출 수, 지연 시간 (인스턴스 단위)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths: Dict[str, Dict[str, float]] = {}
+
+    def record(self, path: str, completions: int, latency_ms: float) -> None:
+        with self._lock:
+            stats = self._paths.setdefault(path, {"requests": 0, "completions": 0, "latency_ms": 0.0})
+            stats["requests"] += 1
+            stats["completions"] += completions
+            stats["latency_ms"] += latency_ms
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                path: {
+                    **stats,
+                    "avg_completions": stats["completions"] / stats["requests"],
+                    "avg_latency_ms": stats["latency_ms"] / stats["requests"],
+                }
+                for path, stats in self._paths.items()
+            }
+
+
+agent_stats = AgentStats()
+
+AGENT_STEPS = registry.histogram("agent_steps", "LLM completions per agent request by path", buckets=(0, 1, 2, 3, 4, 5, 6, 8))
 
 class AgentService:
     def __init__(self, course_service: CourseService, enrollment_service: EnrollmentService):
         self.course_service = course_service
         self.enrollment_service = enrollment_service
         
-        # Initialize OpenAI Client
-        api_key = os.environ.get("OPENAI_API_KEY")
-        self.init_error = None
-
-        if not api_key:
-            print("Warning: OPENAI_API_KEY is not set.")
-            self.init_error = "OPENAI_API_KEY Missing"
-            self.client = None
-        else:
-            try:
-                from openai import OpenAI
-                self.client = OpenAI(api_key=api_key)
-            except Exception as e:
-                print(f"Warning: OpenAI SDK unavailable: {e}")
-                self.init_error = f"OpenAI SDK Error: {str(e)}"
-                self.client = None
+        # 인스턴스 전역 OpenAI 클라이언트 재사용 (연결 풀/keep-alive 유지)
+        self.client, self.init_error = get_openai_client()
 
     def chat(self, user_id: str, message: str) -> str:
+        """chat_stream()을 끝까지 소비하고 최종 응답만 반환"""
+        response = ""
+        for event in self.chat_stream(user_id, message):
+            if event["type"] == "done":
+                response = event["response"]
+        return response
+
+    def chat_stream(self, user_id: str, message: str) -> Iterator[Dict[str, Any]]:
+        """
+        에이전트 루프를 실행하면서 진행 상황을 이벤트로 내보냅니다.
+        - {"type": "delta", "content": str}: 모델이 생성 중인 답변 조각
+        - {"type": "tool_start", "name": str}: 도구 실행 시작
+        - {"type": "tool_end", "name": str, "ok": bool}: 도구 실행 완료
+        - {"type": "done", "response": str}: 최종 답변 (항상 마지막에 한 번, delta와 다를 수 있음)
+        """
+        started = time.monotonic()
+        run = {"path": "llm", "completions": 0, "cache_key": None, "cacheable": False}
+        try:
+            for event in self._chat_events(user_id, message, run):
+                # 부수 효과 없이 정상적으로 끝난 답변만 저장
+                if event["type"] == "done" and run["cacheable"] and run["cache_key"] is not None:
+                    response_cache.put(run["cache_key"], event["response"])
+                yield event
+        finally:
+            latency_ms = (time.monotonic() - started) * 1000
+            agent_stats.record(run["path"], run["completions"], latency_ms)
+            AGENT_STEPS.observe(run["completions"], path=run["path"])
+            # 처리 경로와 LLM 호출 횟수는 요청 로그 한 줄(core.request_timing)에 함께 남김
+            request_timing.annotate(agent_path=run["path"], agent_completions=run["completions"])
+
+    def _chat_events(self, user_id: str, message: str, run: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
         # Debug: 사용자 메시지 확인
         print(f"Agent Chat Request - User: {user_id}, Message: {message}")
 
-        if not self.client:
-            return f"죄송합니다. 서버 설정 오류로 인해 AI 에이전트를 사용할 수 없습니다. ({self.init_error})"
-
-        # Define tools
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "list_courses",
-                    "description": "수강 가능한 모든 강의 목록을 조회합니다. 강의명, 강사, 시간, 정원 정보를 포함합니다.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {},
+        try:
+            # 강의 목록과 수강 내역을 동시에 미리 읽기 시작
+            context = ChatContext(self.course_service, self.enrollment_service, user_id)
+
+            # 같은 학생 + 같은 질문 + 같은 수강 내역 + 같은 카탈로그 내용이면 이전 답변 재사용
+            run["cache_key"] = self._response_cache_key(message, context)
+            if run["cache_key"] is not None:
+                cached = response_cache.get(run["cache_key"])
+                if cached is not None:
+                    run["path"] = "cache"
+                    yield {"type": "done", "response": cached}
+                    return
+
+            # 단순 요청은 LLM 호출 없이 바로 처리 (확신이 낮으면 None → 아래 LLM 루프)
+            fast_response = self._answer_fast_path(user_id, message, context)
+            if fast_response is not None:
+                run["path"] = "fast_path"
+                # 수강 신청 메시지는 캐시 키가 없으므로 여기서 캐시되는 것은 조회 답변뿐
+                run["cacheable"] = True
+                yield {"type": "done", "response": fast_response}
+                return
+
+            if not self.client:
+                yield {"type": "done", "response": f"죄송합니다. 서버 설정 오류로 인해 AI 에이전트를 사용할 수 없습니다. ({self.init_error})"}
+                return
+
+            # Define tools
+            tools = [
+                {
+                    "type": "function",
+                    "function": {
+                        "name": "list_courses",
+                        "description": f"수강 가능한 강의 목록을 조회합니다. 결과 키: {COURSE_KEY_LEGEND}. next_offset이 있으면 offset으로 다음 목록을 조회할 수 있습니다.",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "query": {
+                                    "type": "string",
+                                    "description": "사용자가 언급한 강의명/강사명. 주면 관련 강의만 관련도순으로 반환합니다.",
+                                },
+                                "offset": {
+                                    "type": "integer",
+                                    "description": "이전 결과의 next_offset",
+                                },
+                            },
+                        },
                     },
                 },
-            },
-           {
-                "type": "function",
-                "function": {
-                    "name": "get_my_enrollments",
-                    "description": "사용자가 현재 신청한 수강 내역을 조회합니다.",
-                    "parameters": {
-                        "type": "object",
-                         "properties": {},
+               {
+                    "type": "function",
+                    "function": {
+                        "name": "get_my_enrollments",
+                        "description": "사용자가 현재 신청한 수강 내역을 조회합니다.",
+                        "parameters": {
+                            "type": "object",
+                             "properties": {},
+                        },
                     },
                 },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "enroll_course",
-                    "description": "특정 강의를 수강 신청합니다. 성공 또는 실패 메시지를 반드시 반환합니다.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "course_id": {
-                                "type": "string",
-                                "description": "신청할 강의의 고유 ID. 사용자가 강의명을 입력했다면 먼저 list_courses로 ID를 확인해야 합니다.",
+                {
+                    "type": "function",
+                    "function": {
+                        "name": "enroll_course",
+                        "description": "특정 강의를 수강 신청합니다. 성공 또는 실패 메시지를 반드시 반환합니다.",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "course_id": {
+                                    "type": "string",
+                                    "description": "신청할 강의의 고유 ID. 사용자가 강의명을 입력했다면 먼저 list_courses로 ID를 확인해야 합니다.",
+                                },
                             },
+                            "required": ["course_id"],
                         },
-                        "required": ["course_id"],
                     },
                 },
-            },
-        ]
-        
-        # System prompt
-        system_instruction = f"""
-        당신은 수강신청 도우미 AI 에이전트입니다. 
-        학생들이 강의를 조회하고 수강신청하는 것을 도와주세요. 사용자 ID: {user_id}
+                {
+                    "type": "function",
+                    "function": {
+                        "name": "enroll_courses",
+                        "description": "여러 강의를 한 번에 수강 신청합니다. 강의별 성공/실패 결과를 반환합니다.",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "course_ids": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "신청할 강의 ID 목록",
+                                },
+                                "atomic": {
+                                    "type": "boolean",
+                                    "description": "true면 하나라도 실패할 경우 아무 강의도 신청하지 않습니다. 사용자가 '전부 아니면 안 함'을 원할 때만 사용하세요.",
+                                },
+                            },
+                            "required": ["course_ids"],
+                        },
+                    },
+                },
+            ]
         
-        [매우 중요한 규칙 - 반드시 따를 것]
+            # 카탈로그가 작으면 강의 요약을 프롬프트에 넣어 list_courses 왕복 없이 바로 신청하게 함
+            digest = self._catalog_digest(context)
+            if digest is not None:
+                run["path"] = "llm_digest"
+                lookup_rules = """
+        1. 아래 [강의 목록 요약]에 사용자가 말한 강의가 있으면 `list_courses`를 호출하지 말고 **그 ID로 바로 `enroll_course`를 호출**하세요.
+        2. 요약에서 강의를 찾지 못했거나 강사/설명 같은 자세한 정보가 필요할 때만 `list_courses`를 호출하세요.
+        3. 사용자에게 강의 ID를 되묻지 마세요. 사용자는 강의 ID를 모릅니다."""
+            else:
+                lookup_rules = """
         1. 사용자가 "수강 신청 해줘" 등 명령을 내렸는데 **강의 ID를 정확히 말하지 않고 강의명(예: 파이썬, 리액트 등)만 언급했다면**, 
            사용자에게 되묻지 말고 **즉시 `list_courses` 도구를 호출**하세요.
         2. `list_courses` 도구의 실행 결과를 보고, 사용자가 말한 강의명과 일치하는 강의의 ID를 스스로 찾아내세요.
         3. 찾아낸 ID를 사용하여 **반드시 `enroll_course` 도구를 호출**하여 신청을 시도하세요.
-        4. 사용자는 강의 ID를 모릅니다. 당신이 `list_courses`로 찾아서 처리해야 합니다.
+        4. 사용자는 강의 ID를 모릅니다. 당신이 `list_courses`로 찾아서 처리해야 합니다."""
+
+            # System prompt
+            system_instruction = f"""
+        당신은 수강신청 도우미 AI 에이전트입니다. 
+        학생들이 강의를 조회하고 수강신청하는 것을 도와주세요. 사용자 ID: {user_id}
+        
+        [매우 중요한 규칙 - 반드시 따를 것]{lookup_rules}
         5. 수강 신청 완료 후 결과를 정중하게 한국어로 안내하세요.
+        6. 여러 강의를 신청해야 하면 `enroll_course`를 여러 번 부르지 말고 `enroll_courses`로 한 번에 신청하세요.
+        7. 사용자가 특정 강의명이나 강사를 말했다면 `list_courses`에 query로 넘겨 필요한 강의만 조회하세요.
+        """
+            if digest is not None:
+                system_instruction += f"""
+        [강의 목록 요약] (ID | 강의명 | 시간 | 잔여 좌석)
+{digest}
         """
 
-        messages = [
-            {"role": "system", "content": system_instruction},
-            {"role": "user", "content": message},
-        ]
+            messages = [
+                {"role": "system", "content": system_instruction},
+                {"role": "user", "content": message},
+            ]
 
-        try:
             # Multi-step tool loop:
             # list_courses -> enroll_course 같이 연속 tool 호출이 필요한 케이스를 끝까지 처리
             max_steps = 5
@@ -107,56 +283,135 @@ class AgentService:
                 # 이미 수강신청에 성공했다면, 더 이상 도구를 쓰지 말고 답변만 생성하도록 강제 ("none")
                 current_tool_choice = "none" if enrollment_done else "auto"
 
-                response = self.client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=messages,
-                    tools=tools,
-                    tool_choice=current_tool_choice,
-                )
-                response_message = response.choices[0].message
-                tool_calls = response_message.tool_calls
+                content, tool_calls = yield from self._stream_completion(messages, tools, current_tool_choice)
+                run["completions"] += 1
 
-                print(f"Model Response (step={step}): {response_message.content}")
+                print(f"Model Response (step={step}): {content}")
                 if tool_calls:
-                    print(f"Tool Calls Detected (step={step}): {[tc.function.name for tc in tool_calls]}")
+                    print(f"Tool Calls Detected (step={step}): {[tc['function']['name'] for tc in tool_calls]}")
 
                 if not tool_calls:
                     # Fallback 로직은 도구를 아직 안 썼을 때만 유효하거나, 
                     # enrollment_done 상태라면 그냥 답변을 리턴하면 됨.
                     if enrollment_done:
-                         return response_message.content or "수강 신청이 완료되었습니다."
-                         
+                        yield {"type": "done", "response": content or "수강 신청이 완료되었습니다."}
+                        return
+
                     # Fallback: 모델이 tool call을 누락해도 수강신청 의도는 서버에서 강제 처리
                     fallback_response = self._fallback_enroll_if_needed(user_id, message)
                     if fallback_response is not None:
-                        return fallback_response
-                    return response_message.content or ""
-
-                messages.append(response_message)
-                
-                for tool_call in tool_calls:
-                    tool_output = self._execute_tool_call(user_id, tool_call.function.name, tool_call.function.arguments)
+                        yield {"type": "done", "response": fallback_response}
+                        return
+                    run["cacheable"] = not run.get("side_effects", False)
+                    yield {"type": "done", "response": content}
+                    return
+
+                messages.append({"role": "assistant", "content": content or None, "tool_calls": tool_calls})
+
+                tool_outputs = yield from self._run_tool_calls(user_id, tool_calls, context)
+                if any(tc["function"]["name"] not in READ_ONLY_TOOLS for tc in tool_calls):
+                    run["side_effects"] = True
+                for tool_call, tool_output in zip(tool_calls, tool_outputs):
+                    name = tool_call["function"]["name"]
                     messages.append(
                         {
-                            "tool_call_id": tool_call.id,
+                            "tool_call_id": tool_call["id"],
                             "role": "tool",
-                            "name": tool_call.function.name,
+                            "name": name,
                             "content": tool_output,
                         }
                     )
-                    
-                    if tool_call.function.name == "enroll_course" and '"status": "success"' in tool_output:
+                    if name in ("enroll_course", "enroll_courses") and '"status": "success"' in tool_output:
                         enrollment_done = True
-                
+
                 step += 1
 
-            return "요청을 처리하는 데 단계가 너무 많아 중단되었습니다. 다시 시도해 주세요."
+            yield {"type": "done", "response": "요청을 처리하는 데 단계가 너무 많아 중단되었습니다. 다시 시도해 주세요."}
 
         except Exception as e:
-            print(f"OpenAI Error: {e}")
-            return f"죄송합니다. 처리 중 문제가 발생했습니다. ({str(e)})"
+            # 미리 읽기/빠른 경로/LLM 루프 어디서 실패해도 500이나 끊긴 스트림 대신 오류 답변으로 끝냄
+            print(f"Agent Error: {e}")
+            yield {"type": "done", "response": f"죄송합니다. 처리 중 문제가 발생했습니다. ({str(e)})"}
+
+    def _run_tool_calls(self, user_id: str, tool_calls: List[Dict[str, Any]], context: ChatContext):
+        """
+        한 단계의 도구 호출을 실행하고 tool_calls 순서대로 결과 목록을 반환합니다 (yield from으로 사용).
+        조회 도구는 각각 병렬로, 수강 신청 도구는 하나의 작업에서 순서대로 실행하므로
+        단계 소요 시간은 각 I/O의 합이 아니라 가장 긴 작업 시간이 됩니다.
+        """
+        names = [tc["function"]["name"] for tc in tool_calls]
+        for name in names:
+            yield {"type": "tool_start", "name": name}
+
+        def run(indices: List[int]) -> List[str]:
+            return [self._execute_tool_call(user_id, names[i], tool_calls[i]["function"]["arguments"], context) for i in indices]
+
+        reads = [[i] for i, name in enumerate(names) if name in READ_ONLY_TOOLS]
+        writes = [i for i, name in enumerate(names) if name not in READ_ONLY_TOOLS]
+        groups = reads + ([writes] if writes else [])
+
+        if len(groups) == 1:
+            # 작업이 하나면 스레드 전환 없이 바로 실행
+            completed = [(groups[0], run(groups[0]))]
+        else:
+            futures = {_submit(_tool_executor, run, group): group for group in groups}
+            completed = ((futures[future], future.result()) for future in as_completed(futures))
+
+        outputs: List[Optional[str]] = [None] * len(tool_calls)
+        for indices, group_outputs in completed:
+            for i, tool_output in zip(indices, group_outputs):
+                outputs[i] = tool_output
+                yield {"type": "tool_end", "name": names[i], "ok": '"status": "error"' not in tool_output}
+
+        if any(name in ("enroll_course", "enroll_courses") for name in names):
+            context.refresh()
+        return outputs
 
-    def _execute_tool_call(self, user_id: str, function_name: str, raw_args: str) -> str:
+    def _stream_completion(self, messages: List[Any], tools: List[Dict[str, Any]], tool_choice: str):
+        """
+        스트리밍으로 모델을 호출해 답변 조각은 delta 이벤트로 내보내고,
+        끝나면 (전체 답변, tool_calls 목록)을 반환합니다 (yield from으로 사용).
+        """
+        # OpenAI 구간 시간은 delta를 내보낸 뒤 소비 측을 기다린 시간을 제외하고 집계
+        started = time.monotonic()
+        paused = 0.0
+        try:
+            stream = self.client.chat.completions.create(
+                model="gpt-4o",
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            content_parts: List[str] = []
+            # 스트리밍에서는 tool call이 index별 조각(id, 이름, 인자 문자열 일부)으로 나뉘어 옴
+            calls: Dict[int, Dict[str, Any]] = {}
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None)
+                if usage is not None:
+                    # include_usage: 마지막 청크(choices 없음)에 토큰 사용량이 옴
+                    request_timing.record_tokens(prompt=usage.prompt_tokens, completion=usage.completion_tokens)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                    pause_started = time.monotonic()
+                    yield {"type": "delta", "content": delta.content}
+                    paused += time.monotonic() - pause_started
+                for tc in delta.tool_calls or []:
+                    call = calls.setdefault(tc.index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+                    if tc.id:
+                        call["id"] = tc.id
+                    if tc.function is not None:
+                        call["function"]["name"] += tc.function.name or ""
+                        call["function"]["arguments"] += tc.function.arguments or ""
+        finally:
+            request_timing.record_span("openai", (time.monotonic() - started - paused) * 1000)
+        return "".join(content_parts), [calls[i] for i in sorted(calls)]
+
+    def _execute_tool_call(self, user_id: str, function_name: str, raw_args: str, context: Optional[ChatContext] = None) -> str:
         try:
             function_args = json.loads(raw_args) if raw_args else {}
         except Exception:
@@ -167,14 +422,24 @@ class AgentService:
 
         try:
             if function_name == "list_courses":
-                all_courses = self.course_service.get_all_courses()
+                context = context or ChatContext(self.course_service, self.enrollment_service, user_id)
+                version, all_courses = context.catalog()
                 # 필터링 로직: 이미 수강 중이거나 시간 겹치는 강의 제외
-                available_courses = self._filter_available_courses(user_id, all_courses)
-                tool_output = json.dumps([c.model_dump() for c in available_courses], ensure_ascii=False, default=str)
+                available_courses = self._filter_available_courses(user_id, all_courses, version, context.enrollments())
+                query = (function_args.get("query") or "").strip()
+                if query:
+                    # 검색 색인 관련도순으로 정렬하고 관련 없는 강의는 제외
+                    available_by_id = {c.id: c for c in available_courses}
+                    ranked = self.course_service.search_courses(query, limit=max(len(all_courses), 1))
+                    available_courses = [available_by_id[c.id] for c, _ in ranked if c.id in available_by_id]
+                # 짧은 키 + 토큰 예산 단위 페이지로 직렬화 (카탈로그 버전별로 강의 인코딩 재사용)
+                tool_output = encode_course_list(available_courses, version, offset=self._int_arg(function_args, "offset"))
 
             elif function_name == "get_my_enrollments":
-                enrollments = self.enrollment_service.get_student_enrollments(user_id)
-                tool_output = json.dumps([e.model_dump() for e in enrollments], ensure_ascii=False, default=str)
+                enrollments = context.enrollments() if context else self.enrollment_service.get_student_enrollments(user_id)
+                # 수강 신청 문서에는 다른 학생 ID도 들어 있으므로 강의 정보만 전달
+                courses = self.course_service.get_courses([e.course_id for e in enrollments])
+                tool_output = encode_course_list(courses, None)
 
             elif function_name == "enroll_course":
                 course_id = function_args.get("course_id")
@@ -183,7 +448,20 @@ class AgentService:
                 else:
                     result = self.enrollment_service.enroll_student(user_id, course_id)
                     tool_output = json.dumps(
-                        {"status": "success", "message": "수강 신청 완료", "data": result.model_dump()},
+                        {"status": "success", "message": "수강 신청 완료", "course_id": result.course_id},
+                        ensure_ascii=False,
+                        default=str,
+                    )
+            elif function_name == "enroll_courses":
+                course_ids = function_args.get("course_ids") or []
+                if not course_ids:
+                    tool_output = json.dumps({"error": "course_ids is required"}, ensure_ascii=False)
+                else:
+                    results = self.enrollment_service.enroll_student_many(
+                        user_id, course_ids, atomic=bool(function_args.get("atomic", False))
+                    )
+                    tool_output = json.dumps(
+                        [{"course_id": r["course_id"], "status": r["status"], "message": r["message"]} for r in results],
                         ensure_ascii=False,
                         default=str,
                     )
@@ -201,131 +479,123 @@ class AgentService:
         print(f"Tool Output ({function_name}): {tool_output}")
         return tool_output
 
-    def _fallback_enroll_if_needed(self, user_id: str, message: str) -> Optional[str]:
-        normalized_message = message.replace(" ", "").lower()
-        enroll_intent_keywords = ["수강신청", "신청해", "신청", "등록해", "등록"]
-        has_enroll_intent = any(k in normalized_message for k in enroll_intent_keywords)
-        if not has_enroll_intent:
+    @staticmethod
+    def _response_cache_key(message: str, context: ChatContext) -> Optional[Tuple[str, str, frozenset, int]]:
+        text = cache_text(message)
+        if text is None:
+            return None
+        try:
+            version, courses = context.catalog()
+            enrolled = frozenset(e.course_id for e in context.enrollments())
+        except Exception as e:
+            print(f"Response cache key error: {e}")
+            return None
+        # 좌석 수만 바뀐 카탈로그는 같은 키 (답변의 잔여 좌석은 TTL만큼 늦을 수 있고, 정원은 신청 트랜잭션이 판단)
+        fingerprint = content_fingerprint(courses, version)
+        # 카탈로그 버전을 모르면 강의 변경을 감지할 수 없으므로 캐시하지 않음
+        if fingerprint is None:
             return None
+        # 답변에 학생 정보가 들어갈 수 있으므로 학생별로 따로 캐시
+        return context.user_id, text, enrolled, fingerprint
 
-        print("Tool Call (fallback): list_courses, Args: {}")
-        courses = self.course_service.get_all_courses() # Fallback에서는 전체 검색 후 매칭 시도
-        # 필터링 적용 여부는 고민이나, 일단 매칭된 강의가 신청 가능한지는 서비스에서 체크할 것임
-        
-        print(f"Tool Output (fallback:list_courses): {len(courses)} courses")
+    def _catalog_digest(self, context: ChatContext) -> Optional[str]:
+        try:
+            version, courses = context.catalog()
+            return catalog_digest(courses, version)
+        except Exception as e:
+            print(f"Catalog digest error: {e}")
+            return None
+
+    @staticmethod
+    def _int_arg(args: Dict[str, Any], name: str) -> int:
+        try:
+            return int(args.get(name) or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def _answer_fast_path(self, user_id: str, message: str, context: ChatContext) -> Optional[str]:
+        if not AGENT_FAST_PATH_ENABLED:
+            return None
+        try:
+            intent = classify(message, context.courses)
+        except Exception as e:
+            print(f"Fast path classify error: {e}")
+            return None
+        if intent is None:
+            return None
 
+        print(f"Fast Path: intent={intent.name} confidence={intent.confidence:.2f}")
+        if intent.name == "enroll":
+            return self._enroll_course(user_id, intent.course, "fast_path")
+
+        if intent.name == "my_enrollments":
+            courses = self.course_service.get_courses([e.course_id for e in context.enrollments()])
+            if not courses:
+                return "아직 신청한 강의가 없습니다."
+            return "현재 신청한 강의는 다음과 같습니다.\n" + "\n".join(self._format_course(c) for c in courses)
+
+        version, all_courses = context.catalog()
+        courses = self._filter_available_courses(user_id, all_courses, version, context.enrollments())
         if not courses:
             return "현재 신청 가능한 강의가 없습니다."
+        return "신청 가능한 강의 목록입니다.\n" + "\n".join(self._format_course(c) for c in courses)
 
-        matched_course = None
-        for course in courses:
-            title_no_space = (course.title or "").replace(" ", "").lower()
-            if title_no_space and (title_no_space in normalized_message or normalized_message in title_no_space):
-                matched_course = course
-                break
-
-        if not matched_course:
-            course_names = ", ".join([c.title for c in courses[:5]])
-            return f"신청할 강의를 정확히 찾지 못했습니다. 가능한 강의 예시는 다음과 같습니다: {course_names}"
+    @staticmethod
+    def _format_course(course: Course) -> str:
+        time_range = f", {course.start_time}~{course.end_time}" if course.start_time and course.end_time else ""
+        return f"- **{course.title}** ({course.instructor}{time_range}, {course.current_count}/{course.max_students}명)"
 
-        print(f"Tool Call (fallback): enroll_course, Args: {{'course_id': '{matched_course.id}'}}")
+    def _enroll_course(self, user_id: str, course: Course, source: str) -> str:
+        print(f"Tool Call ({source}): enroll_course, Args: {{'course_id': '{course.id}'}}")
         try:
-            result = self.enrollment_service.enroll_student(user_id, matched_course.id)
-            print(f"Tool Output (fallback:enroll_course): success enrollment_id={result.id}")
-            return f"'{matched_course.title}' 수강 신청이 완료되었습니다."
+            result = self.enrollment_service.enroll_student(user_id, course.id)
+            print(f"Tool Output ({source}:enroll_course): success enrollment_id={result.id}")
+            return f"'{course.title}' 수강 신청이 완료되었습니다."
         except EnrollmentError as e:
-            print(f"Tool Output (fallback:enroll_course): error={str(e)}")
+            print(f"Tool Output ({source}:enroll_course): error={str(e)}")
             return f"수강 신청에 실패했습니다: {str(e)}"
         except Exception as e:
-            print(f"Tool Output (fallback:enroll_course): server_error={str(e)}")
+            print(f"Tool Output ({source}:enroll_course): server_error={str(e)}")
             return f"수강 신청 처리 중 서버 오류가 발생했습니다: {str(e)}"
 
-    def _filter_available_courses(self, user_id: str, all_courses: List[Course]) -> List[Course]:
+    def _fallback_enroll_if_needed(self, user_id: str, message: str) -> Optional[str]:
+        normalized_message = message.replace(" ", "").lower()
+        has_enroll_intent = any(k in normalized_message for k in ENROLL_KEYWORDS)
+        if not has_enroll_intent:
+            return None
+
+        query = course_query(message)
+        print(f"Tool Call (fallback): search_courses, Args: {{'q': '{query}'}}")
+        # 제목/강사/설명 n-gram 색인으로 순위를 매겨 가장 잘 맞는 강의를 선택 (오타/부분 이름 허용)
+        results = self.course_service.search_courses(query, limit=5) if query else []
+        print(f"Tool Output (fallback:search_courses): {[(c.title, round(score, 2)) for c, score in results]}")
+
+        top_score = results[0][1] if results else 0.0
+        ambiguous = len(results) > 1 and top_score - results[1][1] < COURSE_MATCH_MIN_MARGIN
+        if top_score < COURSE_MATCH_MIN_SCORE or ambiguous:
+            candidates = [c for c, _ in results] or self.course_service.get_all_courses()
+            if not candidates:
+                return "현재 신청 가능한 강의가 없습니다."
+            course_names = ", ".join([c.title for c in candidates[:5]])
+            return f"신청할 강의를 정확히 찾지 못했습니다. 가능한 강의 예시는 다음과 같습니다: {course_names}"
+
+        matched_course = results[0][0]
+        return self._enroll_course(user_id, matched_course, "fallback")
+
+    def _filter_available_courses(
+        self, user_id: str, all_courses: List[Course], version: Optional[int] = None, my_enrollments: Optional[List[Any]] = None
+    ) -> List[Course]:
         """
         사용자의 수강 내역을 조회하고,
         1. 이미 수강 중인 강의 제외
         2. 시간이 겹치는 강의 제외 (요일/시간 포맷: 'Mon 09:00', 'Tue 14:00' 등 가정)
+        시간 비교는 카탈로그 버전별로 미리 만들어 둔 주간 비트마스크로 처리합니다.
+        my_enrollments를 주면 (미리 읽어 둔 값) 다시 조회하지 않습니다.
         """
-        my_enrollments = self.enrollment_service.get_student_enrollments(user_id)
+        if my_enrollments is None:
+            my_enrollments = self.enrollment_service.get_student_enrollments(user_id)
         if not my_enrollments:
             return all_courses
 
-        my_course_ids = {e.course_id for e in my_enrollments}
-        course_map = {c.id: c for c in all_courses}
-        
-        # 내가 수강 중인 강의 상세 정보
-        my_courses_details = [course_map[cid] for cid in my_course_ids if cid in course_map]
-
-        available = []
-        for candidate in all_courses:
-            # 1. 이미 수강 중
-            if candidate.id in my_course_ids:
-                continue
-            
-            # 2. 시간 중복 체크
-            is_overlap = False
-            for my_c in my_courses_details:
-                if self._check_time_overlap(candidate, my_c):
-                    is_overlap = True
-                    break
-            
-            if not is_overlap:
-                available.append(candidate)
-        
-        return available
-
-    def _check_time_overlap(self, c1: Course, c2: Course) -> bool:
-        """
-        두 강의 시간 겹침 확인.
-        지원 형식:
-        1) "HH:MM" (예: "09:00")
-        2) "Mon HH:MM" (예: "Mon 09:00")
-        """
-        if not c1.start_time or not c1.end_time or not c2.start_time or not c2.end_time:
-            return False
-
-        try:
-            day_map = {"Mon": 0, "Tue": 1, "Wed": 2, "Thu": 3, "Fri": 4, "Sat": 5, "Sun": 6}
-
-            def parse_time(value: str):
-                parts = value.strip().split()
-
-                # Case 1: HH:MM
-                if len(parts) == 1:
-                    day = None
-                    hhmm = parts[0]
-                # Case 2: Day HH:MM
-                elif len(parts) == 2:
-                    day_key = parts[0].capitalize()
-                    if day_key not in day_map:
-                        return None, None
-                    day = day_map[day_key]
-                    hhmm = parts[1]
-                else:
-                    return None, None
-
-                hh, mm = map(int, hhmm.split(":"))
-                return day, hh * 60 + mm
-
-            day1_s, start1 = parse_time(c1.start_time)
-            day1_e, end1 = parse_time(c1.end_time)
-            day2_s, start2 = parse_time(c2.start_time)
-            day2_e, end2 = parse_time(c2.end_time)
-
-            if None in (start1, end1, start2, end2):
-                return False
-
-            # Day 정보가 모두 있을 때만 요일 불일치 시 non-overlap 처리
-            if day1_s is not None and day2_s is not None and day1_s != day2_s:
-                return False
-            if day1_e is not None and day2_e is not None and day1_e != day2_e:
-                return False
-
-            is_overlapping = (start1 < end2) and (end1 > start2)
-            if is_overlapping:
-                print(f"Overlap detected: {c1.title} overlaps with {c2.title}")
-            return is_overlapping
-
-        except Exception as e:
-            print(f"Time overlap check error: {e}")
-            return False
+        index = get_schedule_index(all_courses, version)
+        return index.filter_available(all_courses, {e.course_id for e in my_enrollments})
@@ -0,0 +1,152 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from models.course import Course
+
+# 필드별 가중치: 제목 일치를 강사/설명보다 우선
+FIELD_WEIGHTS = {"title": 1.0, "instructor": 0.8, "description": 0.5}
+NGRAM_SIZE = 3
+# 제목에 검색어가 그대로 들어 있으면 가산점
+EXACT_TITLE_BONUS = 0.5
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = ["", *"ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"]
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    return _NON_WORD.sub("", (text or "").lower())
+
+
+def decompose(text: str) -> str:
+    """
+    한글 음절을 자모로 분해 ("썬" → "ㅆㅓㄴ").
+    음절 단위로 비교하면 한 글자 오타(파이선/파이썬)에서 n-gram이 모두 달라지므로 자모 단위로 색인합니다.
+    """
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            out.append(_CHOSEONG[offset // 588])
+            out.append(_JUNGSEONG[(offset % 588) // 28])
+            out.append(_JONGSEONG[offset % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def ngrams(text: Optional[str], n: int = NGRAM_SIZE) -> Set[str]:
+    jamo = decompose(normalize(text))
+    if not jamo:
+        return set()
+    # 앞뒤 경계 문자를 붙여 짧은 단어나 단어의 시작/끝도 일치하도록 함
+    padded = f"^{jamo}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class CourseSearchIndex:
+    """
+    제목/강사/설명에 대한 자모 n-gram 역색인.
+    update()로 새 카탈로그를 받으면 검색 필드가 바뀐 강의만 다시 색인합니다
+    (인원수만 바뀌는 잦은 버전 변경에서는 재색인 비용이 없음).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version: Optional[int] = None
+        self._courses: Dict[str, Course] = {}
+        self._signatures: Dict[str, Tuple[str, str, str]] = {}
+        self._postings: Dict[str, Set[Tuple[str, str]]] = defaultdict(set)
+        self._grams: Dict[str, Dict[str, Set[str]]] = {}
+        self.reindexed = 0
+
+    @staticmethod
+    def _signature(course: Course) -> Tuple[str, str, str]:
+        return (course.title or "", course.instructor or "", course.description or "")
+
+    def _remove(self, course_id: str) -> None:
+        for field, grams in self._grams.pop(course_id, {}).items():
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard((course_id, field))
+                    if not postings:
+                        del self._postings[gram]
+        self._signatures.pop(course_id, None)
+
+    def _add(self, course: Course) -> None:
+        fields = {"title": course.title, "instructor": course.instructor, "description": course.description}
+        grams_by_field = {field: ngrams(value) for field, value in fields.items()}
+        for field, grams in grams_by_field.items():
+            for gram in grams:
+                self._postings[gram].add((course.id, field))
+        self._grams[course.id] = grams_by_field
+        self._signatures[course.id] = self._signature(course)
+        self.reindexed += 1
+
+    def update(self, courses: List[Course], version: Optional[int] = None) -> None:
+        incoming = {c.id: c for c in courses}
+        with self._lock:
+            # 동시에 갱신하던 다른 요청이 더 최신 버전을 이미 반영했다면 되돌리지 않음
+            if version is not None and self.version is not None and version < self.version:
+                return
+            for course_id in list(self._courses):
+                if course_id not in incoming:
+                    self._remove(course_id)
+            for course_id, course in incoming.items():
+                if self._signatures.get(course_id) != self._signature(course):
+                    self._remove(course_id)
+                    self._add(course)
+            self._courses = incoming
+            self.version = version
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.3) -> List[Tuple[Course, float]]:
+        query_grams = ngrams(query)
+        if not query_grams:
+            return []
+
+        hits: Dict[Tuple[str, str], int] = defaultdict(int)
+        with self._lock:
+            courses = self._courses
+            for gram in query_grams:
+                for key in self._postings.get(gram, ()):
+                    hits[key] += 1
+
+        scores: Dict[str, float] = {}
+        for (course_id, field), count in hits.items():
+            score = FIELD_WEIGHTS[field] * count / len(query_grams)
+            scores[course_id] = max(scores.get(course_id, 0.0), score)
+
+        normalized_query = normalize(query)
+        results = []
+        for course_id, score in scores.items():
+            course = courses[course_id]
+            if normalized_query and normalized_query in normalize(course.title):
+                score += EXACT_TITLE_BONUS
+            if score >= min_score:
+                results.append((course, score))
+        # 점수가 같으면 더 짧은(더 구체적으로 일치한) 제목을 앞에
+        results.sort(key=lambda item: (-item[1], len(item[0].title or ""), item[0].id))
+        return results[:limit]
+
+
+_index = CourseSearchIndex()
+
+
+def get_search_index(courses: List[Course], version: Optional[int]) -> CourseSearchIndex:
+    """카탈로그 버전이 바뀌었을 때만 인스턴스 전역 색인을 갱신 (버전을 모르면 임시 색인 생성)"""
+    if version is None:
+        index = CourseSearchIndex()
+        index.update(courses)
+        return index
+    if _index.version != version:
+        _index.update(courses, version)
+    return _index
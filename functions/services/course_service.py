@@ -1,6 +1,9 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from models.course import Course, CourseCreate
+from models.page import Page
 from repositories.base import BaseRepository
+from services.course_search import get_search_index
+from services.schedule import normalize_schedule
 
 class CourseService:
     def __init__(self, repo: BaseRepository[Course]):
@@ -9,19 +12,74 @@ class CourseService:
     def get_all_courses(self) -> List[Course]:
         return self.repo.list()
 
+    def get_all_courses_versioned(self) -> Tuple[Optional[int], List[Course]]:
+        """(카탈로그 버전, 강의 목록). 버전을 지원하지 않는 저장소면 버전은 None"""
+        if hasattr(self.repo, "list_versioned"):
+            return self.repo.list_versioned()
+        return None, self.repo.list()
+
+    def search_courses(self, query: str, limit: int = 10) -> List[Tuple[Course, float]]:
+        """제목/강사/설명 n-gram 색인으로 검색해 (강의, 점수)를 점수순으로 반환"""
+        version, courses = self.get_all_courses_versioned()
+        return get_search_index(courses, version).search(query, limit=limit)
+
+    def get_courses_page(self, limit: int, start_after: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        return self.repo.list_page(limit, start_after=start_after, fields=fields)
+
     def get_course(self, id: str) -> Optional[Course]:
         return self.repo.get(id)
 
+    def get_courses(self, ids: List[str]) -> List[Course]:
+        return self.repo.get_many(ids)
+
     def create_course(self, course_data: CourseCreate | Course) -> Course:
         if isinstance(course_data, Course):
-            return self.repo.save(course_data)
-        
-        # CourseCreate를 Course 모델로 변환
-        new_course = Course(
-            id="", # Repository에서 생성 예정
-            **course_data.model_dump()
-        )
-        return self.repo.save(new_course)
+            course = course_data
+        else:
+            # CourseCreate를 Course 모델로 변환
+            course = Course(
+                id="", # Repository에서 생성 예정
+                **course_data.model_dump()
+            )
+        # 수강 신청 시 시간 충돌 검사에 쓰이는 정규화된 시간표를 함께 저장
+        course.schedule = normalize_schedule(course)
+        return self.repo.save(course)
 
     def delete_course(self, id: str) -> bool:
         return self.repo.delete(id)
+
+
+class AsyncCourseService:
+    """CourseService의 비동기 버전 (AsyncClient 저장소용). 검색 색인과 시간표 정규화는 동기 버전과 공유합니다."""
+
+    def __init__(self, repo):
+        self.repo = repo
+
+    async def get_all_courses(self) -> List[Course]:
+        return await self.repo.list()
+
+    async def get_all_courses_versioned(self) -> Tuple[Optional[int], List[Course]]:
+        if hasattr(self.repo, "list_versioned"):
+            return await self.repo.list_versioned()
+        return None, await self.repo.list()
+
+    async def search_courses(self, query: str, limit: int = 10) -> List[Tuple[Course, float]]:
+        version, courses = await self.get_all_courses_versioned()
+        return get_search_index(courses, version).search(query, limit=limit)
+
+    async def get_courses_page(self, limit: int, start_after: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        return await self.repo.list_page(limit, start_after=start_after, fields=fields)
+
+    async def get_course(self, id: str) -> Optional[Course]:
+        return await self.repo.get(id)
+
+    async def get_courses(self, ids: List[str]) -> List[Course]:
+        return await self.repo.get_many(ids)
+
+    async def create_course(self, course_data: CourseCreate | Course) -> Course:
+        course = course_data if isinstance(course_data, Course) else Course(id="", **course_data.model_dump())
+        course.schedule = normalize_schedule(course)
+        return await self.repo.save(course)
+
+    async def delete_course(self, id: str) -> bool:
+        return await self.repo.delete(id)
@@ -1,16 +1,53 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from models.course import Course
 from models.enrollment import Enrollment
-from repositories.base import BaseRepository
+from core.metrics import registry
+from repositories.base import BaseRepository, TransactionalEnrollmentRepository
+from services.schedule import course_mask
 
 class EnrollmentError(Exception):
     pass
 
+# 일괄 신청 한 번에 받을 수 있는 최대 강의 수 (atomic 일괄 신청은 한 트랜잭션에 강의당 문서 약 3개를 씀)
+MAX_BATCH_COURSES = 10
+
+# enrollment_outcomes_total의 outcome 레이블 전체
+# - success / not_found / duplicate / full / conflict: 신청 성공, 또는 _OUTCOME_BY_MESSAGE의 거절 사유
+# - rejected: 그 밖의 EnrollmentError (입장 제어 대기 초과 등), error: 예상하지 못한 예외
+# - rolled_back: atomic 일괄 신청에서 다른 강의가 실패해 함께 롤백된 강의 (이 강의 자체는 거절되지 않음)
+ENROLLMENT_OUTCOME_LABELS = ("success", "not_found", "duplicate", "full", "conflict", "rejected", "error", "rolled_back")
+ENROLLMENT_OUTCOMES = registry.counter(
+    "enrollment_outcomes_total", f"Enrollment attempts by outcome ({', '.join(ENROLLMENT_OUTCOME_LABELS)})"
+)
+# 아직 발생하지 않은 레이블도 0으로 노출해 대시보드가 놓치지 않도록 함
+for _outcome in ENROLLMENT_OUTCOME_LABELS:
+    ENROLLMENT_OUTCOMES.inc(0, outcome=_outcome)
+# EnrollmentError 메시지 → 메트릭 레이블
+_OUTCOME_BY_MESSAGE = {
+    "Course not found": "not_found",
+    "Already enrolled in this course": "duplicate",
+    "Course is full": "full",
+    "Schedule conflicts with an enrolled course": "conflict",
+}
+
+
+def record_enrollment_outcome(error: Optional[Exception]) -> None:
+    if error is None:
+        outcome = "success"
+    elif isinstance(error, EnrollmentError):
+        # 그 밖의 EnrollmentError는 입장 제어 대기 초과 등
+        outcome = _OUTCOME_BY_MESSAGE.get(str(error), "rejected")
+    else:
+        outcome = "error"
+    ENROLLMENT_OUTCOMES.inc(outcome=outcome)
+
 class EnrollmentService:
-    def __init__(self, course_repo: BaseRepository[Course], enroll_repo: BaseRepository[Enrollment]):
+    def __init__(self, course_repo: BaseRepository[Course], enroll_repo: BaseRepository[Enrollment], admission=None):
         self.course_repo = course_repo
         self.enroll_repo = enroll_repo
+        # 선택: services.admission_service.AdmissionController (동시 신청 입장 제어)
+        self.admission = admission
 
     def get_student_enrollments(self, student_id: str) -> List[Enrollment]:
         # Repository capability check
@@ -18,17 +55,67 @@ class EnrollmentService:
             return self.enroll_repo.get_by_student_id(student_id)
         return []
 
+    @staticmethod
+    def _validate_enrollment(student_id: str, course: Optional[Course], enrollment: Optional[Enrollment], occupancy: int = 0) -> None:
+        if not course:
+            raise EnrollmentError("Course not found")
+        if enrollment and student_id in enrollment.student_ids:
+            raise EnrollmentError("Already enrolled in this course")
+        # 이미 신청한 강의들의 주간 점유 비트맵과 겹치는지 확인 (트랜잭션 경로에서만 제공됨)
+        if occupancy & course_mask(course):
+            raise EnrollmentError("Schedule conflicts with an enrolled course")
+        # 정원 확인 (현재 인원수 체크는 Course 모델의 current_count 사용)
+        if course.current_count >= course.max_students:
+            raise EnrollmentError("Course is full")
+
+    def _remaining_seats(self, course_id: str) -> Optional[int]:
+        # 캐시된 강의 정보로 남은 좌석 추정 (RPC 없음, 모르면 None)
+        # 입장 제어의 동시성 한도에만 쓰며, 정원 초과 여부는 트랜잭션 안의 검증이 판단함
+        if not hasattr(self.course_repo, "peek"):
+            return None
+        course = self.course_repo.peek(course_id)
+        if course is None:
+            return None
+        return course.max_students - course.current_count
+
     def enroll_student(self, student_id: str, course_id: str) -> Enrollment:
         print(f"Enroll Service: Enrolling student {student_id} to course {course_id}")
-        
+
+        try:
+            if self.admission is not None:
+                with self.admission.admit(course_id, student_id, lambda: self._remaining_seats(course_id)):
+                    enrollment = self._enroll(student_id, course_id)
+            else:
+                enrollment = self._enroll(student_id, course_id)
+        except Exception as e:
+            record_enrollment_outcome(e)
+            raise
+        record_enrollment_outcome(None)
+        return enrollment
+
+    def _enroll(self, student_id: str, course_id: str) -> Enrollment:
+
+        # 트랜잭션을 지원하는 저장소면 읽기/검증/쓰기를 한 트랜잭션에서 처리
+        if isinstance(self.enroll_repo, TransactionalEnrollmentRepository):
+            enrollment = self.enroll_repo.enroll_atomic(
+                student_id,
+                course_id,
+                lambda course, current, occupancy: self._validate_enrollment(student_id, course, current, occupancy),
+            )
+            # 강의 인원이 바뀌었으므로 캐시 갱신 (스냅샷 리스너가 있으면 리스너에 맡김)
+            if hasattr(self.course_repo, "invalidate_cache"):
+                self.course_repo.invalidate_cache(soft=True)
+            return enrollment
+
         # 1. 강의 존재 확인
         course = self.course_repo.get(course_id)
-        if not course:
-            raise EnrollmentError("Course not found")
 
         # 2. 해당 강의의 수강 신청 문서(하나)를 가져온다 (ID = course_id)
         enrollment = self.enroll_repo.get(course_id)
-        
+
+        # 3. 중복 신청 / 정원 확인
+        self._validate_enrollment(student_id, course, enrollment)
+
         if not enrollment:
             # 아직 신청자가 없으면 새로 생성
             enrollment = Enrollment(
@@ -38,23 +125,151 @@ class EnrollmentService:
                 timestamp=datetime.now()
             )
 
-        # 3. 중복 신청 확인
-        if student_id in enrollment.student_ids:
-            raise EnrollmentError("Already enrolled in this course")
-
-        # 4. 정원 확인 (현재 인원수 체크는 Course 모델의 current_count 사용)
-        if course.current_count >= course.max_students:
-            raise EnrollmentError("Course is full")
-
-        # 5. 학생 추가 및 저장
+        # 4. 학생 추가 및 저장
         enrollment.student_ids.append(student_id)
         # timestamp 업데이트 (선택 사항, 마지막 신청 시간 등)
         enrollment.timestamp = datetime.now()
         
         self.enroll_repo.save(enrollment)
 
-        # 6. 강의 인원 업데이트
-        course.current_count = len(enrollment.student_ids) # 정확성을 위해 리스트 길이로 갱신
+        # 5. 강의 인원 업데이트
+        course.current_count += 1 # 트랜잭션 경로(Increment)와 동일하게 1 증가
         self.course_repo.save(course)
 
         return enrollment
+
+    def enroll_student_many(self, student_id: str, course_ids: List[str], atomic: bool = False) -> List[Dict[str, Any]]:
+        """
+        여러 강의를 한 번에 신청하고 강의별 결과를 반환합니다.
+        atomic=True면 하나라도 실패할 경우 아무 강의도 신청되지 않습니다.
+        """
+        course_ids = self._batch_course_ids(course_ids)
+        print(f"Enroll Service: Enrolling student {student_id} to courses {course_ids} (atomic={atomic})")
+        if not course_ids:
+            return []
+        if self.admission is None:
+            return self._format_results(self._enroll_many(student_id, course_ids, atomic))
+
+        # 단건 신청과 같은 입장 제어를 강의별로 거침 (정원 백오프, 대기열, 동시 트랜잭션 한도)
+        with self.admission.admit_many(course_ids, student_id, self._remaining_seats) as batch:
+            admitted = batch.admitted(course_ids, atomic)
+            outcomes = batch.merge(course_ids, self._enroll_many(student_id, admitted, atomic) if admitted else [])
+        return self._format_results(outcomes)
+
+    @staticmethod
+    def _batch_course_ids(course_ids: List[str]) -> List[str]:
+        course_ids = list(dict.fromkeys(cid for cid in course_ids if cid))
+        if len(course_ids) > MAX_BATCH_COURSES:
+            raise EnrollmentError(f"Too many courses in one batch (max {MAX_BATCH_COURSES})")
+        return course_ids
+
+    def _enroll_many(self, student_id: str, course_ids: List[str], atomic: bool) -> List[Tuple[str, Optional[Enrollment], Optional[Exception]]]:
+        def validate(course, current, occupancy):
+            self._validate_enrollment(student_id, course, current, occupancy)
+
+        if isinstance(self.enroll_repo, TransactionalEnrollmentRepository):
+            try:
+                outcomes = self.enroll_repo.enroll_many_atomic(student_id, course_ids, validate, atomic=atomic)
+            except NotImplementedError as e:
+                raise EnrollmentError(str(e))
+            if hasattr(self.course_repo, "invalidate_cache"):
+                self.course_repo.invalidate_cache(soft=True)
+        elif atomic:
+            raise EnrollmentError("atomic batch enrollment is not supported by this repository")
+        else:
+            outcomes = []
+            for course_id in course_ids:
+                try:
+                    outcomes.append((course_id, self._enroll(student_id, course_id), None))
+                except EnrollmentError as e:
+                    outcomes.append((course_id, None, e))
+        return outcomes
+
+    @staticmethod
+    def _format_results(outcomes) -> List[Dict[str, Any]]:
+        results = []
+        for course_id, enrollment, error in outcomes:
+            if enrollment is not None or error is not None:
+                record_enrollment_outcome(error)
+            else:
+                ENROLLMENT_OUTCOMES.inc(outcome="rolled_back")
+            if enrollment is not None:
+                results.append({"course_id": course_id, "status": "success", "message": "Enrolled", "enrollment": enrollment})
+            elif isinstance(error, EnrollmentError):
+                results.append({"course_id": course_id, "status": "error", "message": str(error), "enrollment": None})
+            elif error is None:
+                # atomic 모드에서 다른 강의가 실패해 함께 롤백된 경우
+                results.append({"course_id": course_id, "status": "error", "message": "Not enrolled: batch rolled back", "enrollment": None})
+            else:
+                print(f"Enroll Service: batch item failed course={course_id}: {error}")
+                results.append({"course_id": course_id, "status": "error", "message": f"Server Error: {error}", "enrollment": None})
+        return results
+
+
+class AsyncEnrollmentService:
+    """
+    EnrollmentService의 비동기 버전 (AsyncClient 저장소용, 비동기 라우트에서 사용).
+    검증 규칙과 결과 형식은 EnrollmentService와 같고, 트랜잭션을 지원하는 저장소만 사용합니다.
+    """
+
+    def __init__(self, course_repo, enroll_repo, admission=None):
+        self.course_repo = course_repo
+        self.enroll_repo = enroll_repo
+        self.admission = admission
+
+    _remaining_seats = EnrollmentService._remaining_seats
+
+    async def get_student_enrollments(self, student_id: str) -> List[Enrollment]:
+        if hasattr(self.enroll_repo, 'get_by_student_id'):
+            return await self.enroll_repo.get_by_student_id(student_id)
+        return []
+
+    async def enroll_student(self, student_id: str, course_id: str) -> Enrollment:
+        print(f"Enroll Service: Enrolling student {student_id} to course {course_id}")
+
+        try:
+            if self.admission is not None:
+                async with self.admission.admit_async(course_id, student_id, lambda: self._remaining_seats(course_id)):
+                    enrollment = await self._enroll(student_id, course_id)
+            else:
+                enrollment = await self._enroll(student_id, course_id)
+        except Exception as e:
+            record_enrollment_outcome(e)
+            raise
+        record_enrollment_outcome(None)
+        return enrollment
+
+    async def _enroll(self, student_id: str, course_id: str) -> Enrollment:
+        enrollment = await self.enroll_repo.enroll_atomic(
+            student_id,
+            course_id,
+            lambda course, current, occupancy: EnrollmentService._validate_enrollment(student_id, course, current, occupancy),
+        )
+        if hasattr(self.course_repo, "invalidate_cache"):
+            self.course_repo.invalidate_cache(soft=True)
+        return enrollment
+
+    async def enroll_student_many(self, student_id: str, course_ids: List[str], atomic: bool = False) -> List[Dict[str, Any]]:
+        course_ids = EnrollmentService._batch_course_ids(course_ids)
+        print(f"Enroll Service: Enrolling student {student_id} to courses {course_ids} (atomic={atomic})")
+        if not course_ids:
+            return []
+        if self.admission is None:
+            return EnrollmentService._format_results(await self._enroll_many(student_id, course_ids, atomic))
+
+        async with self.admission.admit_many_async(course_ids, student_id, self._remaining_seats) as batch:
+            admitted = batch.admitted(course_ids, atomic)
+            outcomes = batch.merge(course_ids, await self._enroll_many(student_id, admitted, atomic) if admitted else [])
+        return EnrollmentService._format_results(outcomes)
+
+    async def _enroll_many(self, student_id: str, course_ids: List[str], atomic: bool) -> List[Tuple[str, Optional[Enrollment], Optional[Exception]]]:
+        def validate(course, current, occupancy):
+            EnrollmentService._validate_enrollment(student_id, course, current, occupancy)
+
+        try:
+            outcomes = await self.enroll_repo.enroll_many_atomic(student_id, course_ids, validate, atomic=atomic)
+        except NotImplementedError as e:
+            raise EnrollmentError(str(e))
+        if hasattr(self.course_repo, "invalidate_cache"):
+            self.course_repo.invalidate_cache(soft=True)
+        return outcomes
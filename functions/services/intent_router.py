@@ -0,0 +1,108 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from models.course import Course
+
+# 에이전트 루프 앞단에서 LLM 없이 처리할 단순 요청 판별 (강의 목록 / 내 수강 내역 / "<강의명> 신청해줘")
+AGENT_FAST_PATH_ENABLED = os.getenv("AGENT_FAST_PATH_ENABLED", "1") == "1"
+# 키워드와 강의명을 빼고 남은 글자 비율이 이보다 크면 LLM에 맡김 (조건/필터가 붙은 요청 등)
+AGENT_FAST_PATH_MIN_CONFIDENCE = float(os.getenv("AGENT_FAST_PATH_MIN_CONFIDENCE", "0.75"))
+
+ENROLL_KEYWORDS = ["수강신청", "신청해", "신청", "등록해", "등록"]
+MY_ENROLLMENT_KEYWORDS = ["내수강", "신청한", "등록한", "수강중", "수강내역", "신청내역", "내강의", "내시간표"]
+LIST_COURSE_KEYWORDS = ["강의목록", "강의리스트", "과목목록", "수강가능한", "신청가능한", "어떤강의", "무슨강의", "강의뭐"]
+# 취소/제외/조건이 들어간 요청은 단순 처리하면 안 되므로 LLM으로 보냄
+NEGATIVE_KEYWORDS = ["취소", "말고", "빼고", "제외", "하지마", "하지말", "철회", "추천", "겹치", "비교"]
+# 의미 없는 어미/호칭 (남은 글자 계산에서 제외)
+FILLER_WORDS = [
+    "보여주세요", "알려주세요", "해주세요", "보여줘", "알려줘", "해줘", "주세요", "부탁해", "있어", "뭐야",
+    "전체", "모든", "내가", "제가", "강의", "과목", "수업", "목록", "좀", "줘",
+]
+_PUNCTUATION = re.compile(r"[\s\?\!\.,~'\"]+")
+
+
+@dataclass
+class Intent:
+    name: str  # "list_courses" | "my_enrollments" | "enroll"
+    confidence: float
+    course: Optional[Course] = None
+
+
+def normalize(text: str) -> str:
+    return _PUNCTUATION.sub("", text or "").lower()
+
+
+def _strip(text: str, words: List[str]) -> str:
+    for word in words:
+        text = text.replace(word, "")
+    return text
+
+
+def _confidence(normalized: str, *matched: str) -> float:
+    residual = _strip(_strip(normalized, [m for m in matched if m]), FILLER_WORDS)
+    return 1.0 - len(residual) / max(len(normalized), 1)
+
+
+def _first_keyword(normalized: str, keywords: List[str]) -> Optional[str]:
+    return next((k for k in keywords if k in normalized), None)
+
+
+def _match_course(normalized: str, courses: List[Course]) -> Optional[Course]:
+    """메시지에 제목이 그대로 들어 있는 강의. 서로 겹치지 않는 강의가 둘 이상이면 모호하므로 None"""
+    matches = [c for c in courses if normalize(c.title) and normalize(c.title) in normalized]
+    if not matches:
+        return None
+    # "파이썬"과 "파이썬 심화"가 모두 맞으면 더 긴 제목을 선택
+    best = max(matches, key=lambda c: len(normalize(c.title)))
+    best_title = normalize(best.title)
+    if any(normalize(c.title) not in best_title for c in matches):
+        return None
+    return best
+
+
+def classify(message: str, load_courses: Callable[[], List[Course]]) -> Optional[Intent]:
+    """
+    확신이 있을 때만 Intent를 반환하고, 아니면 None (LLM 루프로 처리).
+    강의 목록은 수강 신청 의도가 있을 때만 load_courses()로 읽습니다.
+    """
+    normalized = normalize(message)
+    if not normalized or _first_keyword(normalized, NEGATIVE_KEYWORDS):
+        return None
+
+    # "신청한"에도 "신청"이 들어 있으므로 내 수강 내역을 먼저 확인
+    keyword = _first_keyword(normalized, MY_ENROLLMENT_KEYWORDS)
+    if keyword:
+        intent = Intent("my_enrollments", _confidence(normalized, keyword))
+    elif _first_keyword(normalized, LIST_COURSE_KEYWORDS):
+        keyword = _first_keyword(normalized, LIST_COURSE_KEYWORDS)
+        intent = Intent("list_courses", _confidence(normalized, keyword))
+    elif _first_keyword(normalized, ENROLL_KEYWORDS):
+        keyword = _first_keyword(normalized, ENROLL_KEYWORDS)
+        course = _match_course(normalized, load_courses())
+        if course is None:
+            return None
+        intent = Intent("enroll", _confidence(normalized, normalize(course.title), keyword), course)
+    else:
+        return None
+
+    return intent if intent.confidence >= AGENT_FAST_PATH_MIN_CONFIDENCE else None
+
+
+def course_query(message: str) -> str:
+    """수강 신청 문장에서 신청 키워드와 어미를 뺀 강의명 부분 (검색어로 사용)"""
+    return _strip(_strip(normalize(message), ENROLL_KEYWORDS), FILLER_WORDS)
+
+
+def cache_text(message: str) -> Optional[str]:
+    """
+    답변 캐시 키로 쓸 정규화된 메시지. 공백, 문장 부호, 대소문자만 무시합니다
+    ("수강 가능한 강의 알려줘" == "수강가능한 강의 알려줘!"). 단어를 빼면 다른 질문이
+    같은 키가 될 수 있으므로 FILLER_WORDS는 빼지 않습니다.
+    수강 신청 의도가 있는 메시지는 부수 효과가 있으므로 None (캐시하지 않음).
+    """
+    normalized = normalize(message)
+    if not normalized or _first_keyword(normalized, ENROLL_KEYWORDS):
+        return None
+    return normalized
@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from core.metrics import cache_families, registry
+
+AGENT_RESPONSE_CACHE_TTL_SEC = float(os.getenv("AGENT_RESPONSE_CACHE_TTL_SEC", "120"))
+AGENT_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("AGENT_RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+
+class ResponseCache:
+    """
+    에이전트 답변 캐시 (인스턴스 단위, TTL + LRU).
+    키에 학생 id, 카탈로그 내용 지문(좌석 수 제외)과 학생의 수강 강의 집합을 포함하므로,
+    강의나 수강 내역이 바뀌면 자연히 다른 키가 됩니다. 답변에 나온 잔여 좌석은 최대 TTL만큼 늦을 수 있습니다.
+    수강 신청처럼 부수 효과가 있는 요청은 호출 측에서 저장하지 않아야 합니다.
+    """
+
+    def __init__(self, ttl_sec: float = AGENT_RESPONSE_CACHE_TTL_SEC, max_entries: int = AGENT_RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, response: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_sec, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 인스턴스 전역 답변 캐시
+response_cache = ResponseCache()
+
+registry.register_collector("agent_response_cache", lambda: cache_families("agent_response", response_cache.hits, response_cache.misses))
@@ -0,0 +1,135 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from models.course import Course, ScheduleSlot
+
+# 주간 시간표를 분 단위 비트셋(7일 x 1440분)으로 표현: 비트 i = 월요일 00:00부터 i분째
+MINUTES_PER_DAY = 24 * 60
+DAYS_PER_WEEK = 7
+DAY_MAP = {"Mon": 0, "Tue": 1, "Wed": 2, "Thu": 3, "Fri": 4, "Sat": 5, "Sun": 6}
+MINUTES_PER_WEEK = DAYS_PER_WEEK * MINUTES_PER_DAY
+# Firestore에 저장하는 학생별 주간 점유 비트맵 크기 (10080비트 = 1260바이트)
+OCCUPANCY_BYTES = MINUTES_PER_WEEK // 8
+
+
+def parse_time(value: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    지원 형식:
+    1) "HH:MM" (예: "09:00") → (None, 분)
+    2) "Mon HH:MM" (예: "Mon 09:00") → (요일, 분)
+    해석할 수 없거나 시각이 범위(00:00~23:59)를 벗어나면 (None, None)
+    """
+    parts = value.strip().split()
+    if len(parts) == 1:
+        day, hhmm = None, parts[0]
+    elif len(parts) == 2:
+        day_key = parts[0].capitalize()
+        if day_key not in DAY_MAP:
+            return None, None
+        day, hhmm = DAY_MAP[day_key], parts[1]
+    else:
+        return None, None
+    try:
+        hh, mm = map(int, hhmm.split(":"))
+    except ValueError:
+        return None, None
+    if not (0 <= hh < 24 and 0 <= mm < 60):
+        return None, None
+    return day, hh * 60 + mm
+
+
+def parse_intervals(start_time: Optional[str], end_time: Optional[str]) -> List[Tuple[int, int]]:
+    """
+    강의 시간을 주간 분 단위 반열린 구간 [start, end) 목록으로 변환.
+    요일이 없는 강의는 매일 같은 시간에 열리는 것으로 간주합니다 (요일을 모르면 시간만으로 겹침 판단).
+    """
+    if not start_time or not end_time:
+        return []
+    start_day, start = parse_time(start_time)
+    end_day, end = parse_time(end_time)
+    if start is None or end is None or end <= start:
+        return []
+    day = start_day if start_day is not None else end_day
+    days = range(DAYS_PER_WEEK) if day is None else [day]
+    return [(d * MINUTES_PER_DAY + start, d * MINUTES_PER_DAY + end) for d in days]
+
+
+def normalize_schedule(course: Course) -> List[ScheduleSlot]:
+    """
+    강의 저장 시 Course.schedule에 기록할 정규화된 시간표.
+    시간이 주어졌는데 해석할 수 없으면(형식 오류, 범위 밖, 종료가 시작보다 이름) ValueError
+    """
+    intervals = parse_intervals(course.start_time, course.end_time)
+    if not intervals and (course.start_time or course.end_time):
+        raise ValueError(f"강의 시간을 해석할 수 없습니다: {course.start_time} ~ {course.end_time}")
+    return [ScheduleSlot(start=start, end=end) for start, end in intervals]
+
+
+def course_intervals(course: Course) -> List[Tuple[int, int]]:
+    # 정규화된 시간표가 있으면 그대로 쓰고, 이전 문서는 문자열을 해석
+    if course.schedule is not None:
+        return [(slot.start, slot.end) for slot in course.schedule]
+    return parse_intervals(course.start_time, course.end_time)
+
+
+def intervals_to_mask(intervals: Iterable[Tuple[int, int]]) -> int:
+    # 저장된 값이 잘못되어 있어도 비트맵이 OCCUPANCY_BYTES를 넘지 않도록 한 주 범위로 자름
+    mask = 0
+    for start, end in intervals:
+        start, end = max(start, 0), min(end, MINUTES_PER_WEEK)
+        if end > start:
+            mask |= ((1 << (end - start)) - 1) << start
+    return mask
+
+
+def course_mask(course: Course) -> int:
+    return intervals_to_mask(course_intervals(course))
+
+
+def mask_to_bytes(mask: int) -> bytes:
+    return mask.to_bytes(OCCUPANCY_BYTES, "little")
+
+
+def mask_from_bytes(data: Optional[bytes]) -> int:
+    return int.from_bytes(data, "little") if data else 0
+
+
+class ScheduleIndex:
+    """카탈로그 한 버전에 대한 강의별 주간 비트마스크"""
+
+    def __init__(self, courses: List[Course]):
+        self.masks: Dict[str, int] = {c.id: course_mask(c) for c in courses}
+
+    def occupancy(self, course_ids: Iterable[str]) -> int:
+        occupied = 0
+        for course_id in course_ids:
+            occupied |= self.masks.get(course_id, 0)
+        return occupied
+
+    def conflicts(self, course_id: str, occupied: int) -> bool:
+        return bool(self.masks.get(course_id, 0) & occupied)
+
+    def filter_available(self, courses: List[Course], enrolled_ids: Iterable[str]) -> List[Course]:
+        """수강 중인 강의와 시간이 겹치는 강의를 제외 (강의당 비트 AND 한 번)"""
+        enrolled = set(enrolled_ids)
+        occupied = self.occupancy(enrolled)
+        masks = self.masks
+        return [c for c in courses if c.id not in enrolled and not (masks.get(c.id, 0) & occupied)]
+
+
+_index_lock = threading.Lock()
+_index_version: Optional[int] = None
+_index: Optional[ScheduleIndex] = None
+
+
+def get_schedule_index(courses: List[Course], version: Optional[int]) -> ScheduleIndex:
+    """카탈로그 버전별로 한 번만 컴파일 (버전을 모르면 매번 새로 계산)"""
+    global _index_version, _index
+    if version is None:
+        return ScheduleIndex(courses)
+    with _index_lock:
+        if _index is not None and _index_version == version:
+            return _index
+    index = ScheduleIndex(courses)
+    with _index_lock:
+        _index_version, _index = version, index
+    return index
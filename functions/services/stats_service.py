@@ -0,0 +1,53 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from services.course_service import CourseService
+from services.user_service import UserService
+
+# 학생 수는 집계 쿼리 결과를 잠시 재사용 (관리자 대시보드 폴링 대비)
+STUDENT_COUNT_TTL_SEC = float(os.getenv("STUDENT_COUNT_TTL_SEC", "30"))
+
+_student_count: Optional[int] = None
+_student_count_at = 0.0
+_student_count_lock = threading.Lock()
+
+
+class StatsService:
+    def __init__(self, course_service: CourseService, user_service: UserService):
+        self.course_service = course_service
+        self.user_service = user_service
+
+    def _count_students(self) -> int:
+        global _student_count, _student_count_at
+        with _student_count_lock:
+            if _student_count is not None and time.monotonic() - _student_count_at < STUDENT_COUNT_TTL_SEC:
+                return _student_count
+        count = self.user_service.count_students()
+        with _student_count_lock:
+            _student_count, _student_count_at = count, time.monotonic()
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        # 강의 목록은 카탈로그 캐시에서 읽으므로 평소에는 RPC 없음; 사용자는 count() 집계만 사용
+        courses = self.course_service.get_all_courses()
+        total_enrollments = sum(c.current_count for c in courses)
+        total_capacity = sum(c.max_students for c in courses)
+
+        return {
+            "total_courses": len(courses),
+            "total_students": self._count_students(),
+            "total_enrollments": total_enrollments,
+            "total_capacity": total_capacity,
+            "fill_ratio": round(total_enrollments / total_capacity, 4) if total_capacity else 0.0,
+            "courses": [
+                {
+                    "id": c.id,
+                    "title": c.title,
+                    "current_count": c.current_count,
+                    "max_students": c.max_students,
+                    "fill_ratio": round(c.current_count / c.max_students, 4) if c.max_students else 0.0,
+                }
+                for c in courses
+            ],
+        }
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from models.course import Course
+
+# 에이전트 도구 결과(list_courses 등) 한 번에 넣을 최대 토큰 수 (추정치)
+AGENT_TOOL_TOKEN_BUDGET = int(os.getenv("AGENT_TOOL_TOKEN_BUDGET", "1500"))
+# 시스템 프롬프트에 넣는 강의 요약의 최대 토큰 수 (넘으면 요약 없이 list_courses 사용)
+AGENT_DIGEST_TOKEN_BUDGET = int(os.getenv("AGENT_DIGEST_TOKEN_BUDGET", "800"))
+DESCRIPTION_MAX_CHARS = 40
+# 한글이 섞인 JSON 기준 보수적인 추정 (토크나이저 없이 길이로 계산)
+CHARS_PER_TOKEN = 2
+
+# 도구 설명에 넣는 키 안내 (모델이 짧은 키를 해석할 수 있도록)
+COURSE_KEY_LEGEND = "id=강의 ID, t=강의명, i=강사, tm=시간, s=신청인원/정원, d=설명 일부"
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _format_time(course: Course) -> Optional[str]:
+    if not course.start_time or not course.end_time:
+        return None
+    start, end = course.start_time.split(), course.end_time.split()
+    # "Mon 09:00" ~ "Mon 10:00" → "Mon 09:00-10:00"
+    if len(start) == 2 and len(end) == 2 and start[0] == end[0]:
+        return f"{start[0]} {start[1]}-{end[1]}"
+    return f"{course.start_time}-{course.end_time}"
+
+
+def encode_course(course: Course) -> Dict[str, str]:
+    item = {"id": course.id, "t": course.title, "i": course.instructor}
+    time_range = _format_time(course)
+    if time_range:
+        item["tm"] = time_range
+    item["s"] = f"{course.current_count}/{course.max_students}"
+    if course.description:
+        description = course.description.strip()
+        item["d"] = description if len(description) <= DESCRIPTION_MAX_CHARS else description[:DESCRIPTION_MAX_CHARS] + "…"
+    return item
+
+
+class CourseEncodingCache:
+    """강의별 직렬화 결과(JSON 조각)를 카탈로그 버전 단위로 재사용"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._encoded: Dict[str, str] = {}
+
+    def get(self, course: Course, version: Optional[int]) -> str:
+        if version is None:
+            return json.dumps(encode_course(course), ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if version != self._version:
+                self._version, self._encoded = version, {}
+            encoded = self._encoded.get(course.id)
+        if encoded is None:
+            encoded = json.dumps(encode_course(course), ensure_ascii=False, separators=(",", ":"))
+            with self._lock:
+                if version == self._version:
+                    self._encoded[course.id] = encoded
+        return encoded
+
+
+_encoding_cache = CourseEncodingCache()
+
+
+def encode_course_list(courses: List[Course], version: Optional[int], offset: int = 0, budget: int = AGENT_TOOL_TOKEN_BUDGET) -> str:
+    """
+    토큰 예산 안에 들어가는 만큼만 강의를 담고, 남은 강의가 있으면 next_offset을 알려줍니다.
+    예산이 작아도 최소 한 건은 포함합니다.
+    {"courses":[...],"total":N,"next_offset":k|null}
+    """
+    offset = max(offset, 0)
+    parts: List[str] = []
+    used = estimate_tokens('{"courses":[],"total":0,"next_offset":0}')
+    index = offset
+    while index < len(courses):
+        encoded = _encoding_cache.get(courses[index], version)
+        cost = estimate_tokens(encoded) + 1
+        if parts and used + cost > budget:
+            break
+        parts.append(encoded)
+        used += cost
+        index += 1
+    next_offset = index if index < len(courses) else None
+    return f'{{"courses":[{",".join(parts)}],"total":{len(courses)},"next_offset":{json.dumps(next_offset)}}}'
+
+
+def _digest_line(course: Course) -> str:
+    remaining = max(course.max_students - course.current_count, 0)
+    return f"{course.id} | {course.title} | {_format_time(course) or '-'} | 잔여 {remaining}"
+
+
+_digest_lock = threading.Lock()
+_digest_key: Optional[Tuple[int, int]] = None
+_digest: Optional[str] = None
+
+
+def catalog_digest(courses: List[Course], version: Optional[int], budget: Optional[int] = None) -> Optional[str]:
+    """
+    "ID | 강의명 | 시간 | 잔여 좌석" 한 줄씩의 강의 요약. 예산을 넘는 큰 카탈로그면 None.
+    (카탈로그 버전, 예산)별로 한 번만 만듭니다.
+    """
+    global _digest_key, _digest
+    budget = AGENT_DIGEST_TOKEN_BUDGET if budget is None else budget
+    key = (version, budget) if version is not None else None
+    with _digest_lock:
+        if key is not None and key == _digest_key:
+            return _digest
+    digest = "\n".join(_digest_line(c) for c in courses) if courses else None
+    if digest is not None and estimate_tokens(digest) > budget:
+        digest = None
+    if key is not None:
+        with _digest_lock:
+            _digest_key, _digest = key, digest
+    return digest
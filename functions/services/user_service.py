@@ -1,4 +1,5 @@
 from typing import List, Optional
+from models.page import Page
 from models.user import User
 from repositories.base import BaseRepository
 
@@ -9,6 +10,15 @@ class UserService:
     def get_all_users(self) -> List[User]:
         return self.repo.list()
 
+    def get_users_page(self, limit: int, start_after: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        return self.repo.list_page(limit, start_after=start_after, fields=fields)
+
+    def count_students(self) -> int:
+        # Repository capability check (집계 쿼리를 지원하면 문서를 읽지 않음)
+        if hasattr(self.repo, "count_students"):
+            return self.repo.count_students()
+        return len([u for u in self.repo.list() if u.role == "student"])
+
     def get_user(self, uid: str) -> Optional[User]:
         return self.repo.get(uid)
 
@@ -18,3 +28,31 @@ class UserService:
             user.role = role
             return self.repo.save(user)
         return None
+
+
+class AsyncUserService:
+    """UserService의 비동기 버전 (AsyncClient 저장소용)"""
+
+    def __init__(self, repo):
+        self.repo = repo
+
+    async def get_all_users(self) -> List[User]:
+        return await self.repo.list()
+
+    async def get_users_page(self, limit: int, start_after: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        return await self.repo.list_page(limit, start_after=start_after, fields=fields)
+
+    async def count_students(self) -> int:
+        if hasattr(self.repo, "count_students"):
+            return await self.repo.count_students()
+        return len([u for u in await self.repo.list() if u.role == "student"])
+
+    async def get_user(self, uid: str) -> Optional[User]:
+        return await self.repo.get(uid)
+
+    async def update_user_role(self, uid: str, role: str) -> Optional[User]:
+        user = await self.repo.get(uid)
+        if user:
+            user.role = role
+            return await self.repo.save(user)
+        return None
@@ -0,0 +1,207 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from models.course import Course
+from services.admission_service import AdmissionController
+from services.enrollment_service import EnrollmentService, EnrollmentError
+
+@pytest.fixture
+def controller():
+    return AdmissionController(max_in_flight=1, hold_ttl_sec=5, queue_timeout_sec=2, full_backoff_sec=60)
+
+def test_acquire_and_release(controller):
+    hold = controller.acquire("c1", "s1")
+
+    assert hold.course_id == "c1"
+    controller.release(hold)
+    assert controller.acquire("c1", "s2").student_id == "s2"
+
+def test_stale_cached_seats_do_not_reject(controller):
+    # 캐시가 0석이어도 거절하지 않고 한 건은 트랜잭션까지 보냄 (정원은 트랜잭션이 판단)
+    controller.max_in_flight = 3
+    controller.acquire("c1", "s1", remaining_seats=lambda: 0)
+    controller.queue_timeout_sec = 0.05
+
+    with pytest.raises(EnrollmentError, match="busy"):
+        controller.acquire("c1", "s2", remaining_seats=lambda: 0)
+    assert controller.stats["rejected_full"] == 0
+
+def test_queue_timeout(controller):
+    controller.queue_timeout_sec = 0.05
+    controller.acquire("c1", "s1")
+
+    with pytest.raises(EnrollmentError, match="busy"):
+        controller.acquire("c1", "s2")
+
+def test_expired_hold_is_reclaimed(controller):
+    controller.hold_ttl_sec = 0.01
+    controller.acquire("c1", "s1")
+    time.sleep(0.02)
+
+    assert controller.acquire("c1", "s2").student_id == "s2"
+    assert controller.stats["expired"] == 1
+
+def test_waiters_are_served_in_fifo_order(controller):
+    first = controller.acquire("c1", "s0")
+    order = []
+
+    def worker(student_id):
+        hold = controller.acquire("c1", student_id)
+        order.append(student_id)
+        controller.release(hold)
+
+    threads = []
+    for student_id in ["s1", "s2", "s3"]:
+        thread = threading.Thread(target=worker, args=(student_id,))
+        thread.start()
+        threads.append(thread)
+        while len(controller._gates["c1"].waiters) < len(threads):
+            time.sleep(0.001)
+
+    controller.release(first)
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert order == ["s1", "s2", "s3"]
+
+def test_full_outcome_fails_fast(controller):
+    with pytest.raises(EnrollmentError):
+        with controller.admit("c1", "s1"):
+            raise EnrollmentError("Course is full")
+
+    with pytest.raises(EnrollmentError, match="Course is full"):
+        controller.acquire("c1", "s2")
+
+def test_enrollment_service_lets_transaction_decide_capacity(controller):
+    course_repo = MagicMock()
+    # 캐시에는 만석이지만 실제로는 자리가 남아 있음
+    course_repo.peek.return_value = Course(id="c1", title="C1", instructor="T", max_students=10, current_count=10)
+    course_repo.get.return_value = Course(id="c1", title="C1", instructor="T", max_students=10, current_count=9)
+    enroll_repo = MagicMock()
+    enroll_repo.get.return_value = None
+    service = EnrollmentService(course_repo=course_repo, enroll_repo=enroll_repo, admission=controller)
+
+    assert service.enroll_student("s1", "c1").student_ids == ["s1"]
+
+def test_release_wakes_only_waiters_of_that_course(controller):
+    first = controller.acquire("c1", "s0")
+    other = controller.acquire("c2", "t0")
+    holds = []
+    threads = [threading.Thread(target=lambda sid=sid: holds.append(controller.acquire("c1", sid))) for sid in ["s1", "s2"]]
+    for count, thread in enumerate(threads, start=1):
+        thread.start()
+        while len(controller._gates["c1"].waiters) < count:
+            time.sleep(0.001)
+    waiters = list(controller._gates["c1"].waiters)
+
+    controller.release(other)  # 다른 강의의 반납은 c1 대기자를 깨우지 않음
+    assert not any(w.event.is_set() for w in waiters)
+
+    controller.release(first)
+    threads[0].join(timeout=2)
+    assert [h.student_id for h in holds] == ["s1"]
+    controller.release(holds[0])
+    threads[1].join(timeout=2)
+    assert [h.student_id for h in holds] == ["s1", "s2"]
+
+def test_async_acquire_waits_on_the_event_loop(controller):
+    import asyncio
+
+    async def scenario():
+        first = controller.acquire("c1", "s0")
+        waiting = asyncio.ensure_future(controller.acquire_async("c1", "s1"))
+        cancelled = asyncio.ensure_future(controller.acquire_async("c1", "s2"))
+        while len(controller._gates["c1"].waiters) < 2:
+            await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.wait([cancelled])
+        assert len(controller._gates["c1"].waiters) == 1
+        controller.release(first)
+        return (await waiting).student_id
+
+    assert asyncio.run(scenario()) == "s1"
+
+def test_waiter_is_removed_when_acquire_raises(controller):
+    first = controller.acquire("c1", "s0")
+    calls = []
+    errors = []
+
+    def remaining_seats():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("cache unavailable")
+        return None
+
+    def acquire():
+        try:
+            controller.acquire("c1", "s1", remaining_seats=remaining_seats)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    while len(controller._gates["c1"].waiters) < 1:
+        time.sleep(0.001)
+    controller.release(first)
+    thread.join(timeout=2)
+
+    assert len(errors) == 1
+    # 예외로 빠져나간 대기자가 큐 맨 앞을 막지 않으므로 다음 요청은 바로 입장
+    controller.queue_timeout_sec = 0.2
+    started = time.monotonic()
+    assert controller.acquire("c1", "s2").student_id == "s2"
+    assert time.monotonic() - started < 0.1
+
+def _batch_service(controller, outcomes):
+    from repositories.base import TransactionalEnrollmentRepository
+    enroll_repo = MagicMock(spec=TransactionalEnrollmentRepository)
+    enroll_repo.enroll_many_atomic.side_effect = lambda student_id, course_ids, validate, atomic: [
+        outcomes[cid] for cid in course_ids
+    ]
+    return EnrollmentService(course_repo=MagicMock(spec=[]), enroll_repo=enroll_repo, admission=controller), enroll_repo
+
+def test_batch_enrollment_goes_through_admission(controller):
+    from models.enrollment import Enrollment
+    with pytest.raises(EnrollmentError):
+        with controller.admit("c2", "s0"):
+            raise EnrollmentError("Course is full")
+    service, enroll_repo = _batch_service(controller, {
+        "c1": ("c1", Enrollment(id="c1", course_id="c1", student_ids=["s1"]), None),
+        "c3": ("c3", None, EnrollmentError("Course is full")),
+    })
+
+    results = service.enroll_student_many("s1", ["c3", "c2", "c1"])
+
+    # 백오프 중인 c2는 트랜잭션에 보내지 않고, 나머지는 결과대로 반납
+    assert enroll_repo.enroll_many_atomic.call_args[0][1] == ["c3", "c1"]
+    assert [(r["course_id"], r["status"], r["message"]) for r in results] == [
+        ("c3", "error", "Course is full"),
+        ("c2", "error", "Course is full"),
+        ("c1", "success", "Enrolled"),
+    ]
+    assert all(not gate.holds for gate in controller._gates.values())
+    assert controller._gates["c3"].full_until > time.monotonic()
+    assert controller.stats["rejected_full"] == 1
+
+def test_atomic_batch_refused_by_admission_sends_nothing(controller):
+    with pytest.raises(EnrollmentError):
+        with controller.admit("c2", "s0"):
+            raise EnrollmentError("Course is full")
+    service, enroll_repo = _batch_service(controller, {})
+
+    results = service.enroll_student_many("s1", ["c1", "c2"], atomic=True)
+
+    enroll_repo.enroll_many_atomic.assert_not_called()
+    assert [(r["course_id"], r["message"]) for r in results] == [
+        ("c1", "Not enrolled: batch rolled back"),
+        ("c2", "Course is full"),
+    ]
+    assert all(not gate.holds for gate in controller._gates.values())
+
+def test_batch_rejects_too_many_courses(controller):
+    service, enroll_repo = _batch_service(controller, {})
+
+    with pytest.raises(EnrollmentError, match="Too many courses"):
+        service.enroll_student_many("s1", [f"c{i}" for i in range(11)])
+    enroll_repo.enroll_many_atomic.assert_not_called()
@@ -0,0 +1,253 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from models.course import Course
+from repositories import course_cache
+from services import agent_service, tool_encoding
+from services.agent_service import AgentService, AgentStats
+from services.response_cache import ResponseCache
+
+def chunk(content=None, tool_calls=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+def tool_call_chunk(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+@pytest.fixture(autouse=True)
+def reset_module_state(monkeypatch):
+    monkeypatch.setattr(tool_encoding, "_digest_key", None)
+    monkeypatch.setattr(course_cache, "_fingerprint_version", None)
+    monkeypatch.setattr(agent_service, "agent_stats", AgentStats())
+    monkeypatch.setattr(agent_service, "response_cache", ResponseCache())
+
+@pytest.fixture
+def course_service():
+    service = MagicMock()
+    courses = [Course(id="c1", title="Python", instructor="T", max_students=10)]
+    service.get_all_courses.return_value = courses
+    service.get_all_courses_versioned.return_value = (1, courses)
+    return service
+
+@pytest.fixture
+def enrollment_service():
+    service = MagicMock()
+    service.get_student_enrollments.return_value = []
+    return service
+
+@pytest.fixture
+def agent(monkeypatch, course_service, enrollment_service):
+    monkeypatch.setattr(agent_service, "get_openai_client", lambda: (None, "OPENAI_API_KEY Missing"))
+    agent = AgentService(course_service, enrollment_service)
+    agent.client = MagicMock()
+    return agent
+
+def test_chat_stream_emits_tool_progress_and_deltas(agent):
+    agent.client.chat.completions.create.side_effect = [
+        iter([
+            chunk(tool_calls=[tool_call_chunk(0, id="call_1", name="list_", arguments="")]),
+            chunk(tool_calls=[tool_call_chunk(0, name="courses", arguments="{}")]),
+        ]),
+        iter([chunk("Python "), chunk("강의가 있습니다.")]),
+    ]
+
+    events = list(agent.chat_stream("s1", "월요일 오전에 들을 만한 강의 있어?"))
+
+    assert [e["type"] for e in events] == ["tool_start", "tool_end", "delta", "delta", "done"]
+    assert events[0]["name"] == "list_courses"
+    assert events[-1]["response"] == "Python 강의가 있습니다."
+    second_call_messages = agent.client.chat.completions.create.call_args_list[1][1]["messages"]
+    assert second_call_messages[2]["tool_calls"][0]["id"] == "call_1"
+    assert second_call_messages[3]["role"] == "tool" and "Python" in second_call_messages[3]["content"]
+
+def test_chat_returns_final_response(agent):
+    agent.client.chat.completions.create.return_value = iter([chunk("안녕하세요")])
+
+    assert agent.chat("s1", "안녕") == "안녕하세요"
+
+def test_chat_stream_without_client_reports_config_error(agent):
+    agent.client = None
+
+    events = list(agent.chat_stream("s1", "안녕"))
+
+    assert len(events) == 1 and events[0]["type"] == "done"
+    assert "OPENAI_API_KEY" in events[0]["response"]
+
+def test_fast_path_enrolls_without_llm(agent, enrollment_service):
+    enrollment_service.enroll_student.return_value = MagicMock(id="c1")
+
+    response = agent.chat("s1", "Python 수강신청 해줘")
+
+    assert response == "'Python' 수강 신청이 완료되었습니다."
+    enrollment_service.enroll_student.assert_called_once_with("s1", "c1")
+    agent.client.chat.completions.create.assert_not_called()
+
+def test_fast_path_lists_my_enrollments(agent, course_service, enrollment_service):
+    enrollment_service.get_student_enrollments.return_value = [MagicMock(course_id="c1")]
+    course_service.get_courses.return_value = [Course(id="c1", title="Python", instructor="T", max_students=10)]
+
+    response = agent.chat("s1", "내가 신청한 강의 알려줘")
+
+    assert "Python" in response
+    course_service.get_courses.assert_called_once_with(["c1"])
+    agent.client.chat.completions.create.assert_not_called()
+
+def test_fallback_resolves_course_through_search(agent, course_service, enrollment_service):
+    python = Course(id="c1", title="Python", instructor="T", max_students=10)
+    course_service.search_courses.return_value = [(python, 1.5)]
+    enrollment_service.enroll_student.return_value = MagicMock(id="c1")
+
+    response = agent._fallback_enroll_if_needed("s1", "파이선 강의 좀 신청해줘")
+
+    assert response == "'Python' 수강 신청이 완료되었습니다."
+    course_service.search_courses.assert_called_once_with("파이선", limit=5)
+
+def test_fallback_lists_candidates_when_ambiguous(agent, course_service, enrollment_service):
+    course_service.search_courses.return_value = [
+        (Course(id="c1", title="파이썬 기초", instructor="T", max_students=10), 0.8),
+        (Course(id="c2", title="파이썬 심화", instructor="T", max_students=10), 0.75),
+    ]
+
+    response = agent._fallback_enroll_if_needed("s1", "파이썬 신청해줘")
+
+    assert "파이썬 기초, 파이썬 심화" in response
+    enrollment_service.enroll_student.assert_not_called()
+
+def test_list_courses_tool_prefilters_by_query(agent, course_service):
+    python = Course(id="c1", title="Python", instructor="T", max_students=10)
+    react = Course(id="c2", title="React", instructor="T", max_students=10)
+    course_service.get_all_courses_versioned.return_value = (3, [python, react])
+    course_service.search_courses.return_value = [(react, 1.2)]
+
+    output = json.loads(agent._execute_tool_call("s1", "list_courses", '{"query": "리액트"}'))
+
+    assert [c["id"] for c in output["courses"]] == ["c2"]
+    assert output["total"] == 1
+
+def test_small_catalog_digest_goes_into_system_prompt(agent):
+    agent.client.chat.completions.create.return_value = iter([chunk("네")])
+
+    agent.chat("s1", "월요일 오전에 들을 만한 강의 있어?")
+
+    system_prompt = agent.client.chat.completions.create.call_args[1]["messages"][0]["content"]
+    assert "c1 | Python | - | 잔여 10" in system_prompt
+    stats = agent_service.agent_stats.snapshot()
+    assert stats["llm_digest"]["requests"] == 1 and stats["llm_digest"]["avg_completions"] == 1
+
+def test_large_catalog_skips_digest(agent, course_service, monkeypatch):
+    monkeypatch.setattr(tool_encoding, "AGENT_DIGEST_TOKEN_BUDGET", 1)
+    agent.client.chat.completions.create.return_value = iter([chunk("네")])
+
+    agent.chat("s1", "월요일 오전에 들을 만한 강의 있어?")
+
+    system_prompt = agent.client.chat.completions.create.call_args[1]["messages"][0]["content"]
+    assert "강의 목록 요약" not in system_prompt
+    assert "llm" in agent_service.agent_stats.snapshot()
+
+def test_fast_path_is_recorded_without_completions(agent):
+    agent.chat("s1", "강의 목록 보여줘")
+
+    stats = agent_service.agent_stats.snapshot()["fast_path"]
+    assert stats["requests"] == 1 and stats["completions"] == 0
+
+def test_read_only_tool_calls_run_concurrently(agent, course_service, enrollment_service):
+    import threading
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_then_return_nothing(*args):
+        barrier.wait()
+        return []
+
+    course_service.get_courses.side_effect = wait_then_return_nothing
+    agent._filter_available_courses = wait_then_return_nothing
+    tool_calls = [
+        {"id": "a", "type": "function", "function": {"name": "list_courses", "arguments": "{}"}},
+        {"id": "b", "type": "function", "function": {"name": "get_my_enrollments", "arguments": "{}"}},
+    ]
+    context = agent_service.ChatContext(course_service, enrollment_service, "s1")
+
+    gen = agent._run_tool_calls("s1", tool_calls, context)
+    events = []
+    try:
+        while True:
+            events.append(next(gen))
+    except StopIteration as stop:
+        outputs = stop.value
+
+    # 두 도구가 서로를 기다리는 barrier를 통과했다면 동시에 실행된 것
+    assert [e["type"] for e in events] == ["tool_start", "tool_start", "tool_end", "tool_end"]
+    assert all('"courses"' in output for output in outputs)
+
+def test_chat_prefetches_catalog_and_enrollments_once(agent, course_service, enrollment_service):
+    agent.chat("s1", "강의 목록 보여줘")
+
+    course_service.get_all_courses_versioned.assert_called_once()
+    enrollment_service.get_student_enrollments.assert_called_once_with("s1")
+
+
+def test_repeated_question_is_served_from_response_cache(agent):
+    agent.client.chat.completions.create.return_value = iter([chunk(content="월요일 강의는 Python입니다.")])
+
+    first = agent.chat("user1", "월요일 오전에 들을 만한 강의 있어?")
+    second = agent.chat("user1", "월요일 오전에 들을만한 강의 있어!")
+
+    assert first == second == "월요일 강의는 Python입니다."
+    assert agent.client.chat.completions.create.call_count == 1
+    assert agent_service.agent_stats.snapshot()["cache"]["requests"] == 1
+
+
+def test_response_cache_is_per_student_and_ignores_seat_changes(agent, course_service):
+    agent.client.chat.completions.create.side_effect = lambda **_: iter([chunk(content="월요일 강의는 Python입니다.")])
+    question = "월요일 오전에 들을 만한 강의 있어?"
+
+    agent.chat("user1", question)
+    agent.chat("user2", question)
+    assert agent.client.chat.completions.create.call_count == 2
+
+    # 좌석 수만 바뀐 스냅샷(버전 증가)은 같은 키, 강의 내용이 바뀌면 다른 키
+    course_service.get_all_courses_versioned.return_value = (2, [Course(id="c1", title="Python", instructor="T", max_students=10, current_count=9)])
+    agent.chat("user1", question)
+    assert agent.client.chat.completions.create.call_count == 2
+
+    course_service.get_all_courses_versioned.return_value = (3, [Course(id="c1", title="Python 심화", instructor="T", max_students=10)])
+    agent.chat("user1", question)
+    assert agent.client.chat.completions.create.call_count == 3
+
+
+def test_enrollment_messages_are_never_cached(agent, enrollment_service):
+    agent.client.chat.completions.create.side_effect = lambda **_: iter([chunk(content="어떤 강의를 신청할까요?")])
+
+    agent.chat("user1", "월요일 강의 좀 신청해줄래?")
+    agent.chat("user1", "월요일 강의 좀 신청해줄래?")
+
+    assert agent.client.chat.completions.create.call_count == 2
+    assert len(agent_service.response_cache) == 0
+
+
+def test_stream_completion_records_openai_span_and_token_usage(agent):
+    from core import request_timing
+    from core.request_timing import RequestTiming
+
+    usage_chunk = SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=120, completion_tokens=8))
+    agent.client.chat.completions.create.return_value = iter([chunk(content="답변"), usage_chunk])
+    timing = RequestTiming("POST", "/api/agent/chat")
+    token = request_timing._current.set(timing)
+    try:
+        agent.chat("user1", "월요일 오전에 들을 만한 강의 있어?")
+    finally:
+        request_timing._current.reset(token)
+
+    assert timing.spans["openai"]["count"] == 1
+    assert timing.tokens == {"prompt": 120, "completion": 8}
+    assert timing.annotations["agent_path"] == "llm_digest"
+    assert agent.client.chat.completions.create.call_args.kwargs["stream_options"] == {"include_usage": True}
+
+
+def test_fast_path_failure_ends_with_error_answer(agent, enrollment_service):
+    enrollment_service.get_student_enrollments.side_effect = RuntimeError("firestore unavailable")
+
+    events = list(agent.chat_stream("s1", "내 수강 내역 보여줘"))
+
+    assert [e["type"] for e in events] == ["done"]
+    assert "firestore unavailable" in events[0]["response"]
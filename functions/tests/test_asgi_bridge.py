@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from firebase_functions import https_fn
+from werkzeug.test import EnvironBuilder
+from core.asgi_bridge import AsgiBridge
+
+app = FastAPI()
+loops = []
+
+@app.post("/echo")
+async def echo(payload: dict):
+    loops.append(asyncio.get_running_loop())
+    return {"received": payload}
+
+@app.get("/stream")
+def stream():
+    def chunks():
+        for i in range(3):
+            yield f"data: {i}\n\n"
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+@app.get("/boom")
+async def boom():
+    raise RuntimeError("boom")
+
+@pytest.fixture
+def bridge():
+    bridge = AsgiBridge(app)
+    yield bridge
+    bridge.close()
+
+def make_request(path, method="GET", **kwargs):
+    return EnvironBuilder(path=path, method=method, **kwargs).get_request(https_fn.Request)
+
+def test_json_round_trip(bridge):
+    response = bridge(make_request("/echo?x=1", method="POST", json={"a": 1}))
+
+    assert response.status_code == 200
+    assert response.get_json() == {"received": {"a": 1}}
+    assert response.headers["content-type"] == "application/json"
+
+def test_event_loop_is_reused(bridge):
+    loops.clear()
+    bridge(make_request("/echo", method="POST", json={}))
+    bridge(make_request("/echo", method="POST", json={}))
+
+    assert len(loops) == 2
+    assert loops[0] is loops[1]
+
+def test_streaming_response(bridge):
+    response = bridge(make_request("/stream"))
+
+    assert response.is_streamed
+    chunks = list(response.response)
+    assert b"".join(chunks) == b"data: 0\n\ndata: 1\n\ndata: 2\n\n"
+
+def test_unhandled_error_returns_500(bridge):
+    response = bridge(make_request("/boom"))
+
+    assert response.status_code == 500
+
+def test_lifespan_runs_on_loop_start_and_close():
+    from contextlib import asynccontextmanager
+
+    events = []
+
+    @asynccontextmanager
+    async def lifespan(app):
+        events.append("startup")
+        yield
+        events.append("shutdown")
+
+    lifespan_app = FastAPI(lifespan=lifespan)
+
+    @lifespan_app.get("/ping")
+    async def ping():
+        return {"events": list(events)}
+
+    bridge = AsgiBridge(lifespan_app)
+    response = bridge(make_request("/ping"))
+    bridge.close()
+
+    assert response.get_json() == {"events": ["startup"]}
+    assert events == ["startup", "shutdown"]
+
+def test_lifespan_startup_failure_is_not_served():
+    from contextlib import asynccontextmanager
+
+    @asynccontextmanager
+    async def lifespan(app):
+        raise RuntimeError("container init failed")
+        yield
+
+    failing_app = FastAPI(lifespan=lifespan)
+
+    @failing_app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    bridge = AsgiBridge(failing_app)
+    with pytest.raises(RuntimeError, match="lifespan startup failed"):
+        bridge(make_request("/ping"))
+    bridge.close()
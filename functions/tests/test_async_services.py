@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from models.course import Course
+from models.enrollment import Enrollment
+from repositories.async_firestore_repo import AsyncFirestoreCourseRepository
+from repositories.course_cache import CourseCatalogCache
+from services.admission_service import AdmissionController
+from services.course_service import AsyncCourseService
+from services.enrollment_service import AsyncEnrollmentService, EnrollmentError
+
+
+def make_course(course_id="c1", current=0, max_students=10):
+    return Course(id=course_id, title=course_id, instructor="T", max_students=max_students, current_count=current)
+
+
+@pytest.fixture
+def enroll_repo():
+    return AsyncMock()
+
+
+@pytest.fixture
+def course_repo():
+    repo = MagicMock()
+    repo.peek.return_value = None
+    return repo
+
+
+def test_enroll_student_validates_inside_async_transaction(course_repo, enroll_repo):
+    async def enroll_atomic(student_id, course_id, validate):
+        validate(make_course(), None, 0)
+        return Enrollment(id=course_id, course_id=course_id, student_ids=[student_id])
+
+    enroll_repo.enroll_atomic.side_effect = enroll_atomic
+    service = AsyncEnrollmentService(course_repo, enroll_repo)
+
+    result = asyncio.run(service.enroll_student("s1", "c1"))
+
+    assert result.student_ids == ["s1"]
+    course_repo.invalidate_cache.assert_called_once_with(soft=True)
+
+
+def test_enroll_student_full_course_marks_admission_gate(course_repo, enroll_repo):
+    async def enroll_atomic(student_id, course_id, validate):
+        validate(make_course(current=10), None, 0)
+
+    enroll_repo.enroll_atomic.side_effect = enroll_atomic
+    admission = AdmissionController(full_backoff_sec=60)
+    service = AsyncEnrollmentService(course_repo, enroll_repo, admission=admission)
+
+    with pytest.raises(EnrollmentError, match="Course is full"):
+        asyncio.run(service.enroll_student("s1", "c1"))
+    # 게이트가 닫혔으므로 두 번째 요청은 트랜잭션 없이 거절
+    with pytest.raises(EnrollmentError, match="Course is full"):
+        asyncio.run(service.enroll_student("s2", "c1"))
+    assert enroll_repo.enroll_atomic.await_count == 1
+
+
+def test_enroll_many_formats_results_like_sync_service(course_repo, enroll_repo):
+    enroll_repo.enroll_many_atomic.return_value = [
+        ("c1", Enrollment(id="c1", course_id="c1", student_ids=["s1"]), None),
+        ("c2", None, EnrollmentError("Course is full")),
+    ]
+    service = AsyncEnrollmentService(course_repo, enroll_repo)
+
+    results = asyncio.run(service.enroll_student_many("s1", ["c1", "c2", "c1"]))
+
+    assert [(r["course_id"], r["status"], r["message"]) for r in results] == [
+        ("c1", "success", "Enrolled"),
+        ("c2", "error", "Course is full"),
+    ]
+    assert enroll_repo.enroll_many_atomic.await_args.args[1] == ["c1", "c2"]
+
+
+def test_concurrent_async_catalog_reads_load_once():
+    cache = CourseCatalogCache(ttl_sec=60)
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return [make_course()]
+
+    async def run():
+        return await asyncio.gather(*(cache.get_versioned_async(loader) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert loads == 1
+    assert {version for version, _ in results} == {1}
+    assert cache.misses == 1
+
+
+def test_async_course_service_reads_through_async_repository():
+    class Doc:
+        def __init__(self, course):
+            self.id, self.exists, self._data = course.id, True, course.model_dump(exclude={"id"})
+
+        def to_dict(self):
+            return dict(self._data)
+
+    async def get_all(refs):
+        for course in (make_course("c2"), make_course("c1")):
+            yield Doc(course)
+
+    db = MagicMock()
+    db.get_all = get_all
+    service = AsyncCourseService(AsyncFirestoreCourseRepository(db))
+
+    courses = asyncio.run(service.get_courses(["c1", "c2", "c1"]))
+
+    assert [c.id for c in courses] == ["c1", "c2"]
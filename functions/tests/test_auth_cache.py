@@ -0,0 +1,88 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+from core.auth_cache import VerifiedTokenCache
+
+
+def claims(uid="u1", ttl=3600):
+    return {"uid": uid, "exp": time.time() + ttl}
+
+
+def make_cache(verify, **kwargs):
+    kwargs.setdefault("revocation_check_rate", 0)
+    return VerifiedTokenCache(verify=verify, key_refresh_sec=0, **kwargs)
+
+
+def test_repeated_token_is_verified_once():
+    verify = MagicMock(return_value=claims())
+    cache = make_cache(verify)
+
+    assert cache.verify("token")["uid"] == "u1"
+    assert cache.verify("token")["uid"] == "u1"
+
+    verify.assert_called_once_with("token", False)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_token_is_verified_again():
+    verify = MagicMock(side_effect=[claims(ttl=2), claims(ttl=3600)])
+    cache = make_cache(verify, exp_leeway_sec=5)
+
+    cache.verify("token")
+    cache.verify("token")
+
+    assert verify.call_count == 2
+
+
+def test_failed_verification_is_not_cached():
+    verify = MagicMock(side_effect=[ValueError("invalid"), claims()])
+    cache = make_cache(verify)
+
+    with pytest.raises(ValueError):
+        cache.verify("token")
+    assert cache.verify("token")["uid"] == "u1"
+    assert len(cache) == 1
+
+
+def test_sampled_revocation_check_evicts_revoked_token():
+    verify = MagicMock(side_effect=[claims(), RuntimeError("revoked")])
+    cache = make_cache(verify, revocation_check_rate=1.0)
+
+    cache.verify("token")
+    with pytest.raises(RuntimeError):
+        cache.verify("token")
+
+    assert verify.call_args_list[1].args == ("token", True)
+    assert len(cache) == 0
+
+
+def test_least_recently_used_token_is_evicted():
+    verify = MagicMock(side_effect=lambda token, _: claims(uid=token))
+    cache = make_cache(verify, max_entries=2)
+
+    for token in ("a", "b", "a", "c"):
+        cache.verify(token)
+    cache.verify("b")
+
+    assert verify.call_count == 4
+
+
+def test_firebase_admin_internals_for_key_refresh_exist():
+    # 서명 키 갱신은 firebase_admin 비공개 속성에 기대므로, firebase-admin을 올려 속성이 사라지면 여기서 실패해야 함
+    import firebase_admin
+    import google.auth.credentials
+    from firebase_admin import credentials
+    from core.auth_cache import _signing_key_request
+
+    class AnonymousCredential(credentials.Base):
+        def get_credential(self):
+            return google.auth.credentials.AnonymousCredentials()
+
+    app = firebase_admin.initialize_app(AnonymousCredential(), options={"projectId": "test"}, name="auth-cache-test")
+    try:
+        request, cert_uri = _signing_key_request(app)
+    finally:
+        firebase_admin.delete_app(app)
+
+    assert callable(request)
+    assert cert_uri.startswith("https://")
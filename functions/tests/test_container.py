@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import MagicMock
+from core import container as container_module
+from core.container import ServiceContainer
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = MagicMock()
+    monkeypatch.setattr(container_module, "get_db", lambda: db)
+    monkeypatch.setattr(container_module, "COURSE_CACHE_LISTENER_ENABLED", False)
+    return db
+
+
+def test_services_are_built_once_per_db(db, monkeypatch):
+    container = ServiceContainer()
+    first = container.services()
+
+    assert container.services() is first
+    # 강의 서비스와 수강 서비스가 같은 강의 저장소(캐시)를 공유
+    assert first.enrollment.course_repo is first.course.repo
+    assert first.course.repo.cache is container.catalog_cache()
+
+    monkeypatch.setattr(container_module, "get_db", lambda: MagicMock())
+    assert container.services() is not first
+
+
+def test_agent_reuses_container_services(db, monkeypatch):
+    monkeypatch.setattr("services.agent_service.get_openai_client", lambda: (None, "OPENAI_API_KEY Missing"))
+    container = ServiceContainer()
+
+    agent = container.agent_service()
+
+    assert container.agent_service() is agent
+    assert agent.course_service is container.services().course
+    assert agent.enrollment_service is container.services().enrollment
+
+
+def test_async_services_share_catalog_cache_with_sync_services(db, monkeypatch):
+    async_db = MagicMock()
+    monkeypatch.setattr(container_module, "get_async_db", lambda: async_db)
+    resolved_on = []
+
+    def get_db():
+        resolved_on.append(threading.current_thread())
+        return db
+
+    monkeypatch.setattr(container_module, "get_db", get_db)
+    monkeypatch.setattr(container_module, "db_resolved", lambda: bool(resolved_on))
+    container = ServiceContainer()
+
+    async def build():
+        return await container.async_services(), await container.async_services()
+
+    first, again = asyncio.run(build())
+
+    assert first is again
+    # 콜드 스타트의 DB 탐색은 이벤트 루프 스레드가 아닌 작업 스레드에서
+    assert resolved_on[0] is not threading.main_thread()
+    assert first.course.repo.db is async_db
+    assert first.course.repo.cache is container.services().course.repo.cache
+
+
+def test_dependency_overrides_replace_container_services():
+    from fastapi.testclient import TestClient
+    from core.dependencies import get_async_course_service
+    from models.course import Course
+    import main
+
+    service = MagicMock()
+
+    async def get_course(course_id):
+        return Course(id=course_id, title="Python", instructor="T", max_students=10)
+
+    service.get_course = get_course
+    main.app.dependency_overrides[get_async_course_service] = lambda: service
+    try:
+        with TestClient(main.app) as client:
+            response = client.get("/api/courses/c1")
+    finally:
+        main.app.dependency_overrides.clear()
+        container_module.shutdown_container()
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Python"
+
+
+@pytest.mark.parametrize("body, role, status", [
+    ({"course_ids": ["c1"]}, "student", 200),
+    ({"course_ids": ["c1"], "student_id": "someone-else"}, "student", 403),
+    ({"course_ids": ["c1"], "student_id": "someone-else"}, "admin", 200),
+    ({"course_ids": []}, "student", 422),
+    ({"course_ids": [f"c{i}" for i in range(11)]}, "student", 422),
+])
+def test_batch_enrollment_is_scoped_to_the_signed_in_student(body, role, status):
+    from fastapi.testclient import TestClient
+    from core.dependencies import get_async_enrollment_service, get_async_user_service, get_current_user_uid
+    from models.user import User
+    import main
+
+    enrolled = []
+
+    async def enroll_student_many(student_id, course_ids, atomic=False):
+        enrolled.append(student_id)
+        return [{"course_id": cid, "status": "success", "message": "Enrolled"} for cid in course_ids]
+
+    async def get_user(uid):
+        return User(uid=uid, role=role)
+
+    main.app.dependency_overrides[get_current_user_uid] = lambda: "me"
+    main.app.dependency_overrides[get_async_enrollment_service] = lambda: MagicMock(enroll_student_many=enroll_student_many)
+    main.app.dependency_overrides[get_async_user_service] = lambda: MagicMock(get_user=get_user)
+    try:
+        with TestClient(main.app) as client:
+            response = client.post("/api/enrollments/batch", json=body)
+    finally:
+        main.app.dependency_overrides.clear()
+        container_module.shutdown_container()
+
+    assert response.status_code == status
+    assert enrolled == ([body.get("student_id", "me")] if status == 200 else [])
@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import MagicMock
+from models.course import Course
+from repositories.course_cache import CourseCatalogCache
+from repositories.firestore_repo import FirestoreCourseRepository
+
+def make_course(course_id):
+    return Course(id=course_id, title=course_id, instructor="T", max_students=10)
+
+@pytest.fixture
+def cache():
+    return CourseCatalogCache(ttl_sec=60)
+
+def test_get_uses_cached_courses(cache):
+    loader = MagicMock(return_value=[make_course("c1")])
+
+    first = cache.get(loader)
+    second = cache.get(loader)
+
+    assert [c.id for c in first] == [c.id for c in second] == ["c1"]
+    loader.assert_called_once()
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+def test_invalidate_bumps_version_and_reloads(cache):
+    loader = MagicMock(return_value=[make_course("c1")])
+    cache.get(loader)
+    version = cache.version
+
+    cache.invalidate()
+    cache.get(loader)
+
+    assert cache.version > version
+    assert loader.call_count == 2
+
+def test_ttl_expiry_reloads():
+    cache = CourseCatalogCache(ttl_sec=0)
+    loader = MagicMock(return_value=[])
+
+    cache.get(loader)
+    cache.get(loader)
+
+    assert loader.call_count == 2
+
+def test_snapshot_refreshes_cache(cache):
+    doc = MagicMock()
+    doc.id = "c9"
+    doc.to_dict.return_value = {"title": "Snap", "instructor": "T", "max_students": 5}
+    collection = MagicMock()
+    collection.on_snapshot.return_value = MagicMock(is_active=True)
+
+    assert cache.start_listener(collection)
+    cache._on_snapshot([doc], [], None)
+    loader = MagicMock()
+
+    courses = cache.get(loader)
+
+    assert [c.id for c in courses] == ["c9"]
+    loader.assert_not_called()
+
+def test_repository_writes_invalidate_cache(cache):
+    mock_db = MagicMock()
+    repo = FirestoreCourseRepository(mock_db, cache=cache)
+    mock_db.collection.return_value.stream.return_value = []
+    repo.list()
+    version = cache.version
+
+    repo.save(make_course("c1"))
+    repo.list()
+
+    assert cache.version > version
+    assert mock_db.collection.return_value.stream.call_count == 2
+
+def test_get_versioned_returns_matching_version(cache):
+    loader = MagicMock(return_value=[make_course("c1")])
+
+    version, courses = cache.get_versioned(loader)
+    assert version == cache.version
+    assert [c.id for c in courses] == ["c1"]
+    assert cache.get_versioned(loader)[0] == version
+    loader.assert_called_once()
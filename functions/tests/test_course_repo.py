@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock
 from models.course import Course, CourseCreate
+from services.schedule import course_mask, mask_from_bytes
 from repositories.firestore_repo import FirestoreCourseRepository
 
 @pytest.fixture
@@ -79,3 +80,100 @@ def test_delete_course(repo, mock_db):
     mock_db.collection.return_value.document.assert_called_with("course1")
     mock_db.collection.return_value.document.return_value.delete.assert_called_once()
 
+
+def test_get_many_courses(repo, mock_db):
+    def make_doc(doc_id, exists=True):
+        doc = MagicMock()
+        doc.id = doc_id
+        doc.exists = exists
+        doc.to_dict.return_value = {"title": doc_id, "instructor": "T", "max_students": 10}
+        return doc
+
+    mock_db.get_all.return_value = [make_doc("c2"), make_doc("c1"), make_doc("missing", exists=False)]
+
+    courses = repo.get_many(["c1", "c2", "c1", "missing"])
+
+    assert [c.id for c in courses] == ["c1", "c2"]
+    mock_db.get_all.assert_called_once()
+    assert len(mock_db.get_all.call_args[0][0]) == 3
+
+def test_get_many_empty_skips_rpc(repo, mock_db):
+    assert repo.get_many([]) == []
+    mock_db.get_all.assert_not_called()
+
+def make_page_doc(doc_id, data):
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.to_dict.return_value = data
+    return doc
+
+def test_list_page_with_cursor_and_projection(repo, mock_db):
+    query = mock_db.collection.return_value.order_by.return_value
+    query.select.return_value = query
+    query.start_after.return_value = query
+    query.limit.return_value.stream.return_value = [
+        make_page_doc("c2", {"title": "C2"}),
+        make_page_doc("c3", {"title": "C3"}),
+        make_page_doc("c4", {"title": "C4"}),
+    ]
+
+    page = repo.list_page(2, start_after="c1", fields=["title"])
+
+    assert page.items == [{"id": "c2", "title": "C2"}, {"id": "c3", "title": "C3"}]
+    assert page.next_cursor == "c3"
+    mock_db.collection.return_value.order_by.assert_called_once_with("__name__")
+    query.select.assert_called_once_with(["title"])
+    query.start_after.assert_called_once_with({"__name__": "c1"})
+    query.limit.assert_called_once_with(3)
+
+def test_list_page_last_page(repo, mock_db):
+    query = mock_db.collection.return_value.order_by.return_value
+    query.limit.return_value.stream.return_value = [
+        make_page_doc("c1", {"title": "C1", "instructor": "T", "max_students": 10}),
+    ]
+
+    page = repo.list_page(2)
+
+    assert page.next_cursor is None
+    assert page.items[0]["title"] == "C1"
+    query.select.assert_not_called()
+
+def test_list_page_rejects_unknown_fields(repo):
+    with pytest.raises(ValueError, match="Unknown fields"):
+        repo.list_page(10, fields=["password"])
+
+def make_schedule_doc(student_id, course_ids):
+    doc = MagicMock()
+    doc.exists = True
+    doc.reference = MagicMock(path=f"student_schedules/{student_id}")
+    doc.to_dict.return_value = {"course_ids": course_ids}
+    return doc
+
+def test_delete_course_rebuilds_student_occupancy(repo, mock_db):
+    kept = Course(id="c2", title="C2", instructor="T", max_students=10, start_time="Tue 09:00", end_time="Tue 10:00")
+    schedule = make_schedule_doc("s1", ["c1", "c2"])
+    transaction = MagicMock(_max_attempts=5, _read_only=False)
+    mock_db.transaction.return_value = transaction
+    transaction.get_all.return_value = [schedule]
+    query = mock_db.collection.return_value.where.return_value.select.return_value
+    query.stream.return_value = [schedule]
+    repo.get_many = MagicMock(return_value=[kept])
+
+    repo.delete("c1")
+
+    rebuilt = transaction.set.call_args[0][1]
+    assert rebuilt["course_ids"] == ["c2"]
+    assert mask_from_bytes(rebuilt["occupancy"]) == course_mask(kept)
+    repo.get_many.assert_called_once_with(["c1", "c2"])
+
+def test_save_course_rebuilds_only_when_time_changes(repo, mock_db):
+    previous = mock_db.collection.return_value.document.return_value.get.return_value
+    previous.exists = True
+    previous.to_dict.return_value = {"start_time": "Mon 09:00", "end_time": "Mon 10:00"}
+    repo._rebuild_schedules = MagicMock()
+
+    repo.save(Course(id="c1", title="C1", instructor="T", max_students=10, start_time="Mon 09:00", end_time="Mon 10:00"))
+    repo._rebuild_schedules.assert_not_called()
+
+    repo.save(Course(id="c1", title="C1", instructor="T", max_students=10, start_time="Mon 11:00", end_time="Mon 12:00"))
+    repo._rebuild_schedules.assert_called_once_with("c1")
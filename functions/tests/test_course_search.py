@@ -0,0 +1,55 @@
+from models.course import Course
+from services import course_search
+from services.course_search import CourseSearchIndex, decompose, get_search_index
+
+COURSES = [
+    Course(id="c1", title="파이썬 기초", instructor="김철수", max_students=10, description="프로그래밍 입문"),
+    Course(id="c2", title="파이썬 데이터 분석", instructor="이영희", max_students=10),
+    Course(id="c3", title="리액트 웹 개발", instructor="박민수", max_students=10, description="프론트엔드"),
+]
+
+def build(courses=COURSES):
+    index = CourseSearchIndex()
+    index.update(courses, version=1)
+    return index
+
+def test_decompose_splits_hangul_syllables():
+    assert decompose("썬") == "ㅆㅓㄴ"
+    assert decompose("ab") == "ab"
+
+def test_exact_title_ranks_first():
+    results = build().search("파이썬 기초")
+    assert results[0][0].id == "c1"
+    assert results[0][1] > results[1][1]
+
+def test_typo_and_partial_names_match():
+    assert build().search("파이선 기초")[0][0].id == "c1"
+    assert build().search("리액트")[0][0].id == "c3"
+
+def test_instructor_and_description_are_indexed():
+    assert build().search("이영희")[0][0].id == "c2"
+    assert build().search("프론트엔드")[0][0].id == "c3"
+
+def test_unrelated_query_returns_nothing():
+    assert build().search("회계원리") == []
+
+def test_update_reindexes_only_changed_courses():
+    index = build()
+    assert index.reindexed == 3
+
+    seats_changed = [c.model_copy(update={"current_count": 5}) for c in COURSES]
+    index.update(seats_changed, version=2)
+    assert index.reindexed == 3
+    assert index.search("파이썬 기초")[0][0].current_count == 5
+
+    renamed = [COURSES[0].model_copy(update={"title": "자바 기초"}), COURSES[2]]
+    index.update(renamed, version=3)
+    assert index.reindexed == 4
+    assert all(c.id != "c2" for c, _ in index.search("데이터 분석"))
+    assert index.search("자바")[0][0].id == "c1"
+
+def test_shared_index_follows_catalog_version(monkeypatch):
+    monkeypatch.setattr(course_search, "_index", CourseSearchIndex())
+    first = get_search_index(COURSES, 1)
+    assert get_search_index(COURSES, 1) is first and first.version == 1
+    assert get_search_index(COURSES, None) is not first
@@ -57,3 +57,25 @@ def test_delete_course(service, mock_repo):
     assert result is True
     mock_repo.delete.assert_called_with("1")
 
+
+def test_get_courses_batch(service, mock_repo):
+    mock_repo.get_many.return_value = [
+        Course(id="1", title="C1", instructor="T1", max_students=10, current_count=0)
+    ]
+
+    courses = service.get_courses(["1", "2"])
+
+    assert [c.id for c in courses] == ["1"]
+    mock_repo.get_many.assert_called_once_with(["1", "2"])
+
+def test_create_course_stores_normalized_schedule(service, mock_repo):
+    mock_repo.save.side_effect = lambda course: course
+
+    course = service.create_course(CourseCreate(title="C", instructor="T", max_students=10, start_time="Tue 09:00", end_time="Tue 10:30"))
+
+    assert [(slot.start, slot.end) for slot in course.schedule] == [(1440 + 540, 1440 + 630)]
+
+def test_create_course_rejects_invalid_time(service, mock_repo):
+    with pytest.raises(ValueError):
+        service.create_course(CourseCreate(title="C", instructor="T", max_students=10, start_time="Tue 25:00", end_time="Tue 26:00"))
+    mock_repo.save.assert_not_called()
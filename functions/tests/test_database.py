@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from core import database
+
+@pytest.fixture(autouse=True)
+def reset_cached_client(monkeypatch):
+    monkeypatch.setattr(database, "HEALTH_CHECK_INTERVAL_SEC", 0)
+    database.reset_db()
+    yield
+    database.reset_db()
+
+def test_get_db_resolves_once(monkeypatch):
+    client = MagicMock()
+    resolve = MagicMock(return_value=("course-registration", client))
+    monkeypatch.setattr(database, "_resolve_client", resolve)
+
+    assert database.get_db() is client
+    assert database.get_db() is client
+    assert database.get_db_id() == "course-registration"
+    resolve.assert_called_once()
+
+def test_reset_db_triggers_re_resolve(monkeypatch):
+    first, second = MagicMock(), MagicMock()
+    resolve = MagicMock(side_effect=[("(default)", first), ("(default)", second)])
+    monkeypatch.setattr(database, "_resolve_client", resolve)
+
+    assert database.get_db() is first
+    database.reset_db(first)
+    assert database.get_db() is second
+    assert resolve.call_count == 2
+
+def test_reset_db_ignores_stale_client(monkeypatch):
+    current = MagicMock()
+    monkeypatch.setattr(database, "_resolve_client", MagicMock(return_value=("(default)", current)))
+
+    database.get_db()
+    database.reset_db(MagicMock())
+
+    assert database.get_db() is current
+
+def test_get_async_db_is_bound_to_running_loop(monkeypatch):
+    monkeypatch.setattr(database, "_resolve_client", MagicMock(return_value=("course-registration", MagicMock())))
+    build = MagicMock(side_effect=lambda project_id, db_id: MagicMock(db_id=db_id))
+    monkeypatch.setattr(database, "_build_async_client", build)
+
+    async def get_twice():
+        return database.get_async_db(), database.get_async_db()
+
+    first, again = asyncio.run(get_twice())
+    other_loop, _ = asyncio.run(get_twice())
+
+    assert first is again
+    assert first.db_id == "course-registration"
+    # 다른 이벤트 루프에서는 그 루프에 묶인 새 클라이언트를 사용
+    assert other_loop is not first
+    assert build.call_count == 2
+
+def test_request_path_unavailable_error_resets_failed_client(monkeypatch):
+    from google.api_core import exceptions as api_exceptions
+    from core.request_timing import TimedRepository
+
+    first, second = MagicMock(), MagicMock()
+    monkeypatch.setattr(database, "_resolve_client", MagicMock(side_effect=[("(default)", first), ("(default)", second)]))
+
+    class Repo:
+        def __init__(self, db):
+            self.db = db
+
+        def get(self, id):
+            raise api_exceptions.ServiceUnavailable("connection reset")
+
+        def save(self, item):
+            raise ValueError("not a connection error")
+
+    repo = TimedRepository(Repo(database.get_db()))
+    with pytest.raises(ValueError):
+        repo.save(None)
+    assert database.get_db() is first
+
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        repo.get("c1")
+    assert database.get_db() is second
@@ -0,0 +1,276 @@
+import pytest
+from unittest.mock import MagicMock
+from google.cloud import firestore
+from models.course import Course
+from migrate_enrollments import distribute
+from services.schedule import course_mask, mask_from_bytes, mask_to_bytes
+from repositories.firestore_repo import (
+    FirestoreEnrollmentRepository,
+    ShardedFirestoreEnrollmentRepository,
+    TransactionStats,
+    shard_capacity,
+)
+
+class RejectError(Exception):
+    pass
+
+def make_snapshot(path, doc_id, data):
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.reference.path = path
+    doc.exists = data is not None
+    doc.to_dict.return_value = data
+    return doc
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.collection.side_effect = lambda name: MagicMock(
+        document=lambda doc_id: MagicMock(path=f"{name}/{doc_id}")
+    )
+    return db
+
+@pytest.fixture
+def transaction(mock_db):
+    txn = MagicMock(_max_attempts=5, _read_only=False)
+    mock_db.transaction.return_value = txn
+    return txn
+
+@pytest.fixture
+def repo(mock_db):
+    repo = FirestoreEnrollmentRepository(mock_db)
+    repo.txn_stats = TransactionStats()
+    return repo
+
+def test_enroll_atomic_reads_once_and_writes_with_transforms(repo, transaction):
+    transaction.get_all.return_value = [
+        make_snapshot("courses/c1", "c1", {"title": "C1", "instructor": "T", "max_students": 10, "current_count": 3}),
+        make_snapshot("enrollments/c1", "c1", {"course_id": "c1", "student_ids": ["s0"]}),
+    ]
+    seen = {}
+
+    def validate(course, enrollment, occupancy):
+        seen["course"], seen["enrollment"], seen["occupancy"] = course, enrollment, occupancy
+
+    result = repo.enroll_atomic("s1", "c1", validate)
+
+    assert result.student_ids == ["s0", "s1"]
+    assert isinstance(seen["course"], Course) and seen["course"].current_count == 3
+    assert seen["occupancy"] == 0
+    transaction.get_all.assert_called_once()
+    assert len(transaction.get_all.call_args[0][0]) == 3
+    course_update = transaction.update.call_args[0][1]
+    assert isinstance(course_update["current_count"], firestore.Increment)
+    enroll_set = transaction.set.call_args_list[-1]
+    assert isinstance(enroll_set[0][1]["student_ids"], firestore.ArrayUnion)
+    assert enroll_set[1]["merge"] is True
+    assert repo.txn_stats.snapshot()["committed"] == 1
+
+def test_enroll_atomic_rejection_rolls_back(repo, transaction):
+    transaction.get_all.return_value = [make_snapshot("courses/c1", "c1", None), make_snapshot("enrollments/c1", "c1", None)]
+
+    def validate(course, enrollment, occupancy):
+        assert course is None and enrollment is None
+        raise RejectError("Course not found")
+
+    with pytest.raises(RejectError):
+        repo.enroll_atomic("s1", "c1", validate)
+
+    transaction.update.assert_not_called()
+    transaction._rollback.assert_called_once()
+    assert repo.txn_stats.snapshot()["rejected"] == 1
+
+def test_shard_capacity_splits_seats():
+    assert [shard_capacity(23, 5, i) for i in range(5)] == [5, 5, 5, 4, 4]
+    assert sum(shard_capacity(7, 10, i) for i in range(10)) == 7
+
+def test_distribute_fills_shards_in_order():
+    assert distribute(7, 10, 3) == [4, 3, 0]
+    assert distribute(12, 10, 2) == [5, 7]
+
+@pytest.fixture
+def sharded_repo(mock_db):
+    repo = ShardedFirestoreEnrollmentRepository(mock_db, shards=2)
+    repo.txn_stats = TransactionStats()
+    repo._sync_course_count = MagicMock()
+    repo._students = lambda cid: MagicMock(document=lambda sid: MagicMock(path=f"students/{sid}"))
+    repo._seat_shards = lambda cid: MagicMock(document=lambda i: MagicMock(path=f"seat_shards/{i}"))
+    return repo
+
+def set_course(repo, course_id, data):
+    # 샤드 구조는 강의 문서를 트랜잭션 밖에서 읽음
+    snapshot = make_snapshot(f"courses/{course_id}", course_id, data)
+    repo.course_collection = MagicMock(document=lambda cid: MagicMock(path=f"courses/{cid}", get=lambda: snapshot))
+
+def test_sharded_enroll_skips_full_shard(sharded_repo, transaction, monkeypatch):
+    monkeypatch.setattr("repositories.firestore_repo.random.randrange", lambda n: 0)
+    set_course(sharded_repo, "c1", {"title": "C1", "instructor": "T", "max_students": 4, "current_count": 0})
+    transaction.get_all.side_effect = [
+        [make_snapshot("students/s1", "s1", None)],
+        [make_snapshot("seat_shards/0", "0", {"count": 2}), make_snapshot("seat_shards/1", "1", {"count": 1})],
+    ]
+    seen = {}
+
+    result = sharded_repo.enroll_atomic("s1", "c1", lambda c, e, o: seen.update(course=c, enrollment=e))
+
+    assert result.student_ids == ["s1"]
+    assert seen["course"].current_count == 3  # 샤드 1의 남은 좌석 1석 기준
+    assert seen["enrollment"].student_ids == []
+    # 강의 문서는 트랜잭션에서 읽지 않고, 샤드는 한 번의 get_all로 읽음
+    assert transaction.get_all.call_count == 2
+    assert [ref.path for ref in transaction.get_all.call_args_list[0][0][0]] == ["students/s1", "student_schedules/s1"]
+    transaction.create.assert_called_once()
+    assert isinstance(transaction.set.call_args_list[0][0][1]["count"], firestore.Increment)
+    sharded_repo._sync_course_count.assert_called_once_with("c1")
+
+def test_sharded_enroll_all_shards_full(sharded_repo, transaction):
+    set_course(sharded_repo, "c1", {"title": "C1", "instructor": "T", "max_students": 2, "current_count": 2})
+    transaction.get_all.side_effect = [
+        [make_snapshot("students/s1", "s1", None)],
+        [make_snapshot("seat_shards/0", "0", {"count": 1}), make_snapshot("seat_shards/1", "1", {"count": 1})],
+    ]
+
+    def validate(course, enrollment, occupancy):
+        if course.current_count >= course.max_students:
+            raise RejectError("Course is full")
+
+    with pytest.raises(RejectError):
+        sharded_repo.enroll_atomic("s1", "c1", validate)
+
+    transaction.create.assert_not_called()
+    assert sharded_repo.txn_stats.snapshot()["rejected"] == 1
+
+def test_sharded_delete_splits_write_batches(mock_db):
+    repo = ShardedFirestoreEnrollmentRepository(mock_db, shards=2)
+    students = [MagicMock() for _ in range(501)]
+    repo._students = lambda cid: MagicMock(stream=lambda: students)
+    repo._seat_shards = lambda cid: MagicMock(stream=lambda: students[:2])
+    batches = []
+    mock_db.batch.side_effect = lambda: batches.append(MagicMock()) or batches[-1]
+
+    repo.delete("c1")
+
+    assert [b.delete.call_count for b in batches] == [500, 3]
+    assert all(b.commit.call_count == 1 for b in batches)
+
+def course_data(current_count=0, max_students=10):
+    return {"title": "C", "instructor": "T", "max_students": max_students, "current_count": current_count}
+
+def full_check(course, enrollment, occupancy=0):
+    if course is None:
+        raise RejectError("Course not found")
+    if occupancy & course_mask(course):
+        raise RejectError("Schedule conflict")
+    if course.current_count >= course.max_students:
+        raise RejectError("Course is full")
+
+def test_enroll_many_atomic_commits_all_in_one_transaction(repo, transaction):
+    transaction.get_all.return_value = [
+        make_snapshot("courses/c1", "c1", course_data()),
+        make_snapshot("courses/c2", "c2", course_data()),
+    ]
+
+    outcomes = repo.enroll_many_atomic("s1", ["c1", "c2"], full_check, atomic=True)
+
+    assert [(cid, e.student_ids, err) for cid, e, err in outcomes] == [("c1", ["s1"], None), ("c2", ["s1"], None)]
+    transaction.get_all.assert_called_once()
+    assert len(transaction.get_all.call_args[0][0]) == 5
+    assert transaction.update.call_count == 2
+
+def test_enroll_many_atomic_rolls_back_on_any_failure(repo, transaction):
+    transaction.get_all.return_value = [
+        make_snapshot("courses/c1", "c1", course_data()),
+        make_snapshot("courses/c2", "c2", course_data(current_count=10)),
+    ]
+
+    outcomes = repo.enroll_many_atomic("s1", ["c1", "c2"], full_check, atomic=True)
+
+    assert outcomes[0] == ("c1", None, None)
+    assert str(outcomes[1][2]) == "Course is full"
+    transaction.update.assert_not_called()
+    assert repo.txn_stats.snapshot()["rejected"] == 1
+
+def test_enroll_many_per_item_prevalidates_with_one_get_all(repo, mock_db):
+    mock_db.get_all.return_value = [make_snapshot("courses/c1", "c1", course_data())]
+    repo.enroll_atomic = MagicMock(return_value="enrolled")
+
+    outcomes = repo.enroll_many_atomic("s1", ["c1", "missing"], full_check)
+
+    assert outcomes[0] == ("c1", "enrolled", None)
+    assert str(outcomes[1][2]) == "Course not found"
+    mock_db.get_all.assert_called_once()
+    repo.enroll_atomic.assert_called_once_with("s1", "c1", full_check)
+
+def test_enroll_atomic_checks_and_updates_student_occupancy(repo, transaction):
+    enrolled = Course(id="c0", title="C0", instructor="T", max_students=10, start_time="Mon 09:00", end_time="Mon 10:00")
+    course = {**course_data(), "start_time": "Tue 09:00", "end_time": "Tue 10:00"}
+    transaction.get_all.return_value = [
+        make_snapshot("courses/c1", "c1", course),
+        make_snapshot("student_schedules/s1", "s1", {"occupancy": mask_to_bytes(course_mask(enrolled))}),
+    ]
+
+    repo.enroll_atomic("s1", "c1", full_check)
+
+    occupancy_set = transaction.set.call_args_list[0][0][1]
+    new_course = Course(id="c1", **course)
+    assert mask_from_bytes(occupancy_set["occupancy"]) == course_mask(enrolled) | course_mask(new_course)
+
+def test_enroll_many_atomic_rejects_conflicts_within_batch(repo, transaction):
+    same_slot = {**course_data(), "start_time": "Wed 13:00", "end_time": "Wed 14:00"}
+    transaction.get_all.return_value = [
+        make_snapshot("courses/c1", "c1", same_slot),
+        make_snapshot("courses/c2", "c2", same_slot),
+    ]
+
+    outcomes = repo.enroll_many_atomic("s1", ["c1", "c2"], full_check, atomic=True)
+
+    assert outcomes[0] == ("c1", None, None)
+    assert str(outcomes[1][2]) == "Schedule conflict"
+    transaction.set.assert_not_called()
+
+def test_async_enroll_atomic_shares_validation_and_writes(mock_db):
+    import asyncio
+    from unittest.mock import AsyncMock
+    from repositories.async_firestore_repo import AsyncFirestoreEnrollmentRepository
+
+    txn = MagicMock(_max_attempts=5, _read_only=False, _id=None)
+    txn._begin = AsyncMock()
+    txn._commit = AsyncMock(return_value=[])
+    txn._rollback = AsyncMock()
+    docs = [make_snapshot("courses/c1", "c1", course_data()), make_snapshot("enrollments/c1", "c1", None)]
+
+    async def get_all(refs):
+        async def gen():
+            for doc in docs:
+                yield doc
+        return gen()
+
+    txn.get_all = get_all
+    mock_db.transaction.return_value = txn
+    repo = AsyncFirestoreEnrollmentRepository(mock_db)
+    repo.txn_stats = TransactionStats()
+    repo._schedules_ready.add("s1")  # 점유 비트맵 문서가 이미 있는 학생
+
+    result = asyncio.run(repo.enroll_atomic("s1", "c1", full_check))
+
+    assert result.student_ids == ["s1"]
+    assert isinstance(txn.update.call_args[0][1]["current_count"], firestore.Increment)
+    assert repo.txn_stats.snapshot()["committed"] == 1
+
+def test_legacy_student_schedule_is_backfilled_before_transaction(repo, transaction, mock_db):
+    enrolled = {**course_data(), "start_time": "Mon 09:00", "end_time": "Mon 10:00"}
+    schedule_ref = MagicMock(path="student_schedules/s1")
+    schedule_ref.get.return_value.exists = False
+    repo.schedule_collection = MagicMock(document=lambda sid: schedule_ref)
+    repo.get_by_student_id = MagicMock(return_value=[MagicMock(course_id="c0")])
+    mock_db.get_all.return_value = [make_snapshot("courses/c0", "c0", enrolled)]
+    transaction.get_all.return_value = [make_snapshot("courses/c1", "c1", course_data())]
+
+    repo.enroll_atomic("s1", "c1", full_check)
+    repo.enroll_atomic("s1", "c1", full_check)
+
+    created = schedule_ref.create.call_args[0][0]
+    assert created["course_ids"] == ["c0"]
+    assert mask_from_bytes(created["occupancy"]) == course_mask(Course(id="c0", **enrolled))
+    # 같은 학생은 인스턴스당 한 번만 확인
+    schedule_ref.get.assert_called_once()
@@ -3,7 +3,9 @@ from datetime import datetime
 from unittest.mock import MagicMock
 from models.course import Course
 from models.enrollment import Enrollment, EnrollmentCreate
+from repositories.base import TransactionalEnrollmentRepository
 from services.enrollment_service import EnrollmentService, EnrollmentError
+from services.schedule import course_mask
 
 @pytest.fixture
 def mock_course_repo():
@@ -28,7 +30,7 @@ def test_enroll_success(service, mock_course_repo, mock_enroll_repo):
     result = service.enroll_student(student_id, course_id)
     
     assert result.course_id == course_id
-    assert result.student_id == student_id
+    assert student_id in result.student_ids
     mock_course_repo.save.assert_called_once()
     assert mock_course.current_count == 6
 
@@ -47,7 +49,7 @@ def test_enroll_duplicate_fails(service, mock_course_repo, mock_enroll_repo):
     student_id = "s1"
     mock_course = Course(id=course_id, title="C1", instructor="T1", max_students=10, current_count=5)
     mock_course_repo.get.return_value = mock_course
-    mock_enroll_repo.get.return_value = Enrollment(id="s1_c1", student_id=student_id, course_id=course_id, timestamp=datetime.now())
+    mock_enroll_repo.get.return_value = Enrollment(id=course_id, student_ids=[student_id], course_id=course_id, timestamp=datetime.now())
 
     with pytest.raises(EnrollmentError, match="Already enrolled"):
         service.enroll_student(student_id, course_id)
@@ -60,3 +62,69 @@ def test_enroll_course_not_found(service, mock_course_repo, mock_enroll_repo):
     with pytest.raises(EnrollmentError, match="Course not found"):
         service.enroll_student(student_id, course_id)
 
+
+
+@pytest.fixture
+def txn_enroll_repo():
+    return MagicMock(spec=TransactionalEnrollmentRepository)
+
+@pytest.fixture
+def txn_service(mock_course_repo, txn_enroll_repo):
+    return EnrollmentService(course_repo=mock_course_repo, enroll_repo=txn_enroll_repo)
+
+def _run_validate(course, enrollment, occupancy=0):
+    def enroll_atomic(student_id, course_id, validate):
+        validate(course, enrollment, occupancy)
+        return Enrollment(id=course_id, course_id=course_id, student_ids=[student_id])
+    return enroll_atomic
+
+def test_enroll_transactional_success(txn_service, mock_course_repo, txn_enroll_repo):
+    course = Course(id="c1", title="C1", instructor="T1", max_students=10, current_count=5)
+    txn_enroll_repo.enroll_atomic.side_effect = _run_validate(course, None)
+
+    result = txn_service.enroll_student("s1", "c1")
+
+    assert result.student_ids == ["s1"]
+    mock_course_repo.get.assert_not_called()
+    mock_course_repo.save.assert_not_called()
+    mock_course_repo.invalidate_cache.assert_called_once_with(soft=True)
+
+@pytest.mark.parametrize("course, enrollment, message", [
+    (None, None, "Course not found"),
+    (Course(id="c1", title="C1", instructor="T1", max_students=10, current_count=10), None, "Course is full"),
+    (Course(id="c1", title="C1", instructor="T1", max_students=10, current_count=1),
+     Enrollment(id="c1", course_id="c1", student_ids=["s1"]), "Already enrolled"),
+])
+def test_enroll_transactional_errors(txn_service, txn_enroll_repo, course, enrollment, message):
+    txn_enroll_repo.enroll_atomic.side_effect = _run_validate(course, enrollment)
+
+    with pytest.raises(EnrollmentError, match=message):
+        txn_service.enroll_student("s1", "c1")
+
+def test_enroll_transactional_rejects_schedule_conflict(txn_service, txn_enroll_repo):
+    enrolled = Course(id="c0", title="C0", instructor="T1", max_students=10, start_time="Mon 09:00", end_time="Mon 10:30")
+    course = Course(id="c1", title="C1", instructor="T1", max_students=10, start_time="Mon 10:00", end_time="Mon 11:00")
+    txn_enroll_repo.enroll_atomic.side_effect = _run_validate(course, None, course_mask(enrolled))
+
+    with pytest.raises(EnrollmentError, match="Schedule conflicts"):
+        txn_service.enroll_student("s1", "c1")
+
+def test_enroll_many_formats_results(txn_service, txn_enroll_repo):
+    txn_enroll_repo.enroll_many_atomic.return_value = [
+        ("c1", Enrollment(id="c1", course_id="c1", student_ids=["s1"]), None),
+        ("c2", None, EnrollmentError("Course is full")),
+        ("c3", None, None),
+    ]
+
+    results = txn_service.enroll_student_many("s1", ["c1", "c2", "c2", "c3"], atomic=True)
+
+    assert [(r["course_id"], r["status"], r["message"]) for r in results] == [
+        ("c1", "success", "Enrolled"),
+        ("c2", "error", "Course is full"),
+        ("c3", "error", "Not enrolled: batch rolled back"),
+    ]
+    assert txn_enroll_repo.enroll_many_atomic.call_args[0][1] == ["c1", "c2", "c3"]
+
+def test_enroll_many_atomic_requires_transactional_repo(service):
+    with pytest.raises(EnrollmentError, match="not supported"):
+        service.enroll_student_many("s1", ["c1"], atomic=True)
@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock
+from models.course import Course
+from services.intent_router import classify
+
+COURSES = [
+    Course(id="c1", title="파이썬 기초", instructor="T", max_students=10),
+    Course(id="c2", title="파이썬 기초 심화", instructor="T", max_students=10),
+    Course(id="c3", title="리액트", instructor="T", max_students=10),
+]
+
+def loader():
+    return COURSES
+
+def test_list_courses_intent():
+    intent = classify("강의 목록 보여줘", loader)
+    assert intent.name == "list_courses" and intent.confidence == 1.0
+
+def test_my_enrollments_takes_precedence_over_enroll_keyword():
+    load = MagicMock(return_value=COURSES)
+    intent = classify("내가 신청한 강의 알려줘", load)
+    assert intent.name == "my_enrollments"
+    load.assert_not_called()
+
+def test_enroll_intent_fills_course_slot_with_longest_title():
+    assert classify("파이썬 기초를 수강신청 해줘", loader).course.id == "c1"
+    assert classify("파이썬 기초 심화 신청해줘", loader).course.id == "c2"
+
+def test_ambiguous_or_conditional_requests_fall_back_to_llm():
+    assert classify("파이썬 기초랑 리액트 신청해줘", loader) is None
+    assert classify("리액트 신청 취소해줘", loader) is None
+    assert classify("월요일 오전 강의 목록만 보여줘", loader) is None
+    assert classify("없는 강의 신청해줘", loader) is None
+    assert classify("안녕", loader) is None
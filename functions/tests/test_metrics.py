@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import MagicMock
+from core.metrics import MetricsRegistry, cache_families, registry
+from models.course import Course
+from models.user import User
+from services.enrollment_service import ENROLLMENT_OUTCOMES, EnrollmentError, EnrollmentService
+
+
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs").inc(outcome="ok")
+    registry.counter("jobs_total", "Jobs").inc(2, outcome="ok")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(3, route="/a")
+
+    text = registry.render()
+
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{outcome="ok"} 3' in text
+    assert "# TYPE latency_seconds histogram" in text
+    # 버킷은 누적 개수
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+    assert 'latency_seconds_sum{route="/a"} 3.55' in text
+
+
+def test_collectors_merge_families_and_survive_errors():
+    registry = MetricsRegistry()
+    registry.register_collector("a", lambda: cache_families("a", 3, 1))
+    registry.register_collector("b", lambda: cache_families("b", 0, 0))
+
+    def broken():
+        raise RuntimeError("boom")
+
+    registry.register_collector("c", broken)
+    text = registry.render()
+
+    assert text.count("# TYPE cache_hits_total counter") == 1
+    assert 'cache_hit_ratio{cache="a"} 0.75' in text
+    assert 'cache_hit_ratio{cache="b"} 0' in text
+
+
+def test_enrollment_outcomes_follow_error_messages():
+    course_repo, enroll_repo = MagicMock(), MagicMock()
+    service = EnrollmentService(course_repo=course_repo, enroll_repo=enroll_repo)
+    enroll_repo.get.return_value = None
+    before = {k: ENROLLMENT_OUTCOMES.value(outcome=k) for k in ("success", "full", "not_found")}
+
+    course_repo.get.return_value = Course(id="c1", title="C1", instructor="T", max_students=10, current_count=0)
+    service.enroll_student("s1", "c1")
+    course_repo.get.return_value = Course(id="c1", title="C1", instructor="T", max_students=1, current_count=1)
+    with pytest.raises(EnrollmentError):
+        service.enroll_student("s1", "c1")
+    course_repo.get.return_value = None
+    with pytest.raises(EnrollmentError):
+        service.enroll_student("s1", "c1")
+
+    for outcome in ("success", "full", "not_found"):
+        assert ENROLLMENT_OUTCOMES.value(outcome=outcome) == before[outcome] + 1
+
+
+def test_rolled_back_batch_items_use_a_documented_outcome_label():
+    from services.enrollment_service import ENROLLMENT_OUTCOME_LABELS
+
+    before = ENROLLMENT_OUTCOMES.value(outcome="rolled_back")
+    EnrollmentService._format_results([("c1", None, None)])
+
+    assert "rolled_back" in ENROLLMENT_OUTCOME_LABELS
+    assert ENROLLMENT_OUTCOMES.value(outcome="rolled_back") == before + 1
+    # 아직 발생하지 않은 레이블도 /metrics에 0으로 노출
+    text = registry.render()
+    for outcome in ENROLLMENT_OUTCOME_LABELS:
+        assert f'enrollment_outcomes_total{{outcome="{outcome}"}}' in text
+
+
+@pytest.mark.parametrize("role, expected", [("student", 403), ("admin", 200)])
+def test_metrics_endpoint_is_admin_only(role, expected):
+    from fastapi.testclient import TestClient
+    from core import container as container_module
+    from core.dependencies import get_async_user_service, get_current_user_uid
+    import main
+
+    user_service = MagicMock()
+
+    async def get_user(uid):
+        return User(uid=uid, role=role)
+
+    user_service.get_user = get_user
+    main.app.dependency_overrides[get_current_user_uid] = lambda: "u1"
+    main.app.dependency_overrides[get_async_user_service] = lambda: user_service
+    try:
+        with TestClient(main.app) as client:
+            client.get("/api/health")
+            response = client.get("/api/metrics")
+    finally:
+        main.app.dependency_overrides.clear()
+        container_module.shutdown_container()
+
+    assert response.status_code == expected
+    if expected == 200:
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
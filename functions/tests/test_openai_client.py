@@ -0,0 +1,32 @@
+import pytest
+from core import openai_client
+from core.openai_client import get_openai_client, reset_openai_client
+
+@pytest.fixture(autouse=True)
+def fresh_client():
+    reset_openai_client()
+    yield
+    reset_openai_client()
+
+def test_client_is_created_once_per_instance(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+    client, error = get_openai_client()
+
+    assert error is None
+    assert get_openai_client()[0] is client
+    assert client.max_retries == openai_client.OPENAI_MAX_RETRIES
+    assert client.timeout.connect == openai_client.OPENAI_CONNECT_TIMEOUT_SEC
+
+def test_missing_key_reports_error_without_client(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    assert get_openai_client() == (None, "OPENAI_API_KEY Missing")
+
+def test_reset_builds_new_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    first, _ = get_openai_client()
+
+    reset_openai_client()
+
+    assert get_openai_client()[0] is not first
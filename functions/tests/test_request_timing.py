@@ -0,0 +1,122 @@
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core import request_timing
+from core.request_timing import RequestTiming, TimedRepository, TimingMiddleware
+from repositories.base import TransactionalEnrollmentRepository
+
+
+class FakeRepo(TransactionalEnrollmentRepository):
+    def list(self):
+        return []
+
+    def get(self, id):
+        return {"id": id}
+
+    async def get_async(self, id):
+        return {"id": id}
+
+    def save(self, data):
+        return data
+
+    def delete(self, id):
+        return True
+
+    def enroll_atomic(self, student_id, course_id, validate):
+        return None
+
+    def peek(self, id):
+        return None
+
+
+def make_app(repo):
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        await repo.get_async(item_id)
+        repo.save(repo.get(item_id))
+        request_timing.record_span("openai", 12.0)
+        request_timing.record_tokens(prompt=10, completion=5)
+        return {"ok": True}
+
+    return app
+
+
+def test_middleware_reports_spans_in_header_and_one_log_line(capsys):
+    client = TestClient(make_app(TimedRepository(FakeRepo())))
+
+    response = client.get("/items/c1")
+
+    header = response.headers["server-timing"]
+    assert header.startswith("total;dur=")
+    assert 'fs_read;desc="2 calls"' in header
+    assert 'fs_write;desc="1 calls"' in header
+    assert 'openai;desc="1 calls";dur=12.0' in header
+    assert 'tokens;desc="completion=5 prompt=10"' in header
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    assert len(lines) == 1
+    assert lines[0]["route"] == "/items/{item_id}"
+    assert lines[0]["status"] == 200
+    assert lines[0]["spans"]["fs_read"]["count"] == 2
+    assert lines[0]["tokens"] == {"prompt": 10, "completion": 5}
+
+
+def test_timed_repository_keeps_repository_type_and_skips_cache_only_methods():
+    repo = TimedRepository(FakeRepo())
+    timing = RequestTiming("GET", "/")
+    token = request_timing._current.set(timing)
+    try:
+        repo.peek("c1")
+        repo.enroll_atomic("s1", "c1", lambda *args: None)
+    finally:
+        request_timing._current.reset(token)
+
+    assert isinstance(repo, TransactionalEnrollmentRepository)
+    assert list(timing.spans) == ["fs_write"]
+
+
+def test_spans_outside_a_request_are_ignored():
+    TimedRepository(FakeRepo()).get("c1")
+    request_timing.record_span("openai", 1.0)
+    assert request_timing.current() is None
+
+
+def test_catalog_reads_served_from_cache_are_not_counted_as_rpcs():
+    import asyncio
+    from repositories.course_cache import CourseCatalogCache
+
+    class CourseRepo:
+        def __init__(self, cache):
+            self.cache = cache
+            self.rpcs = 0
+
+        def _stream_all(self):
+            self.rpcs += 1
+            return []
+
+        async def _stream_all_async(self):
+            return self._stream_all()
+
+        def list(self):
+            return self.cache.get(self._stream_all)
+
+        async def list_versioned(self):
+            return await self.cache.get_versioned_async(self._stream_all_async)
+
+    inner = CourseRepo(CourseCatalogCache(ttl_sec=60))
+    repo = TimedRepository(inner)
+    timing = RequestTiming("GET", "/")
+    token = request_timing._current.set(timing)
+    try:
+        repo.list()
+        repo.list()
+        asyncio.run(repo.list_versioned())
+    finally:
+        request_timing._current.reset(token)
+
+    assert inner.rpcs == 1
+    assert timing.spans["fs_read"]["count"] == 1
+    assert timing.spans["cache"]["count"] == 2
@@ -0,0 +1,46 @@
+from services import response_cache as response_cache_module
+from services.intent_router import cache_text
+from services.response_cache import ResponseCache
+
+
+def test_get_returns_stored_response_and_counts_hits():
+    cache = ResponseCache(ttl_sec=60, max_entries=10)
+    assert cache.get("k") is None
+    cache.put("k", "answer")
+
+    assert cache.get("k") == "answer"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(response_cache_module.time, "monotonic", lambda: now[0])
+    cache = ResponseCache(ttl_sec=10, max_entries=10)
+    cache.put("k", "answer")
+
+    now[0] = 111.0
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(ttl_sec=60, max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_cache_text_ignores_spacing_and_punctuation_but_skips_enrollment():
+    assert cache_text("수강 가능한 강의 알려줘") == cache_text("수강가능한  강의 알려줘!")
+    assert cache_text("Python 강의?") == cache_text("python강의")
+    assert cache_text("파이썬 신청해줘") is None
+
+
+def test_cache_text_keeps_words_that_change_the_question():
+    assert cache_text("전체 강의 목록") != cache_text("강의 목록")
+    assert cache_text("수업 알려줘") != cache_text("과목 알려줘")
@@ -0,0 +1,67 @@
+from models.course import Course, ScheduleSlot
+from services import schedule
+import pytest
+from services.schedule import ScheduleIndex, course_mask, get_schedule_index, mask_from_bytes, mask_to_bytes, normalize_schedule, parse_time
+
+def make_course(id, start, end):
+    return Course(id=id, title=id, instructor="T", max_students=10, start_time=start, end_time=end)
+
+def test_same_day_overlap_conflicts():
+    a = make_course("a", "Mon 09:00", "Mon 10:30")
+    b = make_course("b", "Mon 10:00", "Mon 11:00")
+    assert course_mask(a) & course_mask(b)
+
+def test_adjacent_and_other_day_do_not_conflict():
+    a = make_course("a", "Mon 09:00", "Mon 10:00")
+    adjacent = make_course("b", "Mon 10:00", "Mon 11:00")
+    other_day = make_course("c", "Tue 09:00", "Tue 10:00")
+    assert not course_mask(a) & course_mask(adjacent)
+    assert not course_mask(a) & course_mask(other_day)
+
+def test_dayless_course_compared_by_time_only():
+    dayless = make_course("a", "09:00", "10:00")
+    assert course_mask(dayless) & course_mask(make_course("b", "Wed 09:30", "Wed 10:30"))
+
+def test_invalid_time_never_conflicts():
+    assert course_mask(make_course("a", "soon", "later")) == 0
+    assert course_mask(make_course("b", None, None)) == 0
+
+def test_out_of_range_time_is_rejected():
+    assert parse_time("Mon 09:30") == (0, 570)
+    for value in ["24:00", "09:60", "-1:30", "Mon 99:99", "9:00:00"]:
+        assert parse_time(value) == (None, None)
+    with pytest.raises(ValueError):
+        normalize_schedule(make_course("a", "Mon 09:00", "Mon 24:30"))
+    assert normalize_schedule(make_course("b", None, None)) == []
+
+def test_stored_schedule_is_clamped_to_one_week():
+    course = make_course("a", None, None)
+    course.schedule = [ScheduleSlot(start=-30, end=30), ScheduleSlot(start=10070, end=99999)]
+    mask = course_mask(course)
+    assert mask == ((1 << 30) - 1) | (((1 << 10) - 1) << 10070)
+    assert mask_from_bytes(mask_to_bytes(mask)) == mask
+
+def test_filter_available_excludes_enrolled_and_conflicting():
+    courses = [
+        make_course("mine", "Mon 09:00", "Mon 10:00"),
+        make_course("clash", "Mon 09:30", "Mon 10:30"),
+        make_course("free", "Mon 10:00", "Mon 11:00"),
+        make_course("notime", None, None),
+    ]
+    available = ScheduleIndex(courses).filter_available(courses, {"mine"})
+    assert [c.id for c in available] == ["free", "notime"]
+
+def test_index_is_reused_per_catalog_version(monkeypatch):
+    monkeypatch.setattr(schedule, "_index", None)
+    courses = [make_course("a", "Mon 09:00", "Mon 10:00")]
+
+    first = get_schedule_index(courses, 1)
+    assert get_schedule_index(courses, 1) is first
+    assert get_schedule_index(courses, 2) is not first
+    assert get_schedule_index(courses, None) is not first
+
+def test_stored_schedule_takes_precedence_and_roundtrips():
+    course = make_course("a", "Mon 09:00", "Mon 10:00")
+    course.schedule = [ScheduleSlot(start=0, end=30)]
+    assert course_mask(course) == (1 << 30) - 1
+    assert mask_from_bytes(mask_to_bytes(course_mask(course))) == course_mask(course)
@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import MagicMock
+from models.course import Course
+from repositories.firestore_repo import FirestoreUserRepository
+from services import stats_service
+from services.stats_service import StatsService
+
+@pytest.fixture(autouse=True)
+def reset_student_count(monkeypatch):
+    monkeypatch.setattr(stats_service, "_student_count", None)
+
+@pytest.fixture
+def course_service():
+    service = MagicMock()
+    service.get_all_courses.return_value = [
+        Course(id="c1", title="C1", instructor="T", max_students=10, current_count=5),
+        Course(id="c2", title="C2", instructor="T", max_students=30, current_count=15),
+    ]
+    return service
+
+@pytest.fixture
+def user_service():
+    service = MagicMock()
+    service.count_students.return_value = 42
+    return service
+
+def test_get_stats(course_service, user_service):
+    stats = StatsService(course_service, user_service).get_stats()
+
+    assert stats["total_courses"] == 2
+    assert stats["total_students"] == 42
+    assert stats["total_enrollments"] == 20
+    assert stats["fill_ratio"] == 0.5
+    assert [c["fill_ratio"] for c in stats["courses"]] == [0.5, 0.5]
+    user_service.get_all_users.assert_not_called()
+
+def test_student_count_is_reused(course_service, user_service):
+    service = StatsService(course_service, user_service)
+
+    service.get_stats()
+    service.get_stats()
+
+    user_service.count_students.assert_called_once()
+
+def test_user_repo_count_students_uses_aggregations():
+    mock_db = MagicMock()
+    collection = mock_db.collection.return_value
+
+    def aggregation(alias, value):
+        result = MagicMock(alias=alias, value=value)
+        return MagicMock(get=MagicMock(return_value=[[result]]))
+
+    collection.count.return_value = aggregation("total", 12)
+    # role이 "student"가 아닌 문서만 읽음 (대소문자가 섞인 레거시 값은 _to_user와 같이 판단)
+    roles = [MagicMock(to_dict=MagicMock(return_value={"role": r})) for r in ["admin", "aDmin", "teacher"]]
+    collection.where.return_value.select.return_value.stream.return_value = roles
+
+    assert FirestoreUserRepository(mock_db).count_students() == 10
+    collection.stream.assert_not_called()
+
+def test_user_repo_normalizes_role_on_save():
+    from models.user import User
+
+    mock_db = MagicMock()
+    repo = FirestoreUserRepository(mock_db)
+    user = User(uid="u1")
+    user.role = "Admin"
+
+    repo.save(user)
+
+    assert mock_db.collection.return_value.document.return_value.set.call_args[0][0]["role"] == "admin"
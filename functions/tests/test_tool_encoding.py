@@ -0,0 +1,48 @@
+import json
+from models.course import Course
+from services import tool_encoding
+from services.tool_encoding import CourseEncodingCache, encode_course, encode_course_list
+
+def make_course(i, description=None):
+    return Course(
+        id=f"c{i}", title=f"강의 {i}", instructor="T", max_students=30, current_count=i,
+        start_time="Mon 09:00", end_time="Mon 10:30", description=description,
+    )
+
+def test_encode_course_uses_short_keys_and_truncates_description():
+    item = encode_course(make_course(1, description="가" * 100))
+    assert item["tm"] == "Mon 09:00-10:30"
+    assert item["s"] == "1/30"
+    assert len(item["d"]) == tool_encoding.DESCRIPTION_MAX_CHARS + 1
+
+def test_encode_course_list_respects_budget_and_paginates():
+    courses = [make_course(i, description="설명") for i in range(300)]
+
+    first = encode_course_list(courses, version=1, budget=200)
+    payload = json.loads(first)
+    assert tool_encoding.estimate_tokens(first) <= 200
+    assert payload["total"] == 300
+    assert 0 < len(payload["courses"]) == payload["next_offset"]
+
+    rest = json.loads(encode_course_list(courses, version=1, offset=payload["next_offset"], budget=200))
+    assert rest["courses"][0]["id"] == courses[payload["next_offset"]].id
+
+def test_encode_course_list_last_page_has_no_next_offset():
+    payload = json.loads(encode_course_list([make_course(1)], version=None))
+    assert payload["next_offset"] is None and len(payload["courses"]) == 1
+
+def test_encoding_cache_is_scoped_to_catalog_version():
+    cache = CourseEncodingCache()
+    course = make_course(1)
+    cache.get(course, 1)
+    assert cache.get(course.model_copy(update={"current_count": 9}), 1) == cache.get(course, 1)
+    assert '"s":"9/30"' in cache.get(course.model_copy(update={"current_count": 9}), 2)
+
+def test_catalog_digest_cache_is_keyed_on_budget(monkeypatch):
+    monkeypatch.setattr(tool_encoding, "_digest_key", None)
+    courses = [make_course(i) for i in range(5)]
+
+    assert tool_encoding.catalog_digest(courses, 1, budget=10_000) is not None
+    # 같은 버전이라도 예산이 다르면 캐시된 요약을 재사용하지 않음
+    assert tool_encoding.catalog_digest(courses, 1, budget=5) is None
+    assert tool_encoding.catalog_digest(courses, 1, budget=10_000) is not None